@@ -0,0 +1,181 @@
+"""Immutable bundle of a fitted preprocessor and its anomaly models."""
+from __future__ import annotations
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, fields, replace
+from typing import Any, Callable
+
+from ai_engine.calibration import ScoreCalibration, combined_scores
+from ai_engine.data_preprocessor import DataPreprocessor, parse_encodings
+from ai_engine.isolation_forest import IsolationForestModel
+from ai_engine.one_class_svm import OneClassSVMModel
+from config import Config
+
+ProgressCallback = Callable[[str, float], None]
+
+
+@dataclass(frozen=True, slots=True)
+class TrainingReport:
+    """Wall-clock breakdown of one training run, in seconds."""
+
+    training_rows: int
+    feature_width: int
+    preprocessing_seconds: float
+    isolation_forest_seconds: float
+    one_class_svm_seconds: float
+    total_seconds: float
+    parallel: bool
+
+    def as_dict(self) -> dict[str, Any]:
+        return {key: round(value, 4) if isinstance(value, float) else value for key, value in asdict(self).items()}
+
+    @classmethod
+    def from_dict(cls, payload: dict[str, Any] | None) -> "TrainingReport | None":
+        if not payload:
+            return None
+        try:
+            return cls(**{field.name: payload[field.name] for field in fields(cls)})
+        except KeyError:
+            return None
+
+
+@dataclass(frozen=True, slots=True)
+class ModelBundle:
+    """Everything needed to score events, swapped into the engine as a single reference."""
+
+    preprocessor: DataPreprocessor
+    isolation_forest: IsolationForestModel
+    one_class_svm: OneClassSVMModel
+    training_rows: int
+    version: str | None = None
+    report: TrainingReport | None = None
+    # Absent on artifacts saved before calibration existed; scoring then falls back to raw scores.
+    calibration: ScoreCalibration | None = None
+    # Isolation Forest scores alone, for events the cascade settles without the SVM.
+    isolation_calibration: ScoreCalibration | None = None
+
+    def components(self) -> dict[str, Any]:
+        components = {
+            "preprocessor": self.preprocessor,
+            "isolation_forest": self.isolation_forest,
+            "one_class_svm": self.one_class_svm,
+        }
+        if self.calibration is not None:
+            components["calibration"] = self.calibration
+        if self.isolation_calibration is not None:
+            components["isolation_calibration"] = self.isolation_calibration
+        return components
+
+    @classmethod
+    def from_components(
+        cls,
+        components: dict[str, Any],
+        training_rows: int,
+        version: str | None,
+        report: TrainingReport | None = None,
+    ) -> "ModelBundle":
+        return cls(
+            preprocessor=components["preprocessor"],
+            isolation_forest=components["isolation_forest"],
+            one_class_svm=components["one_class_svm"],
+            training_rows=training_rows,
+            version=version,
+            report=report,
+            calibration=components.get("calibration"),
+            isolation_calibration=components.get("isolation_calibration"),
+        )
+
+    def with_version(self, version: str | None) -> "ModelBundle":
+        return replace(self, version=version)
+
+
+def build_preprocessor() -> DataPreprocessor:
+    """Return an unfitted preprocessor configured from ``Config``."""
+    return DataPreprocessor(
+        sparse=Config.AI_SPARSE_FEATURES,
+        encodings=parse_encodings(Config.AI_CATEGORICAL_ENCODING),
+    )
+
+
+def build_isolation_forest() -> IsolationForestModel:
+    return IsolationForestModel(n_jobs=Config.AI_ISOLATION_FOREST_N_JOBS)
+
+
+def build_one_class_svm() -> OneClassSVMModel:
+    return OneClassSVMModel(backend=Config.AI_SVM_BACKEND, n_components=Config.AI_SVM_APPROX_COMPONENTS)
+
+
+def artifact_schema() -> dict:
+    """Everything an artifact must agree with to be reused: feature layout and model choice."""
+    return {
+        "features": build_preprocessor().schema(),
+        "one_class_svm": {"backend": Config.AI_SVM_BACKEND, "n_components": Config.AI_SVM_APPROX_COMPONENTS},
+    }
+
+
+def train_bundle(
+    logs: list[dict],
+    progress: ProgressCallback | None = None,
+    parallel: bool | None = None,
+) -> ModelBundle:
+    """Fit a brand-new preprocessor and models without touching any bundle in use.
+
+    Both models only read the feature matrix, so with ``parallel`` they are fitted side by
+    side on two threads: the forest builds its trees in joblib workers and libsvm releases
+    the GIL while it solves.
+    """
+    report = progress or (lambda stage, fraction: None)
+    parallel = Config.AI_PARALLEL_FIT if parallel is None else parallel
+    started = time.perf_counter()
+
+    preprocessor = build_preprocessor()
+    report("preprocessing", 0.3)
+    features = preprocessor.fit(logs)
+    preprocessing_seconds = time.perf_counter() - started
+
+    isolation_forest = build_isolation_forest()
+    one_class_svm = build_one_class_svm()
+    if parallel:
+        report("fitting_models", 0.45)
+        with ThreadPoolExecutor(max_workers=2, thread_name_prefix="ai-fit") as pool:
+            iforest_fit = pool.submit(_timed_fit, isolation_forest, features)
+            svm_fit = pool.submit(_timed_fit, one_class_svm, features)
+            isolation_forest_seconds = iforest_fit.result()
+            one_class_svm_seconds = svm_fit.result()
+    else:
+        report("fitting_isolation_forest", 0.45)
+        isolation_forest_seconds = _timed_fit(isolation_forest, features)
+        report("fitting_one_class_svm", 0.65)
+        one_class_svm_seconds = _timed_fit(one_class_svm, features)
+
+    report("calibrating", 0.8)
+    iso_scores = isolation_forest.decision_scores(features)
+    calibration = ScoreCalibration.fit(
+        combined_scores(iso_scores, one_class_svm.decision_scores(features)), points=Config.AI_CALIBRATION_POINTS
+    )
+    isolation_calibration = ScoreCalibration.fit(-iso_scores, points=Config.AI_CALIBRATION_POINTS)
+    training_report = TrainingReport(
+        training_rows=len(logs),
+        feature_width=features.shape[1],
+        preprocessing_seconds=preprocessing_seconds,
+        isolation_forest_seconds=isolation_forest_seconds,
+        one_class_svm_seconds=one_class_svm_seconds,
+        total_seconds=time.perf_counter() - started,
+        parallel=parallel,
+    )
+    return ModelBundle(
+        preprocessor,
+        isolation_forest,
+        one_class_svm,
+        len(logs),
+        report=training_report,
+        calibration=calibration,
+        isolation_calibration=isolation_calibration,
+    )
+
+
+def _timed_fit(model, features) -> float:
+    started = time.perf_counter()
+    model.fit(features)
+    return time.perf_counter() - started
@@ -0,0 +1,76 @@
+"""Map raw anomaly scores to risk through their percentile on the training data.
+
+Decision values from the Isolation Forest and One-Class SVM have model-specific scales that
+move with every retrain, so a fixed cut-off on them produces unpredictable alert volumes.
+At training time the combined score of every training row is summarised as a quantile
+table (``points`` evenly spaced levels, ties collapsed to their mean level), stored in the
+model bundle. At scoring time ``np.interp`` binary-searches that table for each score's
+percentile, and a piecewise-linear map sends the percentiles at the configured tail sizes
+exactly onto the risk thresholds: with a 2% high tail, ``risk >= RISK_HIGH_THRESHOLD``
+means "more anomalous than 98% of the training events", whatever the raw scale.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import numpy as np
+
+
+def combined_scores(iso_scores: np.ndarray, svm_scores: np.ndarray) -> np.ndarray:
+    """Mean of the two decision values, negated so that higher means more anomalous."""
+    return -(np.asarray(iso_scores) + np.asarray(svm_scores)) / 2.0
+
+
+@dataclass(frozen=True, slots=True)
+class ScoreCalibration:
+    """Strictly increasing ``scores`` and the training percentile of each."""
+
+    scores: np.ndarray
+    levels: np.ndarray
+    training_rows: int
+
+    @classmethod
+    def fit(cls, scores: np.ndarray, points: int = 1001) -> "ScoreCalibration":
+        scores = np.asarray(scores, dtype=np.float64)
+        scores = scores[np.isfinite(scores)]
+        if not len(scores):
+            raise ValueError("Calibration needs at least one finite score")
+        levels = np.linspace(0.0, 1.0, max(2, points))
+        quantiles = np.quantile(scores, levels)
+        unique, inverse = np.unique(quantiles, return_inverse=True)
+        mean_levels = np.bincount(inverse, weights=levels) / np.bincount(inverse)
+        return cls(unique, mean_levels, len(scores))
+
+    def percentiles(self, scores: np.ndarray) -> np.ndarray:
+        """Share of training scores below each score, interpolated between table points."""
+        scores = np.asarray(scores, dtype=np.float64)
+        if len(self.scores) == 1:
+            # Constant training scores: below, equal to or above the only value.
+            return np.sign(scores - self.scores[0]) * 0.5 + 0.5
+        return np.interp(scores, self.scores, self.levels, left=0.0, right=1.0)
+
+    def risk(self, scores: np.ndarray, anchors: list[tuple[float, float]]) -> np.ndarray:
+        """Map percentiles to risk through ``(percentile, risk)`` anchors (plus 0->0 and 1->1)."""
+        points = sorted({(0.0, 0.0), (1.0, 1.0), *anchors})
+        return np.interp(self.percentiles(scores), [p for p, _ in points], [r for _, r in points])
+
+    def stats(self) -> dict:
+        return {
+            "points": len(self.scores),
+            "training_rows": self.training_rows,
+            "median_score": round(float(np.interp(0.5, self.levels, self.scores)), 6),
+        }
+
+
+def tail_anchors(thresholds: dict[float, float]) -> list[tuple[float, float]]:
+    """``{risk threshold: top percent}`` -> ``(percentile, risk)`` anchors for ``ScoreCalibration.risk``.
+
+    Higher thresholds must have smaller tails, otherwise the map would not be monotonic.
+    """
+    anchors = sorted((1.0 - percent / 100.0, threshold) for threshold, percent in thresholds.items())
+    for (low_percentile, low_risk), (high_percentile, high_risk) in zip(anchors, anchors[1:]):
+        if not (low_percentile < high_percentile and low_risk < high_risk):
+            raise ValueError("Risk tails must shrink as the thresholds rise")
+    if anchors and not (0.0 < anchors[0][0] and anchors[-1][0] < 1.0):
+        raise ValueError("Risk tails must be between 0 and 100 percent")
+    return anchors
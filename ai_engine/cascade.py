@@ -0,0 +1,92 @@
+"""Cascade scoring: consult the One-Class SVM only for events the cheap stages cannot settle.
+
+The heuristic rules and the Isolation Forest run on every event. An event then leaves the
+cascade early when
+
+* ``rules``: a rule already scores it at or above the critical threshold, so no model
+  output can change its level;
+* ``clear_normal`` / ``clear_anomaly``: its Isolation Forest score sits below the lower or
+  above the upper training percentile of the uncertainty band.
+
+Everything else reaches the ``one_class_svm`` stage and is scored by both models, exactly as
+in the full ensemble.
+"""
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass
+
+import numpy as np
+
+from ai_engine.calibration import ScoreCalibration
+
+SCORING_MODES = {"ensemble", "cascade"}
+STAGES = ("rules", "clear_normal", "clear_anomaly", "one_class_svm")
+RULES, CLEAR_NORMAL, CLEAR_ANOMALY, ONE_CLASS_SVM = range(len(STAGES))
+
+
+def cascade_stages(
+    iso_percentiles: np.ndarray,
+    rule_scores: np.ndarray,
+    lower: float,
+    upper: float,
+    rule_cutoff: float,
+) -> np.ndarray:
+    """Index into ``STAGES`` of the stage that settles each event."""
+    stages = np.full(len(iso_percentiles), ONE_CLASS_SVM, dtype=np.int8)
+    stages[iso_percentiles < lower] = CLEAR_NORMAL
+    stages[iso_percentiles > upper] = CLEAR_ANOMALY
+    stages[np.asarray(rule_scores) >= rule_cutoff] = RULES
+    return stages
+
+
+@dataclass(frozen=True)
+class SvmPlan:
+    """Which events the One-Class SVM scores: all, none, or those inside a cascade band.
+
+    Plans are plain data, so scoring pool workers apply them to their own chunks and a
+    batch is preprocessed and scored by both models in a single task.
+    """
+
+    mode: str  # "all", "none" or "band"
+    calibration: ScoreCalibration | None = None
+    lower: float = 0.0
+    upper: float = 1.0
+    rule_cutoff: float = 1.0
+
+    @classmethod
+    def band(cls, calibration: ScoreCalibration, lower: float, upper: float, rule_cutoff: float) -> "SvmPlan":
+        return cls("band", calibration, lower, upper, rule_cutoff)
+
+    def stages(self, iso_scores: np.ndarray, rule_scores: np.ndarray) -> np.ndarray:
+        """Settling stage per event; empty when no SVM stage runs, so nothing is counted."""
+        if self.mode == "none":
+            return np.zeros(0, dtype=np.int8)
+        if self.mode == "all":
+            return np.full(len(iso_scores), ONE_CLASS_SVM, dtype=np.int8)
+        return cascade_stages(
+            self.calibration.percentiles(-np.asarray(iso_scores)), rule_scores, self.lower, self.upper, self.rule_cutoff
+        )
+
+
+class CascadeCounters:
+    """Thread-safe tally of the stage that settled each scored event."""
+
+    def __init__(self) -> None:
+        self._counts = np.zeros(len(STAGES), dtype=np.int64)
+        self._lock = threading.Lock()
+
+    def record(self, stages: np.ndarray) -> None:
+        counts = np.bincount(stages, minlength=len(STAGES))
+        with self._lock:
+            self._counts += counts
+
+    def stats(self) -> dict:
+        with self._lock:
+            counts = self._counts.tolist()
+        events = sum(counts)
+        return {
+            "events": events,
+            "stages": dict(zip(STAGES, counts)),
+            "svm_skip_rate": round(1 - counts[ONE_CLASS_SVM] / events, 4) if events else None,
+        }
@@ -1,56 +1,251 @@
 """Utilities for converting raw activity logs into ML-ready features."""
 from __future__ import annotations
 
-import pandas as pd
+import math
+import zlib
+from collections import Counter
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+
+import numpy as np
+from dateutil import parser as date_parser
+import scipy.sparse as sp
 
 NUMERICAL_FIELDS = ["bytes_transferred", "files_accessed", "failed_attempts", "session_duration"]
 CATEGORICAL_FIELDS = ["event_type", "source_ip", "device", "location"]
+DERIVED_FIELDS = ["hour", "day_of_week"]
+# Bump whenever the meaning of an encoded column changes so stale model artifacts are rejected.
+SCHEMA_VERSION = 3
+
+
+ENCODING_MODES = {"onehot", "hash", "topk"}
+OTHER_BUCKET = "__other"
+
+
+@dataclass(frozen=True, slots=True)
+class FieldEncoding:
+    """How one categorical field is turned into columns.
+
+    ``onehot`` keeps one column per value seen during fit and drops unseen values,
+    ``hash`` folds every value into ``size`` buckets, and ``topk`` keeps the ``size``
+    most frequent values plus an explicit bucket for everything else.
+    """
+
+    mode: str = "onehot"
+    size: int = 0
+
+    def __post_init__(self) -> None:
+        if self.mode not in ENCODING_MODES:
+            raise ValueError(f"Unknown categorical encoding '{self.mode}'")
+        if self.mode != "onehot" and self.size <= 0:
+            raise ValueError(f"Encoding '{self.mode}' needs a positive size")
+
+    def describe(self) -> str:
+        return self.mode if self.mode == "onehot" else f"{self.mode}:{self.size}"
+
+
+def parse_encodings(spec: str | None) -> dict[str, FieldEncoding]:
+    """Parse ``"source_ip=hash:4096,device=topk:500"``; unlisted fields stay one-hot."""
+    encodings: dict[str, FieldEncoding] = {}
+    for item in (spec or "").split(","):
+        item = item.strip()
+        if not item:
+            continue
+        field, _, rule = item.partition("=")
+        field = field.strip()
+        if field not in CATEGORICAL_FIELDS:
+            raise ValueError(f"Unknown categorical field '{field}' in encoding spec")
+        mode, _, size = rule.strip().partition(":")
+        try:
+            encodings[field] = FieldEncoding(mode.strip() or "onehot", int(size) if size else 0)
+        except ValueError as exc:
+            raise ValueError(f"Invalid encoding for '{field}': {rule!r}") from exc
+    return encodings
+
+
+class FeatureEncoder:
+    """Encode events straight into a preallocated matrix using the vocabulary fixed at fit time.
+
+    Each categorical value maps to its one-hot column index, so scoring never builds a
+    DataFrame. Columns follow the pandas ``get_dummies`` layout: derived and numerical
+    fields first, then one block of sorted values per categorical field.
+    """
+
+    def __init__(
+        self,
+        vocabulary: dict[str, list[str]],
+        dtype: type = np.float64,
+        sparse: bool = False,
+        encodings: dict[str, FieldEncoding] | None = None,
+    ) -> None:
+        self.dtype = dtype
+        self.sparse = sparse
+        self.encodings = {field: (encodings or {}).get(field, FieldEncoding()) for field in CATEGORICAL_FIELDS}
+        self.columns = DERIVED_FIELDS + NUMERICAL_FIELDS
+        self.category_index: dict[str, dict[str, int]] = {}
+        # Column used for values missing from the index: -1 drops them, otherwise the "other" bucket.
+        self.fallback: dict[str, int] = {}
+        self.hash_offset: dict[str, int] = {}
+        for field in CATEGORICAL_FIELDS:
+            encoding = self.encodings[field]
+            offset = len(self.columns)
+            if encoding.mode == "hash":
+                self.category_index[field] = {}
+                self.fallback[field] = -1
+                self.hash_offset[field] = offset
+                self.columns = self.columns + [f"{field}__hash_{bucket}" for bucket in range(encoding.size)]
+                continue
+            values = vocabulary.get(field, [])
+            self.category_index[field] = {value: offset + position for position, value in enumerate(values)}
+            self.columns = self.columns + [f"{field}_{value}" for value in values]
+            self.fallback[field] = -1
+            if encoding.mode == "topk":
+                self.fallback[field] = len(self.columns)
+                self.columns = self.columns + [f"{field}_{OTHER_BUCKET}"]
+        self.width = len(self.columns)
+
+    def encode(self, logs: list[dict]):
+        """Return a dense ndarray or, when ``sparse`` is set, a CSR matrix with one row per log."""
+        values, cols = self._entries(logs)
+        present = (cols >= 0) & (values != 0)
+        if self.sparse:
+            indptr = np.zeros(len(logs) + 1, dtype=np.int64)
+            np.cumsum(present.sum(axis=1), out=indptr[1:])
+            # Entries are laid out in ascending column order, so the CSR indices come out sorted.
+            return sp.csr_matrix(
+                (values[present].astype(self.dtype), cols[present], indptr), shape=(len(logs), self.width)
+            )
+        matrix = np.zeros((len(logs), self.width), dtype=self.dtype)
+        rows = np.broadcast_to(np.arange(len(logs))[:, None], cols.shape)
+        matrix[rows[present], cols[present]] = values[present]
+        return matrix
+
+    def _entries(self, logs: list[dict]) -> tuple[np.ndarray, np.ndarray]:
+        """Return per-row candidate (value, column) pairs; column -1 marks an unseen category."""
+        dense_width = len(DERIVED_FIELDS) + len(NUMERICAL_FIELDS)
+        values = np.ones((len(logs), dense_width + len(CATEGORICAL_FIELDS)), dtype=np.float64)
+        cols = np.empty(values.shape, dtype=np.int64)
+        cols[:, :dense_width] = np.arange(dense_width)
+        if not logs:
+            return values, cols
+        values[:, :dense_width] = [self._dense_values(log) for log in logs]
+        for offset, field in enumerate(CATEGORICAL_FIELDS, start=dense_width):
+            if field in self.hash_offset:
+                base, buckets = self.hash_offset[field], self.encodings[field].size
+                cols[:, offset] = [base + _stable_hash(_category_value(log.get(field))) % buckets for log in logs]
+                continue
+            index, fallback = self.category_index[field], self.fallback[field]
+            # One-hot drops values outside the fitted vocabulary, as get_dummies + reindex did.
+            cols[:, offset] = [index.get(_category_value(log.get(field)), fallback) for log in logs]
+        return values, cols
+
+    @staticmethod
+    def _dense_values(log: dict) -> list[float]:
+        timestamp = _parse_timestamp(log.get("timestamp"))
+        hour, day_of_week = (timestamp.hour, timestamp.weekday()) if timestamp else (0, 0)
+        return [hour, day_of_week] + [to_number(log.get(field)) for field in NUMERICAL_FIELDS]
 
 
 class DataPreprocessor:
-    def __init__(self) -> None:
+    def __init__(
+        self,
+        dtype: type = np.float64,
+        sparse: bool = False,
+        encodings: dict[str, FieldEncoding] | None = None,
+    ) -> None:
+        # float32 halves memory but cannot hold byte counts above 2**24 exactly, which shifts
+        # One-Class SVM decisions; keep float64 unless that trade-off is acceptable.
+        self.dtype = dtype
+        # CSR output keeps memory proportional to non-zeros when source_ip or device have
+        # tens of thousands of distinct values; both models consume it directly.
+        self.sparse = sparse
+        # Hashing or top-K encodings bound the feature width regardless of fleet size.
+        self.encodings = {field: (encodings or {}).get(field, FieldEncoding()) for field in CATEGORICAL_FIELDS}
         self.fitted_columns: list[str] | None = None
+        self.encoder: FeatureEncoder | None = None
 
-    def fit(self, logs: list[dict]) -> pd.DataFrame:
-        frame = self._to_frame(logs)
-        encoded = self._encode(frame)
-        self.fitted_columns = encoded.columns.tolist()
-        return encoded
+    def schema(self) -> dict:
+        """Describe the feature layout independent of the fitted vocabulary."""
+        return {
+            "version": SCHEMA_VERSION,
+            "derived": DERIVED_FIELDS,
+            "numerical": NUMERICAL_FIELDS,
+            "categorical": CATEGORICAL_FIELDS,
+            "sparse": self.sparse,
+            "encodings": {field: encoding.describe() for field, encoding in self.encodings.items()},
+        }
 
-    def transform(self, log: dict | list[dict]) -> pd.DataFrame:
+    def fit(self, logs: list[dict]):
+        vocabulary = {}
+        for field, encoding in self.encodings.items():
+            if encoding.mode == "hash":
+                continue
+            counts = Counter(_category_value(log.get(field)) for log in logs)
+            if encoding.mode == "topk":
+                ranked = sorted(counts.items(), key=lambda item: (-item[1], item[0]))[: encoding.size]
+                vocabulary[field] = sorted(value for value, _ in ranked)
+            else:
+                vocabulary[field] = sorted(counts)
+        self.encoder = FeatureEncoder(vocabulary, self.dtype, self.sparse, self.encodings)
+        self.fitted_columns = self.encoder.columns
+        return self.encoder.encode(logs)
+
+    def transform(self, log: dict | list[dict]):
         logs = log if isinstance(log, list) else [log]
-        frame = self._to_frame(logs)
-        encoded = self._encode(frame)
-        if self.fitted_columns is None:
-            self.fitted_columns = encoded.columns.tolist()
-        else:
-            for column in self.fitted_columns:
-                if column not in encoded.columns:
-                    encoded[column] = 0
-            encoded = encoded[self.fitted_columns]
-        return encoded
-
-    def _to_frame(self, logs: list[dict]) -> pd.DataFrame:
-        frame = pd.DataFrame(logs)
-        if "timestamp" in frame.columns:
-            frame["timestamp"] = pd.to_datetime(frame["timestamp"], errors="coerce")
-            frame["hour"] = frame["timestamp"].dt.hour.fillna(0)
-            frame["day_of_week"] = frame["timestamp"].dt.dayofweek.fillna(0)
-        else:
-            frame["hour"] = 0
-            frame["day_of_week"] = 0
-        for field in NUMERICAL_FIELDS:
-            if field not in frame:
-                frame[field] = 0
-            frame[field] = pd.to_numeric(frame[field], errors="coerce").fillna(0)
-        for field in CATEGORICAL_FIELDS:
-            if field not in frame:
-                frame[field] = "unknown"
-            frame[field] = frame[field].fillna("unknown")
-        return frame
-
-    def _encode(self, frame: pd.DataFrame) -> pd.DataFrame:
-        categorical = pd.get_dummies(frame[CATEGORICAL_FIELDS], prefix=CATEGORICAL_FIELDS, dtype=int)
-        numerical = frame[["hour", "day_of_week"] + NUMERICAL_FIELDS]
-        numerical = numerical.astype(float)
-        return pd.concat([numerical, categorical], axis=1)
+        if self.encoder is None:
+            return self.fit(logs)
+        return self.encoder.encode(logs)
+
+
+def _parse_timestamp(value) -> datetime | None:
+    """Mirror ``pd.to_datetime(..., errors="coerce")`` for a single value."""
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, date):
+        return datetime(value.year, value.month, value.day)
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        if isinstance(value, float) and math.isnan(value):
+            return None
+        # pandas reads bare numbers as nanoseconds since the epoch.
+        return datetime.fromtimestamp(value / 1e9, tz=timezone.utc)
+    text = str(value).strip()
+    if not text:
+        return None
+    try:
+        return datetime.fromisoformat(text)
+    except ValueError:
+        pass
+    try:
+        return date_parser.parse(text)
+    except (ValueError, OverflowError):
+        return None
+
+
+def to_number(value, finite: bool = False) -> float:
+    """Mirror ``pd.to_numeric(..., errors="coerce").fillna(0)`` for a single value.
+
+    With ``finite`` infinities become 0 too, for running totals and statistics that a single
+    overflowing value such as ``"1e400"`` would otherwise poison for good.
+    """
+    if value is None:
+        return 0.0
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return 0.0
+    if finite:
+        return number if math.isfinite(number) else 0.0
+    return 0.0 if math.isnan(number) else number
+
+
+def _category_value(value) -> str:
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return "unknown"
+    return str(value)
+
+
+def _stable_hash(value: str) -> int:
+    # Python's hash() is salted per process; CRC32 keeps buckets stable across workers and restarts.
+    return zlib.crc32(value.encode("utf-8"))
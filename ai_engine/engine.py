@@ -1,20 +1,43 @@
 """Core AI engine orchestrating anomaly detection."""
 from __future__ import annotations
 
+import atexit
+import hashlib
 import json
 import logging
 import os
-from dataclasses import dataclass
-from datetime import datetime
+from collections import OrderedDict
+from dataclasses import dataclass, field, fields
 import re
+import tempfile
+import threading
+import time
+from contextlib import nullcontext
 from typing import Any, Dict
 
-from openai import OpenAI
+import numpy as np
 
+from ai_engine import llm_client, model_store
+from ai_engine.bundle import ModelBundle, ProgressCallback, TrainingReport, artifact_schema, train_bundle
+from ai_engine.calibration import ScoreCalibration, combined_scores, tail_anchors
+from ai_engine.cascade import ONE_CLASS_SVM, SCORING_MODES, CascadeCounters, SvmPlan
 from ai_engine.data_preprocessor import DataPreprocessor
+from ai_engine.insight_queue import InsightQueue
+from ai_engine.ip_reputation import IPReputationStore
 from ai_engine.isolation_forest import IsolationForestModel
+from ai_engine.load_shedding import FULL, HEURISTICS_ONLY, NO_SVM, TIERS, LoadGovernor
+from ai_engine.micro_batcher import MicroBatcher
 from ai_engine.one_class_svm import OneClassSVMModel
-from database.database import fetch_all
+from ai_engine.rate_windows import RATE_COLUMNS, RateTracker
+from ai_engine.rule_engine import EventColumns, RuleStore
+from ai_engine.sampling import sample_activity_logs
+from ai_engine.scoring_pool import LocalScorer, PoolScorer, ScoringPool
+from ai_engine.scoring_service import ScoringClient
+from ai_engine.training_jobs import TrainingJob, TrainingJobManager
+from ai_engine.travel import TRAVEL_COLUMNS, LocationStore, TravelDetector
+from ai_engine.user_agents import UserAgentStore
+from ai_engine.user_profiles import SIGNAL_COLUMNS, ProfileStore
+from config import Config
 from services import alert_service
 
 logger = logging.getLogger(__name__)
@@ -22,6 +45,7 @@ logger = logging.getLogger(__name__)
 RISK_MEDIUM_THRESHOLD = 0.4
 RISK_HIGH_THRESHOLD = 0.7
 RISK_CRITICAL_THRESHOLD = 0.9
+SCORING_SERVICES = {"direct", "batched", "sidecar"}
 
 
 ARABIC_CHAR_PATTERN = re.compile(r"[\u0600-\u06FF]")
@@ -31,58 +55,179 @@ def _is_arabic_prompt(message: str) -> bool:
     return bool(ARABIC_CHAR_PATTERN.search(message))
 
 
+class InsightCache:
+    """TTL + LRU cache of LLM insights keyed on the normalized prompt, model and language.
+
+    With ``path`` set, entries are written through to a JSON file and reloaded on start,
+    so restarts keep paying nothing for prompts that were already answered.
+    """
+
+    def __init__(self, max_entries: int = 512, ttl_seconds: float = 3600, path: str | None = None) -> None:
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.path = path or None
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        if self.path:
+            self._load()
+
+    @staticmethod
+    def key(prompt: str, model: str, language: str) -> str:
+        normalized = " ".join(prompt.split()).casefold()
+        return hashlib.sha256(f"{model}\x00{language}\x00{normalized}".encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> str | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.time():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: str, insight: str) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.time() + self.ttl_seconds, insight)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            if self.path:
+                self._save()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+            if self.path:
+                self._save()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            }
+
+    def _load(self) -> None:
+        try:
+            with open(self.path, encoding="utf-8") as handle:
+                stored = json.load(handle)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as exc:
+            logger.warning("Ignoring unreadable insight cache %s: %s", self.path, exc)
+            return
+        now = time.time()
+        for key, (expires_at, insight) in stored.items():
+            if expires_at > now:
+                self._entries[key] = (expires_at, insight)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _save(self) -> None:
+        directory = os.path.dirname(self.path) or "."
+        try:
+            os.makedirs(directory, exist_ok=True)
+            handle, staging = tempfile.mkstemp(prefix=".insights-", dir=directory)
+            with os.fdopen(handle, "w", encoding="utf-8") as stream:
+                json.dump(self._entries, stream)
+            os.replace(staging, self.path)
+        except OSError as exc:  # pragma: no cover - persistence is best effort
+            logger.warning("Unable to persist insight cache to %s: %s", self.path, exc)
+
+
+insight_cache = InsightCache(
+    max_entries=Config.AI_INSIGHT_CACHE_SIZE,
+    ttl_seconds=Config.AI_INSIGHT_CACHE_TTL_SECONDS,
+    path=Config.AI_INSIGHT_CACHE_PATH,
+)
+
+
+def _insights_available() -> bool:
+    """True when an insight request could reach the LLM: configured, and its circuit not open."""
+    client = llm_client.shared_client()
+    return client is not None and client.breaker.state != "open"
+
+
 def generate_alert_insight(alert_message: str) -> str | None:
-    """Generate an LLM-based insight for the supplied alert."""
-    api_key = os.getenv("HF_API_KEY")
-    if not api_key:
+    """Generate an LLM-based insight for the supplied alert, reusing cached answers."""
+    if not os.getenv("HF_API_KEY"):
         logger.debug("HF_API_KEY not configured; skipping LLM insight generation")
         return None
 
-    client = OpenAI(
-        base_url=os.getenv("HF_API_BASE", "https://router.huggingface.co/v1"),
-        api_key=api_key,
-    )
-    try:
-        use_arabic = _is_arabic_prompt(alert_message)
-        response_language = "Modern Standard Arabic" if use_arabic else "English"
-        response = client.chat.completions.create(
-            model="Qwen/Qwen2.5-7B-Instruct",
-            messages=[
-                {
-                    "role": "system",
-                    "content": (
-                        "You are an AI cyber security analyst. Respond in "
-                        f"{response_language} matching the user's request. Provide concise, well-structured "
-                        "answers with short headings and up to five bullet points, then end with one actionable "
-                        "recommendation. Keep the overall response under roughly 130 words."
-                    ),
-                },
-                {
-                    "role": "user",
-                    "content": (
-                        f"Prompt language preference: {response_language}. "
-                        "Deliver a tidy and concise cyber security insight for this request:\n"
-                        f"{alert_message}\n"
-                        "Ensure the answer remains complete while staying brief."
-                    ),
-                },
-            ],
-            max_tokens=280,
-        )
-    except Exception as exc:  # pragma: no cover - defensive guard against remote API failures
-        logger.warning("Insight generation failed: %s", exc)
+    use_arabic = _is_arabic_prompt(alert_message)
+    response_language = "Modern Standard Arabic" if use_arabic else "English"
+    model = Config.HF_MODEL
+    cache_key = InsightCache.key(alert_message, model, response_language)
+    cached = insight_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    client = llm_client.shared_client()
+    if client is None:
         return None
-    return response.choices[0].message.content
+    insight = client.complete(
+        model=model,
+        messages=[
+            {
+                "role": "system",
+                "content": (
+                    "You are an AI cyber security analyst. Respond in "
+                    f"{response_language} matching the user's request. Provide concise, well-structured "
+                    "answers with short headings and up to five bullet points, then end with one actionable "
+                    "recommendation. Keep the overall response under roughly 130 words."
+                ),
+            },
+            {
+                "role": "user",
+                "content": (
+                    f"Prompt language preference: {response_language}. "
+                    "Deliver a tidy and concise cyber security insight for this request:\n"
+                    f"{alert_message}\n"
+                    "Ensure the answer remains complete while staying brief."
+                ),
+            },
+        ],
+        max_tokens=280,
+    )
+    if insight:
+        insight_cache.set(cache_key, insight)
+    return insight
+
+
+def _optional_score(value: float) -> float | None:
+    return None if np.isnan(value) else float(value)
 
 
 @dataclass(slots=True)
 class DetectionResult:
     risk_score: float
     risk_level: str
-    iso_score: float
-    svm_score: float
+    # None when the model was not consulted (cascade or a degraded tier).
+    iso_score: float | None
+    svm_score: float | None
     anomaly_votes: int
     insight: str | None
+    # True when an "LLM Insight" alert will be attached once the background completion arrives.
+    insight_pending: bool = False
+    # IDs of the heuristic rules that fired for this event.
+    rules: list[str] = field(default_factory=list)
+    # Deviation from the user's own baseline, travel since the previous location and
+    # per-user/per-IP window totals.
+    signals: Dict[str, float] = field(default_factory=dict)
+    # Scoring tier used under the current load; see ``ai_engine.load_shedding``.
+    tier: str = "full"
 
     def as_dict(self) -> Dict[str, Any]:
         return {
@@ -92,139 +237,482 @@ class DetectionResult:
             "svm_score": self.svm_score,
             "anomaly_votes": self.anomaly_votes,
             "insight": self.insight,
+            "insight_pending": self.insight_pending,
+            "rules": self.rules,
+            "signals": self.signals,
+            "tier": self.tier,
         }
 
+    @classmethod
+    def from_dict(cls, payload: Dict[str, Any]) -> "DetectionResult":
+        return cls(**{item.name: payload[item.name] for item in fields(cls)})
+
 
 class AIEngine:
     """Coordinates preprocessing, ML models, and alert persistence."""
 
-    def __init__(self) -> None:
-        self.preprocessor = DataPreprocessor()
-        self.isolation_forest = IsolationForestModel()
-        self.one_class_svm = OneClassSVMModel()
-        self.is_trained = False
+    def __init__(self, model_dir: str | None = None) -> None:
+        self.model_dir = model_dir or Config.AI_MODEL_DIR
+        self.app = None
+        self.training_jobs = TrainingJobManager()
+        # Scoring reads this reference once per call; training replaces it wholesale.
+        self._bundle: ModelBundle | None = None
+        self._training_lock = threading.Lock()
+        if Config.AI_SCORING_MODE not in SCORING_MODES:
+            raise ValueError(f"Unknown scoring mode '{Config.AI_SCORING_MODE}'")
+        self.scoring_mode = Config.AI_SCORING_MODE
+        self.cascade = CascadeCounters()
+        self.load = LoadGovernor(
+            (Config.AI_LOAD_NO_LLM_IN_FLIGHT, Config.AI_LOAD_NO_SVM_IN_FLIGHT, Config.AI_LOAD_HEURISTICS_ONLY_IN_FLIGHT),
+            insight_depth_limit=Config.AI_LOAD_NO_LLM_QUEUE_DEPTH,
+            probe_seconds=Config.AI_LOAD_PROBE_SECONDS,
+        )
+        self.rules = RuleStore(Config.AI_RULES_PATH, Config.AI_RULES_CHECK_SECONDS)
+        self.ip_reputation = IPReputationStore(
+            Config.AI_IP_BLOCKLIST_PATH, Config.AI_IP_ALLOWLIST_PATH, Config.AI_RULES_CHECK_SECONDS
+        )
+        self.user_agents = UserAgentStore(
+            Config.AI_USER_AGENTS_PATH, Config.AI_RULES_CHECK_SECONDS, Config.AI_USER_AGENT_CACHE_SIZE
+        )
+        self.profiles = ProfileStore(
+            min_events=Config.AI_PROFILE_MIN_EVENTS,
+            membership_capacity=Config.AI_MEMBERSHIP_CAPACITY,
+            membership_error_rate=Config.AI_MEMBERSHIP_ERROR_RATE,
+            flush_interval=Config.AI_PROFILE_FLUSH_SECONDS,
+        )
+        self.rates = RateTracker(Config.AI_RATE_BUCKETS, Config.AI_RATE_MAX_KEYS)
+        self.locations = LocationStore(Config.AI_LOCATIONS_PATH, Config.AI_RULES_CHECK_SECONDS)
+        self.travel = TravelDetector(
+            self.locations.current,
+            max_kmh=Config.AI_TRAVEL_MAX_KMH,
+            min_km=Config.AI_TRAVEL_MIN_KM,
+            flush_interval=Config.AI_PROFILE_FLUSH_SECONDS,
+        )
+        if Config.AI_SCORING_SERVICE not in SCORING_SERVICES:
+            raise ValueError(f"Unknown scoring service '{Config.AI_SCORING_SERVICE}'")
+        self.scoring_service = Config.AI_SCORING_SERVICE
+        # Model passes run in spawned processes over the saved artifact when workers are configured.
+        self.pool = (
+            ScoringPool(self.model_dir, Config.AI_SCORING_WORKERS, Config.AI_SCORING_CHUNK_ROWS)
+            if Config.AI_SCORING_WORKERS
+            else None
+        )
+        self._flusher: threading.Thread | None = None
+        self._flusher_lock = threading.Lock()
+        self.batcher = MicroBatcher(self._analyse_items, Config.AI_BATCH_MAX_ITEMS, Config.AI_BATCH_MAX_WAIT_MS)
+        self.sidecar = ScoringClient(Config.AI_SCORING_SOCKET, DetectionResult.from_dict)
+        self.insights = InsightQueue(
+            # Resolved per call so the generator can be swapped out (tests, stub servers).
+            lambda message: generate_alert_insight(message),
+            maxsize=Config.AI_INSIGHT_QUEUE_SIZE,
+            workers=Config.AI_INSIGHT_WORKERS,
+        )
+
+    def init_app(self, app) -> None:
+        """Register the engine on ``app`` so background work can open an app context."""
+        self.app = app
+        app.extensions["ai_engine"] = self
+        # Write out profile and last-seen updates still waiting for their flush interval.
+        atexit.register(self.flush_state)
+
+    @property
+    def is_trained(self) -> bool:
+        return self._bundle is not None
+
+    @property
+    def model_version(self) -> str | None:
+        return self._bundle.version if self._bundle else None
+
+    @property
+    def calibration_stats(self) -> dict | None:
+        bundle = self._bundle
+        return bundle.calibration.stats() if bundle and bundle.calibration else None
+
+    @property
+    def preprocessor(self) -> DataPreprocessor | None:
+        return self._bundle.preprocessor if self._bundle else None
+
+    @property
+    def isolation_forest(self) -> IsolationForestModel | None:
+        return self._bundle.isolation_forest if self._bundle else None
+
+    @property
+    def one_class_svm(self) -> OneClassSVMModel | None:
+        return self._bundle.one_class_svm if self._bundle else None
+
+    def load_or_train(self, limit: int | None = None) -> None:
+        """Load the newest compatible model artifact, retraining only when none is usable."""
+        self.load_profiles()
+        self.load_last_seen()
+        if not self.load_artifact():
+            self.warm_start(limit=limit)
+
+    def load_artifact(self) -> bool:
+        max_age = Config.AI_MODEL_MAX_AGE_HOURS * 3600
+        try:
+            artifact = model_store.load_latest_artifact(self.model_dir, artifact_schema(), max_age)
+        except OSError as exc:  # pragma: no cover - unreadable artifact directory
+            logger.warning("Unable to read model artifacts from %s: %s", self.model_dir, exc)
+            return False
+        if artifact is None:
+            return False
+        training_rows = int(artifact.manifest.get("training_rows") or 0)
+        report = TrainingReport.from_dict(artifact.manifest.get("training_report"))
+        self._bundle = ModelBundle.from_components(artifact.components, training_rows, artifact.version, report)
+        logger.info("Loaded AI model artifact %s (%s baseline events)", artifact.version, training_rows)
+        return True
+
+    def load_profiles(self) -> int:
+        """Restore the per-user baselines, bootstrapping them from history when none are stored."""
+        try:
+            loaded = self.profiles.load()
+            if loaded:
+                logger.info("Loaded %s user behaviour profiles", loaded)
+                return loaded
+            events = self.profiles.build_from_history(Config.AI_TRAINING_CHUNK_SIZE)
+            logger.info("Built %s user behaviour profiles from %s historical events", len(self.profiles), events)
+            self.profiles.flush()
+        except Exception as exc:  # pragma: no cover - defensive logging
+            logger.warning("Unable to load user profiles: %s", exc)
+        return len(self.profiles)
 
-    def warm_start(self, limit: int = 500) -> None:
-        """Train the models from historical activity data when available."""
+    def load_last_seen(self) -> int:
+        """Restore each user's last known location for impossible-travel checks."""
         try:
-            logs = fetch_all(
-                """
-                SELECT user_id, event_type, source_ip, device, location, bytes_transferred,
-                       files_accessed, failed_attempts, session_duration, timestamp
-                FROM activity_logs
-                ORDER BY timestamp DESC
-                LIMIT %s
-                """,
-                (limit,),
-            )
+            loaded = self.travel.load()
+        except Exception as exc:  # pragma: no cover - defensive logging
+            logger.warning("Unable to load last-seen locations: %s", exc)
+            return 0
+        logger.info("Loaded last-seen locations for %s users", loaded)
+        return loaded
+
+    def warm_start(self, limit: int | None = None, progress: ProgressCallback | None = None) -> ModelBundle | None:
+        """Train the models on a bounded sample of historical activity when available.
+
+        ``limit`` is the sample size and defaults to ``AI_TRAINING_SAMPLE_SIZE``.
+        """
+        try:
+            logs = self._load_training_logs(limit)
         except Exception as exc:  # pragma: no cover - defensive logging
             logger.warning("Unable to load baseline activity logs: %s", exc)
-            return
+            return None
 
         if not logs:
             logger.info("No historical activity logs available to warm start models")
-            return
+            return None
 
-        features = self.preprocessor.fit(logs)
-        self.isolation_forest.fit(features)
-        self.one_class_svm.fit(features)
-        self.is_trained = True
-        logger.info("AI models trained with %s baseline events", len(logs))
+        return self._train_and_swap(logs, progress)
 
-    def ensure_trained(self) -> None:
-        if self.is_trained:
-            return
-        # Attempt a minimal warm start if not already done.
-        self.warm_start(limit=200)
-        if not self.is_trained:
-            raise RuntimeError("AIEngine models have not been trained; add activity logs first")
+    def start_training(self, limit: int | None = None) -> TrainingJob:
+        """Retrain in the background; scoring keeps using the current bundle until the swap."""
+        return self.training_jobs.submit(self._run_training_job, limit=limit)
 
-    def analyse_activity(self, activity: dict, persist: bool = True) -> DetectionResult:
-        self.ensure_trained()
-        features = self.preprocessor.transform(activity)
-        iso_score = self.isolation_forest.score(features)
-        svm_score = self.one_class_svm.score(features)
-        anomaly_votes = self.isolation_forest.predict(features) + self.one_class_svm.predict(features)
+    def _run_training_job(self, progress: ProgressCallback, limit: int | None) -> Dict[str, Any]:
+        with self._app_context():
+            progress("sampling_activity_logs", 0.05)
+            logs = self._load_training_logs(limit)
+            if not logs:
+                raise RuntimeError("No historical activity logs available for training")
+            bundle = self._train_and_swap(logs, progress)
+        return {
+            "training_rows": bundle.training_rows,
+            "model_version": bundle.version,
+            "training_report": bundle.report.as_dict() if bundle.report else None,
+        }
 
-        # Convert combined scores into a 0..1 risk score. Lower scores indicate anomalies.
-        combined = -(iso_score + svm_score) / 2.0
-        risk_score = max(0.0, min(1.0, 0.5 + combined))
-        heuristic_score = self._heuristic_score(activity)
-        if heuristic_score is not None:
-            risk_score = max(risk_score, heuristic_score)
+    def _app_context(self):
+        return self.app.app_context() if self.app is not None else nullcontext()
+
+    def _load_training_logs(self, limit: int | None) -> list[dict]:
+        return sample_activity_logs(
+            size=limit or Config.AI_TRAINING_SAMPLE_SIZE,
+            mode=Config.AI_TRAINING_SAMPLE_MODE,
+            chunk_size=Config.AI_TRAINING_CHUNK_SIZE,
+        )
 
-        risk_level = self._determine_risk_level(risk_score, anomaly_votes)
-        insight = None
+    def _train_and_swap(self, logs: list[dict], progress: ProgressCallback | None = None) -> ModelBundle:
+        with self._training_lock:
+            bundle = train_bundle(logs, progress)
+            if progress:
+                progress("saving_artifact", 0.9)
+            bundle = bundle.with_version(self._save_artifact(bundle))
+            self._bundle = bundle
+        report = bundle.report
+        logger.info(
+            "AI models trained with %s baseline events in %.2fs (preprocessing %.2fs, isolation forest %.2fs, "
+            "one-class SVM %.2fs, %s)",
+            len(logs),
+            report.total_seconds,
+            report.preprocessing_seconds,
+            report.isolation_forest_seconds,
+            report.one_class_svm_seconds,
+            "parallel" if report.parallel else "sequential",
+        )
+        return bundle
+
+    def _save_artifact(self, bundle: ModelBundle) -> str | None:
+        try:
+            return model_store.save_artifact(
+                self.model_dir,
+                bundle.components(),
+                artifact_schema(),
+                bundle.training_rows,
+                keep=Config.AI_MODEL_KEEP_VERSIONS,
+                extra={"training_report": bundle.report.as_dict()} if bundle.report else None,
+            )
+        except OSError as exc:  # pragma: no cover - read-only deployments keep serving from memory
+            logger.warning("Unable to persist model artifact to %s: %s", self.model_dir, exc)
+            return None
 
-        if risk_level in {"high", "critical"}:
+    def ensure_trained(self) -> ModelBundle:
+        bundle = self._bundle
+        if bundle is not None:
+            return bundle
+        # Prefer a persisted artifact, then attempt a minimal warm start.
+        if not self.load_artifact():
+            self.warm_start(limit=200)
+        bundle = self._bundle
+        if bundle is None:
+            raise RuntimeError("AIEngine models have not been trained; add activity logs first")
+        return bundle
+
+    def analyse_activity(self, activity: dict, persist: bool = True, budget_ms: float | None = None) -> DetectionResult:
+        return self.analyse_batch([activity], persist=persist, budget_ms=budget_ms)[0]
+
+    def analyse_coalesced(self, activity: dict, budget_ms: float | None = None) -> DetectionResult:
+        """Score one activity through ``AI_SCORING_SERVICE``.
+
+        ``direct`` scores it on the calling thread, ``batched`` joins concurrent callers in
+        one ``analyse_batch`` call and ``sidecar`` sends it to the local scoring process,
+        falling back to direct scoring only when the event could not be sent. Errors after
+        sending are raised, since the sidecar may already have scored and persisted it.
+        """
+        if self.scoring_service == "batched":
+            return self.batcher.submit((activity, budget_ms))
+        if self.scoring_service == "sidecar":
             try:
-                insight = generate_alert_insight(activity.get("description", "Potential insider threat"))
-            except Exception as exc:  # pragma: no cover - network errors are non-fatal
-                logger.warning("Insight generation failed: %s", exc)
+                return self.sidecar.score(activity, budget_ms)
+            except OSError as exc:
+                logger.warning("Scoring sidecar at %s unavailable, scoring in-process: %s", self.sidecar.path, exc)
+        return self.analyse_activity(activity, budget_ms=budget_ms)
+
+    def _analyse_items(self, items: list[tuple[dict, float | None]]) -> list[DetectionResult | Exception]:
+        """``MicroBatcher`` callback: one batch under the tightest budget of its callers.
+
+        Alerts that fail to persist come back in their event's slot, so the batch raises
+        only before anything was written and the batcher can rescore it event by event.
+        """
+        budgets = [budget for _, budget in items if budget is not None]
+        with self._app_context():
+            return self.analyse_batch(
+                [activity for activity, _ in items], budget_ms=min(budgets) if budgets else None, item_errors=True
+            )
 
-        if persist and risk_level in {"medium", "high", "critical"}:
-            self._persist_alert(activity, risk_score, risk_level, insight)
+    def analyse_batch(
+        self, activities: list[dict], persist: bool = True, budget_ms: float | None = None, item_errors: bool = False
+    ) -> list[DetectionResult]:
+        """Score many activities with one preprocessing pass and one call per model.
+
+        Under load, or when the scoring stages would not fit ``budget_ms`` (default
+        ``AI_LATENCY_BUDGET_MS``), a cheaper tier is used; see ``ai_engine.load_shedding``.
+        With ``item_errors`` an alert that fails to persist puts its exception in that
+        event's slot instead of raising, and the event is not learned from.
+        """
+        if not activities:
+            return []
+        bundle = self.ensure_trained()
+        with self.load.admit() as in_flight:
+            tier = self.load.choose(
+                len(activities),
+                in_flight,
+                Config.AI_LATENCY_BUDGET_MS if budget_ms is None else budget_ms,
+                self.insights.depth,
+            )
+            return self._analyse(bundle, activities, persist, tier, item_errors)
+
+    def _analyse(
+        self, bundle: ModelBundle, activities: list[dict], persist: bool, tier: int, item_errors: bool = False
+    ) -> list[DetectionResult]:
+        rows = len(activities)
+        started = time.perf_counter()
+        columns = self._event_columns(activities)
+        matches = self.rules.current().evaluate(columns)
+        self.load.observe("rules", time.perf_counter() - started, rows)
+        if tier == HEURISTICS_ONLY:
+            iso_scores = svm_scores = np.full(rows, np.nan)
+            anomaly_votes = np.zeros(rows, dtype=int)
+            risk_scores = matches.scores
+        else:
+            if self.pool is not None:
+                scorer = self.pool.scorer(bundle, activities, self.load.observe)
+            else:
+                scorer = LocalScorer(bundle, activities, self.load.observe)
+            iso_scores, svm_scores, anomaly_votes, risk_scores = self._model_scores(
+                bundle, scorer, matches.scores, use_svm=tier < NO_SVM
+            )
+            # Deterministic rules raise the ML score but never lower it.
+            risk_scores = np.maximum(risk_scores, matches.scores)
+
+        # An insight is promised only when the LLM is configured and its circuit is not open.
+        insights = tier == FULL and persist and _insights_available()
+        results: list[DetectionResult] = []
+        recorded: list[dict] = []
+        for index, activity in enumerate(activities):
+            risk_score = float(risk_scores[index])
+            votes = int(anomaly_votes[index])
+            risk_level = self._determine_risk_level(risk_score)
+            insight_pending = False
+
+            if persist and risk_level in {"medium", "high", "critical"}:
+                try:
+                    alert_id = self._persist_alert(activity, risk_score, risk_level)
+                except Exception as exc:
+                    if not item_errors:
+                        raise
+                    logger.warning("Unable to persist alert for user %s: %s", activity.get("user_id"), exc)
+                    results.append(exc)
+                    continue
+                if risk_level in {"high", "critical"} and insights:
+                    insight_pending = self._request_insight(activity, alert_id, risk_score, risk_level)
+
+            results.append(
+                DetectionResult(
+                    risk_score,
+                    risk_level,
+                    _optional_score(iso_scores[index]),
+                    _optional_score(svm_scores[index]),
+                    votes,
+                    None,
+                    insight_pending,
+                    matches.fired_ids(index),
+                    {name: float(columns[name][index]) for name in SIGNAL_COLUMNS + TRAVEL_COLUMNS + RATE_COLUMNS},
+                    TIERS[tier],
+                )
+            )
+            recorded.append(activity)
+        if persist:
+            # Baselines learn only from events that were actually recorded.
+            self.profiles.observe_many(recorded)
+            self.rates.record_many(recorded)
+            self.travel.record_many(recorded)
+            self._ensure_flusher()
+        return results
+
+    def _event_columns(self, activities: list[dict]) -> EventColumns:
+        """Event fields plus the lookup-derived columns rules can reference."""
+        columns = EventColumns.from_events(activities)
+        derived = {
+            **self.ip_reputation.current().flag_columns(activity.get("source_ip") for activity in activities),
+            **self.user_agents.current().columns(activity.get("user_agent") for activity in activities),
+            **self.profiles.signals(activities),
+            **self.travel.columns(activities),
+            **self.rates.columns(activities),
+        }
+        for name, values in derived.items():
+            columns.add(name, values)
+        return columns
 
-        return DetectionResult(risk_score, risk_level, iso_score, svm_score, anomaly_votes, insight)
+    def _ensure_flusher(self) -> None:
+        """Start the thread that persists profiles and last-seen locations off the request path."""
+        if self._flusher is not None:
+            return
+        with self._flusher_lock:
+            if self._flusher is None:
+                self._flusher = threading.Thread(target=self._flush_periodically, name="ai-state-flusher", daemon=True)
+                self._flusher.start()
+
+    def _flush_periodically(self) -> None:
+        interval = max(1.0, min(self.profiles.flush_interval, self.travel.flush_interval))
+        while True:
+            time.sleep(interval)
+            with self._app_context():
+                self._flush_state()
+
+    def flush_state(self) -> None:
+        """Persist every pending profile and last-seen update now, e.g. at shutdown."""
+        with self._app_context():
+            self._flush_state(force=True)
+
+    def _flush_state(self, force: bool = False) -> None:
+        """Persist changed profiles and last-seen locations once their flush interval is due."""
+        for label, store in (("user profiles", self.profiles), ("last-seen locations", self.travel)):
+            try:
+                store.flush() if force else store.maybe_flush()
+            except Exception as exc:  # pragma: no cover - the changed entries are retried next time
+                logger.warning("Unable to persist %s: %s", label, exc)
 
-    def _persist_alert(self, activity: dict, risk_score: float, risk_level: str, insight: str | None) -> None:
+    def _persist_alert(self, activity: dict, risk_score: float, risk_level: str) -> int:
         metadata = json.dumps(activity, default=str)
         description = activity.get("description") or activity.get("event_type") or "Suspicious activity detected"
+        return alert_service.create_alert(activity.get("user_id"), "Insider Threat", description, risk_score, risk_level, metadata)
+
+    def _request_insight(self, activity: dict, alert_id: int, risk_score: float, risk_level: str) -> bool:
+        """Queue insight generation; the "LLM Insight" alert is written when it completes."""
+        metadata = json.dumps({**activity, "related_alert_id": alert_id}, default=str)
         user_id = activity.get("user_id")
-        alert_service.create_alert(user_id, "Insider Threat", description, risk_score, risk_level, metadata)
-        if insight:
-            alert_service.create_alert(user_id, "LLM Insight", insight, min(risk_score + 0.1, 1.0), risk_level, metadata)
-
-    def _coerce_datetime(self, value: Any) -> datetime | None:
-        if isinstance(value, datetime):
-            return value
-        if not value:
-            return None
-        try:
-            return datetime.fromisoformat(str(value))
-        except ValueError:
-            try:
-                return datetime.strptime(str(value), "%Y-%m-%d %H:%M:%S")
-            except ValueError:
-                return None
 
-    def _heuristic_score(self, activity: dict) -> float | None:
-        """Blend deterministic signals with ML output for predictable scoring."""
-        score = 0.0
-        event_type = (activity.get("event_type") or "").lower()
-        description = (activity.get("description") or "").lower()
-        bytes_transferred = float(activity.get("bytes_transferred") or 0)
-        files_accessed = int(activity.get("files_accessed") or 0)
-        failed_attempts = int(activity.get("failed_attempts") or 0)
-        timestamp = self._coerce_datetime(activity.get("timestamp"))
-        hour = timestamp.hour if timestamp else None
-
-        if hour is not None and (hour < 4 or hour > 22):
-            score = max(score, 0.72)
-
-        if "mass" in event_type or "copy" in event_type or files_accessed >= 100:
-            score = max(score, 0.78)
-        if bytes_transferred >= 1.5 * 1024 * 1024 * 1024 or "download" in event_type:
-            score = max(score, 0.8)
-
-        user_agent = (activity.get("user_agent") or "").lower()
-        source_ip = (activity.get("source_ip") or "0.0.0.0")
-        if "python" in user_agent or "urllib" in user_agent or source_ip.startswith("198.51.") or source_ip.startswith("203.0.113."):
-            score = max(score, 0.75)
-
-        if failed_attempts >= 3:
-            score = max(score, 0.65)
-
-        if "privilege" in description:
-            score = max(score, 0.76)
-
-        if score == 0.0:
-            return None
-        return min(1.0, score)
+        def attach(insight: str) -> None:
+            with self._app_context():
+                alert_service.create_alert(user_id, "LLM Insight", insight, min(risk_score + 0.1, 1.0), risk_level, metadata)
+
+        return self.insights.submit(activity.get("description", "Potential insider threat"), attach)
+
+    def _model_scores(
+        self, bundle: ModelBundle, scorer: LocalScorer | PoolScorer, rule_scores: np.ndarray, use_svm: bool = True
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Isolation Forest and SVM scores, anomaly votes and model risk per event.
+
+        Votes come from the decision values, so each model makes one pass. In cascade mode
+        the SVM only scores events inside the uncertainty band, and without ``use_svm`` it
+        scores none; the others get a NaN SVM score and their risk from the Isolation
+        Forest percentile alone.
+        """
+        if not use_svm:
+            plan = SvmPlan("none")
+        elif self.scoring_mode == "cascade" and bundle.isolation_calibration is not None:
+            plan = SvmPlan.band(
+                bundle.isolation_calibration,
+                Config.AI_CASCADE_LOWER_PERCENTILE,
+                Config.AI_CASCADE_UPPER_PERCENTILE,
+                RISK_CRITICAL_THRESHOLD,
+            )
+        else:
+            # Full ensemble, or an artifact saved before cascades could be calibrated.
+            plan = SvmPlan("all")
+        scores = scorer.scores(plan, rule_scores)
+        iso_scores, svm_scores = scores.iso, scores.svm
+        self.cascade.record(scores.stages)
+        votes = bundle.isolation_forest.flags_from_scores(iso_scores)
+        if plan.mode == "all":
+            risk = np.empty(len(iso_scores))
+        else:
+            risk = self._risk_scores(bundle.isolation_calibration, -iso_scores)
+        rows = np.flatnonzero(scores.stages == ONE_CLASS_SVM)
+        if len(rows):
+            votes[rows] += bundle.one_class_svm.flags_from_scores(svm_scores[rows])
+            risk[rows] = self._risk_scores(bundle.calibration, combined_scores(iso_scores[rows], svm_scores[rows]))
+        if bundle.calibration is None:
+            # Uncalibrated legacy artifact: both models voting still means critical. Calibrated
+            # risk already ranks such events, and the levels must keep their configured tail sizes.
+            risk = np.where(votes >= 2, np.maximum(risk, RISK_CRITICAL_THRESHOLD), risk)
+        return iso_scores, svm_scores, votes, risk
+
+    @staticmethod
+    def _risk_scores(calibration: ScoreCalibration | None, scores: np.ndarray) -> np.ndarray:
+        """Place each score on its training distribution so the levels fire on fixed tail sizes."""
+        if calibration is None:
+            # Uncalibrated legacy artifact: shift the raw scores into 0..1.
+            return np.clip(0.5 + scores, 0.0, 1.0)
+        anchors = tail_anchors({
+            RISK_MEDIUM_THRESHOLD: Config.AI_RISK_MEDIUM_TOP_PERCENT,
+            RISK_HIGH_THRESHOLD: Config.AI_RISK_HIGH_TOP_PERCENT,
+            RISK_CRITICAL_THRESHOLD: Config.AI_RISK_CRITICAL_TOP_PERCENT,
+        })
+        return calibration.risk(scores, anchors)
 
     @staticmethod
-    def _determine_risk_level(risk_score: float, votes: int) -> str:
-        if risk_score >= RISK_CRITICAL_THRESHOLD or votes >= 2:
+    def _determine_risk_level(risk_score: float) -> str:
+        if risk_score >= RISK_CRITICAL_THRESHOLD:
             return "critical"
         if risk_score >= RISK_HIGH_THRESHOLD:
             return "high"
@@ -0,0 +1,138 @@
+"""Isolation Forest inference from flattened tree arrays.
+
+``IsolationForest.decision_function`` validates its input and then calls ``tree.apply`` once
+per tree, which costs about a millisecond of Python dispatch for a single event with 100
+trees. ``FlatForest.from_sklearn`` copies a fitted forest into a few contiguous arrays in
+which every tree is padded to a complete binary tree of the forest's ``max_depth``:
+
+* ``feature`` / ``threshold``: the split at each heap position, ``n_trees`` blocks of
+  ``2 ** (max_depth + 1) - 1`` nodes, so the children of position ``i`` are ``2i + 1`` and
+  ``2i + 2`` and no child arrays are needed. Features are positions in ``columns``, the
+  input columns any tree splits on. Thresholds are float32, rounded down, so
+  ``x <= threshold`` on the float32 inputs sklearn also uses gives the same branch.
+* ``leaf_value``: ``n_trees`` blocks of ``2 ** max_depth`` bottom-level slots. A leaf above
+  the bottom is copied into every slot below it (its padding splits lead to the same
+  value either way) as its depth plus ``c(n) - 1`` for the ``n`` training samples in it,
+  the per-tree path length sklearn adds up.
+
+Scoring moves all (row, tree) pairs one level down per step with fancy indexing, sums
+the leaf values per row and applies sklearn's normalisation and ``offset_``. The arrays
+are plain numpy, so they memory-map straight out of a model artifact. Padding grows as
+``2 ** max_depth``, so forests deeper than ``MAX_NODES`` allows are not flattened.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import numpy as np
+import scipy.sparse as sp
+from sklearn.ensemble import IsolationForest
+from sklearn.ensemble._iforest import _average_path_length
+
+TREE_LEAF = -1
+# Padded split nodes across all trees; 100 trees of the default depth 8 need 51,100.
+MAX_NODES = 1 << 22
+
+
+@dataclass(frozen=True, slots=True)
+class FlatForest:
+    feature: np.ndarray  # int32, index into ``columns``
+    threshold: np.ndarray  # float32
+    leaf_value: np.ndarray  # float64
+    columns: np.ndarray  # int64, input columns the trees split on
+    n_trees: int
+    max_depth: int
+    n_features: int
+    # Sum of per-tree path lengths is divided by this: n_trees * c(max_samples).
+    denominator: float
+    offset: float
+
+    @classmethod
+    def from_sklearn(cls, forest: IsolationForest) -> "FlatForest":
+        n_trees = len(forest.estimators_)
+        max_depth = max(int(estimator.tree_.max_depth) for estimator in forest.estimators_)
+        tree_size = 2 ** (max_depth + 1) - 1
+        if n_trees * tree_size > MAX_NODES:
+            raise ValueError(f"{n_trees} trees of depth {max_depth} exceed {MAX_NODES} flattened nodes")
+        # Padding positions keep feature 0 and threshold 0; both of their subtrees are equal.
+        feature = np.zeros((n_trees, tree_size), dtype=np.int64)
+        threshold = np.zeros((n_trees, tree_size), dtype=np.float64)
+        leaf_value = np.zeros((n_trees, 2**max_depth), dtype=np.float64)
+        subsample_features = forest._max_features != forest.n_features_in_
+        for tree_index, (estimator, tree_features) in enumerate(zip(forest.estimators_, forest.estimators_features_)):
+            tree = estimator.tree_
+            tree_feature = np.asarray(tree_features)[tree.feature] if subsample_features else tree.feature
+            # Walk the tree level by level; a leaf stands in for both of its children.
+            nodes = np.zeros(1, dtype=np.intp)
+            positions = np.zeros(1, dtype=np.intp)
+            for _ in range(max_depth):
+                internal = tree.children_left[nodes] != TREE_LEAF
+                feature[tree_index, positions[internal]] = tree_feature[nodes[internal]]
+                threshold[tree_index, positions[internal]] = tree.threshold[nodes[internal]]
+                nodes = np.stack(
+                    [
+                        np.where(internal, tree.children_left[nodes], nodes),
+                        np.where(internal, tree.children_right[nodes], nodes),
+                    ],
+                    axis=1,
+                ).ravel()
+                positions = np.stack([2 * positions + 1, 2 * positions + 2], axis=1).ravel()
+            leaf_value[tree_index, positions - (2**max_depth - 1)] = (
+                forest._decision_path_lengths[tree_index][nodes]
+                + forest._average_path_length_per_tree[tree_index][nodes]
+                - 1.0
+            )
+
+        columns = np.unique(feature)
+        return cls(
+            feature=np.searchsorted(columns, feature).astype(np.int32).ravel(),
+            threshold=_float32_floor(threshold.ravel()),
+            leaf_value=leaf_value.ravel(),
+            columns=columns.astype(np.int64),
+            n_trees=n_trees,
+            max_depth=max_depth,
+            n_features=int(forest.n_features_in_),
+            denominator=float(n_trees * _average_path_length([forest._max_samples])[0]),
+            offset=float(forest.offset_),
+        )
+
+    @property
+    def nbytes(self) -> int:
+        return sum(array.nbytes for array in (self.feature, self.threshold, self.leaf_value, self.columns))
+
+    def path_lengths(self, features) -> np.ndarray:
+        """Summed per-tree path length of each row (sklearn's ``depths``)."""
+        if features.shape[1] != self.n_features:
+            raise ValueError(f"X has {features.shape[1]} features, but the forest was fitted with {self.n_features}")
+        values = features[:, self.columns]
+        values = values.toarray() if sp.issparse(values) else np.asarray(values)
+        values = np.ascontiguousarray(values, dtype=np.float32)
+        n_rows, width = values.shape
+        flat_values = values.ravel()
+        row_offsets = (np.arange(n_rows, dtype=np.intp) * width)[:, None]
+        tree_offsets = np.arange(self.n_trees, dtype=np.intp) * (2 ** (self.max_depth + 1) - 1)
+        positions = np.zeros((n_rows, self.n_trees), dtype=np.intp)
+        for _ in range(self.max_depth):
+            nodes = positions + tree_offsets
+            go_right = flat_values[row_offsets + self.feature[nodes]] > self.threshold[nodes]
+            positions = 2 * positions + 1 + go_right
+        bottom = positions - (2**self.max_depth - 1) + np.arange(self.n_trees, dtype=np.intp) * 2**self.max_depth
+        return self.leaf_value[bottom].sum(axis=1)
+
+    def score_samples(self, features) -> np.ndarray:
+        depths = self.path_lengths(features)
+        if self.denominator == 0:
+            # A forest fitted on a single sample: sklearn skips the division and scores every row -2 ** -1.
+            return np.full(len(depths), -0.5)
+        return -(2.0 ** (-depths / self.denominator))
+
+    def decision_function(self, features) -> np.ndarray:
+        return self.score_samples(features) - self.offset
+
+
+def _float32_floor(values: np.ndarray) -> np.ndarray:
+    """Largest float32 not above each value, so float32 ``x <= result`` iff ``x <= value``."""
+    rounded = values.astype(np.float32)
+    too_high = rounded.astype(np.float64) > values
+    rounded[too_high] = np.nextafter(rounded[too_high], np.float32(-np.inf))
+    return rounded
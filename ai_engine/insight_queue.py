@@ -0,0 +1,146 @@
+"""Bounded background queue that generates LLM insights off the detection path."""
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+LATENCY_WINDOW = 256
+
+
+@dataclass(slots=True)
+class InsightTask:
+    message: str
+    on_complete: Callable[[str], None]
+    enqueued_at: float = field(default_factory=time.perf_counter)
+
+
+class InsightQueue:
+    """Feeds alert descriptions to ``generate`` on daemon worker threads.
+
+    ``submit`` never blocks: when ``maxsize`` tasks are already waiting the new one is
+    dropped and counted, so a slow or unreachable LLM can never back up detection.
+    ``on_complete`` only runs for non-empty insights.
+    """
+
+    def __init__(self, generate: Callable[[str], str | None], maxsize: int = 100, workers: int = 1) -> None:
+        self.generate = generate
+        self.maxsize = maxsize
+        self.workers = max(1, workers)
+        self._queue: "queue.Queue[InsightTask]" = queue.Queue(maxsize=maxsize)
+        self._lock = threading.Lock()
+        self._threads: list[threading.Thread] = []
+        self._in_flight = 0
+        self._submitted = 0
+        self._completed = 0
+        self._empty = 0
+        self._failed = 0
+        self._dropped = 0
+        self._wait_ms: deque[float] = deque(maxlen=LATENCY_WINDOW)
+        self._latency_ms: deque[float] = deque(maxlen=LATENCY_WINDOW)
+
+    def submit(self, message: str, on_complete: Callable[[str], None]) -> bool:
+        """Queue ``message``; return ``False`` when the queue is full and the task was dropped."""
+        self._ensure_workers()
+        try:
+            self._queue.put_nowait(InsightTask(message, on_complete))
+        except queue.Full:
+            with self._lock:
+                self._dropped += 1
+            logger.warning("Insight queue full (%s pending); dropping insight request", self.maxsize)
+            return False
+        with self._lock:
+            self._submitted += 1
+        return True
+
+    @property
+    def depth(self) -> int:
+        """Tasks waiting for a worker."""
+        return self._queue.qsize()
+
+    def join(self, timeout: float | None = None) -> bool:
+        """Wait until every queued task has finished; return ``False`` on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            wait = np.array(self._wait_ms)
+            latency = np.array(self._latency_ms)
+            return {
+                "depth": self._queue.qsize(),
+                "maxsize": self.maxsize,
+                "workers": self.workers,
+                "in_flight": self._in_flight,
+                "submitted": self._submitted,
+                "completed": self._completed,
+                "empty": self._empty,
+                "failed": self._failed,
+                "dropped": self._dropped,
+                "queue_wait_ms": summarise_samples(wait),
+                "latency_ms": summarise_samples(latency),
+            }
+
+    def _ensure_workers(self) -> None:
+        if self._threads:
+            return
+        with self._lock:
+            if self._threads:
+                return
+            for index in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f"ai-insight-{index}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def _work(self) -> None:
+        while True:
+            task = self._queue.get()
+            started = time.perf_counter()
+            with self._lock:
+                self._in_flight += 1
+                self._wait_ms.append((started - task.enqueued_at) * 1000)
+            outcome = "failed"
+            try:
+                insight = self.generate(task.message)
+                if insight:
+                    task.on_complete(insight)
+                    outcome = "completed"
+                else:
+                    outcome = "empty"
+            except Exception:  # pragma: no cover - a failing task must not kill the worker
+                logger.exception("Background insight generation failed")
+            finally:
+                with self._lock:
+                    self._in_flight -= 1
+                    self._latency_ms.append((time.perf_counter() - task.enqueued_at) * 1000)
+                    if outcome == "completed":
+                        self._completed += 1
+                    elif outcome == "empty":
+                        self._empty += 1
+                    else:
+                        self._failed += 1
+                self._queue.task_done()
+
+
+def summarise_samples(samples: np.ndarray) -> Dict[str, float | None]:
+    if not samples.size:
+        return {"avg": None, "p50": None, "p95": None, "max": None}
+    p50, p95 = np.percentile(samples, [50, 95])
+    return {
+        "avg": round(float(samples.mean()), 3),
+        "p50": round(float(p50), 3),
+        "p95": round(float(p95), 3),
+        "max": round(float(samples.max()), 3),
+    }
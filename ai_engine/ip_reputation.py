@@ -0,0 +1,194 @@
+"""CIDR block/allow lists compiled into sorted, merged address intervals.
+
+IPv4 ranges are kept as two ``uint64`` arrays so a whole batch is resolved with one
+``np.searchsorted``; IPv6 ranges are Python integers searched with ``bisect``. Both
+lookups are O(log n) in the number of merged ranges. List files hold one address or
+CIDR per line; ``#`` starts a comment.
+"""
+from __future__ import annotations
+
+import bisect
+import hashlib
+import ipaddress
+import os
+import socket
+from dataclasses import dataclass
+from typing import Iterable
+
+import numpy as np
+
+from ai_engine.reloadable import ReloadableResource
+
+UNKNOWN = 0
+BLOCKED = 1
+ALLOWED = 2
+
+
+@dataclass(frozen=True, slots=True)
+class IntervalSet:
+    """Disjoint, sorted ``[start, end]`` ranges for one address family."""
+
+    v4_starts: np.ndarray
+    v4_ends: np.ndarray
+    v6_starts: list[int]
+    v6_ends: list[int]
+
+    @classmethod
+    def from_networks(cls, networks: Iterable[ipaddress.IPv4Network | ipaddress.IPv6Network]) -> "IntervalSet":
+        v4: list[tuple[int, int]] = []
+        v6: list[tuple[int, int]] = []
+        for network in networks:
+            target = v4 if network.version == 4 else v6
+            target.append((int(network.network_address), int(network.broadcast_address)))
+        v4_merged, v6_merged = _merge(v4), _merge(v6)
+        return cls(
+            v4_starts=np.array([start for start, _ in v4_merged], dtype=np.uint64),
+            v4_ends=np.array([end for _, end in v4_merged], dtype=np.uint64),
+            v6_starts=[start for start, _ in v6_merged],
+            v6_ends=[end for _, end in v6_merged],
+        )
+
+    def __len__(self) -> int:
+        return len(self.v4_starts) + len(self.v6_starts)
+
+    def contains_v4(self, addresses: np.ndarray) -> np.ndarray:
+        if not len(self.v4_starts) or not len(addresses):
+            return np.zeros(len(addresses), dtype=bool)
+        positions = np.searchsorted(self.v4_starts, addresses, side="right") - 1
+        valid = positions >= 0
+        clipped = np.maximum(positions, 0)
+        return valid & (addresses <= self.v4_ends[clipped])
+
+    def contains_v6(self, address: int) -> bool:
+        position = bisect.bisect_right(self.v6_starts, address) - 1
+        return position >= 0 and address <= self.v6_ends[position]
+
+
+class IPReputation:
+    """Immutable block/allow lists; an allow-listed address is never reported as blocked."""
+
+    def __init__(self, blocked: IntervalSet, allowed: IntervalSet, version: str = "") -> None:
+        self.blocked = blocked
+        self.allowed = allowed
+        self.version = version
+
+    @classmethod
+    def from_lines(cls, blocklist: Iterable[str], allowlist: Iterable[str] = (), version: str = "") -> "IPReputation":
+        return cls(
+            IntervalSet.from_networks(parse_networks(blocklist)),
+            IntervalSet.from_networks(parse_networks(allowlist)),
+            version,
+        )
+
+    @classmethod
+    def from_files(cls, blocklist_path: str, allowlist_path: str | None = None) -> "IPReputation":
+        blocklist = _read_text(blocklist_path)
+        allowlist = _read_text(allowlist_path) if allowlist_path and os.path.exists(allowlist_path) else ""
+        version = hashlib.sha256(f"{blocklist}\x00{allowlist}".encode("utf-8")).hexdigest()[:12]
+        return cls.from_lines(blocklist.splitlines(), allowlist.splitlines(), version)
+
+    def classify(self, address: str | None) -> int:
+        return int(self.classify_many([address])[0])
+
+    def classify_many(self, addresses: Iterable[str | None]) -> np.ndarray:
+        """Return ``UNKNOWN``/``BLOCKED``/``ALLOWED`` per address; unparseable values are unknown."""
+        addresses = list(addresses)
+        result = np.full(len(addresses), UNKNOWN, dtype=np.int8)
+        v4_rows: list[int] = []
+        v4_values: list[int] = []
+        parsed: dict[str | None, tuple[int, int] | None] = {}
+        for row, address in enumerate(addresses):
+            if address not in parsed:
+                parsed[address] = _parse_address(address)
+            value = parsed[address]
+            if value is None:
+                continue
+            version, number = value
+            if version == 4:
+                v4_rows.append(row)
+                v4_values.append(number)
+            elif self.allowed.contains_v6(number):
+                result[row] = ALLOWED
+            elif self.blocked.contains_v6(number):
+                result[row] = BLOCKED
+        if v4_rows:
+            rows = np.array(v4_rows)
+            numbers = np.array(v4_values, dtype=np.uint64)
+            allowed = self.allowed.contains_v4(numbers)
+            blocked = self.blocked.contains_v4(numbers) & ~allowed
+            result[rows[allowed]] = ALLOWED
+            result[rows[blocked]] = BLOCKED
+        return result
+
+    def flag_columns(self, addresses: Iterable[str | None]) -> dict[str, np.ndarray]:
+        """Rule columns for a batch: ``ip_blocklisted`` and ``ip_allowlisted`` as 0/1."""
+        verdicts = self.classify_many(addresses)
+        return {
+            "ip_blocklisted": (verdicts == BLOCKED).astype(np.float64),
+            "ip_allowlisted": (verdicts == ALLOWED).astype(np.float64),
+        }
+
+    def stats(self) -> dict:
+        return {"version": self.version, "blocked_ranges": len(self.blocked), "allowed_ranges": len(self.allowed)}
+
+
+class IPReputationStore(ReloadableResource[IPReputation]):
+    """Serves the active ``IPReputation`` and rebuilds it when either list file changes."""
+
+    label = "IP reputation lists"
+
+    def __init__(self, blocklist_path: str, allowlist_path: str | None = None, check_interval: float = 5.0) -> None:
+        self.blocklist_path = blocklist_path
+        self.allowlist_path = allowlist_path
+        super().__init__(
+            (blocklist_path, allowlist_path),
+            lambda: IPReputation.from_files(blocklist_path, allowlist_path),
+            IPReputation.from_lines([], [], version="empty"),
+            check_interval,
+        )
+
+
+def parse_networks(lines: Iterable[str]) -> list[ipaddress.IPv4Network | ipaddress.IPv6Network]:
+    networks = []
+    for number, line in enumerate(lines, start=1):
+        entry = line.split("#", 1)[0].strip()
+        if not entry:
+            continue
+        try:
+            networks.append(ipaddress.ip_network(entry, strict=False))
+        except ValueError as exc:
+            raise ValueError(f"Line {number}: invalid address or CIDR '{entry}'") from exc
+    return networks
+
+
+def _read_text(path: str) -> str:
+    with open(path, encoding="utf-8") as handle:
+        return handle.read()
+
+
+def _merge(ranges: list[tuple[int, int]]) -> list[tuple[int, int]]:
+    merged: list[tuple[int, int]] = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + 1:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def _parse_address(address) -> tuple[int, int] | None:
+    if not address:
+        return None
+    text = str(address).strip()
+    try:
+        return 4, int.from_bytes(socket.inet_pton(socket.AF_INET, text), "big")
+    except OSError:
+        pass
+    try:
+        parsed = ipaddress.IPv6Address(text.split("%", 1)[0])
+    except ValueError:
+        return None
+    if parsed.ipv4_mapped is not None:
+        return 4, int(parsed.ipv4_mapped)
+    return 6, int(parsed)
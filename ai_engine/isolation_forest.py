@@ -1,27 +1,58 @@
 """Isolation Forest wrapper."""
 from __future__ import annotations
 
+import logging
+
+import numpy as np
 from sklearn.ensemble import IsolationForest
 
+from ai_engine.flat_forest import FlatForest
+
+logger = logging.getLogger(__name__)
+
+# Above about this many rows sklearn's per-tree ``apply`` on the sparse feature matrix
+# outruns the level-by-level gathers (see ``scripts/bench_flat_forest.py``).
+FLAT_MAX_ROWS = 256
+
 
 class IsolationForestModel:
-    def __init__(self, contamination: float = 0.05, random_state: int = 42) -> None:
-        self.model = IsolationForest(contamination=contamination, random_state=random_state)
+    def __init__(self, contamination: float = 0.05, random_state: int = 42, n_jobs: int | None = None) -> None:
+        self.model = IsolationForest(contamination=contamination, random_state=random_state, n_jobs=n_jobs)
+        self.flat: FlatForest | None = None
         self.is_trained = False
 
     def fit(self, features) -> None:
         self.model.fit(features)
+        try:
+            self.flat = FlatForest.from_sklearn(self.model)
+        except ValueError as exc:
+            logger.info("Isolation Forest not flattened (%s); scoring with sklearn", exc)
+            self.flat = None
         self.is_trained = True
 
     def score(self, features) -> float:
+        return float(self.decision_scores(features).mean())
+
+    def predict(self, features) -> int:
+        return int(self.anomaly_flags(features)[0])
+
+    def decision_scores(self, features) -> np.ndarray:
+        """Return one decision value per row; negative values are anomalous."""
         if not self.is_trained:
             raise RuntimeError("IsolationForestModel must be trained before scoring")
-        decision = self.model.decision_function(features)
-        return float(decision.mean())
+        # Artifacts saved before flattening have no ``flat`` attribute.
+        flat = getattr(self, "flat", None)
+        if flat is not None and features.shape[0] <= FLAT_MAX_ROWS:
+            return flat.decision_function(features)
+        return self.model.decision_function(features)
 
-    def predict(self, features) -> int:
+    def anomaly_flags(self, features) -> np.ndarray:
+        """Return a 0/1 anomaly flag per row."""
         if not self.is_trained:
             raise RuntimeError("IsolationForestModel must be trained before prediction")
-        # Returns 1 for normal, -1 for anomaly. Convert to 0/1 anomaly flag.
-        prediction = self.model.predict(features)
-        return int(prediction[0] == -1)
+        return self.flags_from_scores(self.decision_scores(features))
+
+    @staticmethod
+    def flags_from_scores(scores: np.ndarray) -> np.ndarray:
+        """0/1 anomaly flags from ``decision_scores`` output, as ``IsolationForest.predict`` derives them."""
+        return (np.asarray(scores) < 0).astype(int)
@@ -0,0 +1,202 @@
+"""Shared, bounded client for the OpenAI-compatible insight endpoint."""
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict
+
+from openai import OpenAI
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_API_BASE = "https://router.huggingface.co/v1"
+
+
+class CircuitBreaker:
+    """Opens after ``failure_threshold`` consecutive failures and fails fast until ``reset_seconds`` pass.
+
+    Once the cool-down is over a single probe call is let through ("half open"): success
+    closes the circuit again, failure re-opens it for another cool-down.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_seconds: float = 30.0) -> None:
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_seconds = reset_seconds
+        self.consecutive_failures = 0
+        self.times_opened = 0
+        self._opened_at: float | None = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state()
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self._state()
+            if state == "closed":
+                return True
+            if state == "half_open" and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def release_probe(self) -> None:
+        with self._lock:
+            self._probing = False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.consecutive_failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.consecutive_failures += 1
+            if self._probing or self.consecutive_failures >= self.failure_threshold:
+                if self._opened_at is None or self._probing:
+                    self.times_opened += 1
+                self._opened_at = time.monotonic()
+            self._probing = False
+
+    def _state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at >= self.reset_seconds:
+            return "half_open"
+        return "open"
+
+
+class LLMClient:
+    """One keep-alive OpenAI client shared by every caller.
+
+    Each completion waits at most ``acquire_timeout`` seconds for one of ``max_concurrency``
+    slots and at most ``timeout`` seconds for the response. Failures feed the circuit breaker,
+    and every refusal or error returns ``None`` so callers fall back to their default text.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        api_key: str,
+        timeout: float = 10.0,
+        max_retries: int = 1,
+        max_concurrency: int = 4,
+        acquire_timeout: float = 0.5,
+        breaker: CircuitBreaker | None = None,
+    ) -> None:
+        self.base_url = base_url
+        self._api_key = api_key
+        self.timeout = timeout
+        self.max_concurrency = max(1, max_concurrency)
+        self.acquire_timeout = acquire_timeout
+        self.breaker = breaker or CircuitBreaker()
+        self._client = OpenAI(base_url=base_url, api_key=api_key, timeout=timeout, max_retries=max_retries)
+        self._slots = threading.BoundedSemaphore(self.max_concurrency)
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._retired = False
+        self._closed = False
+        self._counters = {"requests": 0, "succeeded": 0, "failed": 0, "rejected_busy": 0, "rejected_open": 0}
+
+    def complete(self, model: str, messages: list[dict], max_tokens: int = 280) -> str | None:
+        if not self.breaker.allow():
+            self._count("rejected_open")
+            return None
+        if not self._slots.acquire(timeout=self.acquire_timeout):
+            # Not the endpoint's fault, so a half-open probe is handed back unjudged.
+            self.breaker.release_probe()
+            self._count("rejected_busy")
+            return None
+        with self._lock:
+            self._in_flight += 1
+            self._counters["requests"] += 1
+        try:
+            response = self._client.chat.completions.create(model=model, messages=messages, max_tokens=max_tokens)
+            content = response.choices[0].message.content
+        except Exception as exc:  # network errors, timeouts and HTTP errors all trip the breaker
+            self.breaker.record_failure()
+            self._count("failed")
+            logger.warning("Insight generation failed (%s consecutive): %s", self.breaker.consecutive_failures, exc)
+            return None
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+                idle_and_retired = self._retired and self._in_flight == 0
+            self._slots.release()
+            if idle_and_retired:
+                self.close()
+        self.breaker.record_success()
+        self._count("succeeded")
+        return content
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                **self._counters,
+                "in_flight": self._in_flight,
+                "max_concurrency": self.max_concurrency,
+                "circuit": self.breaker.state,
+                "consecutive_failures": self.breaker.consecutive_failures,
+                "times_opened": self.breaker.times_opened,
+            }
+
+    def retire(self) -> None:
+        """Close the connection once the calls already in flight have finished."""
+        with self._lock:
+            self._retired = True
+            idle = self._in_flight == 0
+        if idle:
+            self.close()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        self._client.close()
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._counters[name] += 1
+
+
+_shared_client: LLMClient | None = None
+_shared_lock = threading.Lock()
+
+
+def shared_client() -> LLMClient | None:
+    """Return the process-wide client, rebuilding it when the endpoint or key changes."""
+    global _shared_client
+    api_key = os.getenv("HF_API_KEY")
+    if not api_key:
+        return None
+    base_url = os.getenv("HF_API_BASE", DEFAULT_API_BASE)
+    with _shared_lock:
+        client = previous = _shared_client
+        if client is None or client.base_url != base_url or client._api_key != api_key:
+            client = _shared_client = LLMClient(
+                base_url,
+                api_key,
+                timeout=Config.AI_LLM_TIMEOUT_SECONDS,
+                max_retries=Config.AI_LLM_MAX_RETRIES,
+                max_concurrency=Config.AI_LLM_MAX_CONCURRENCY,
+                acquire_timeout=Config.AI_LLM_ACQUIRE_TIMEOUT_SECONDS,
+                breaker=CircuitBreaker(Config.AI_LLM_BREAKER_THRESHOLD, Config.AI_LLM_BREAKER_RESET_SECONDS),
+            )
+            if previous is not None:
+                # Calls still running on the old client finish before its connection closes.
+                previous.retire()
+        return client
+
+
+def client_stats() -> Dict[str, Any] | None:
+    client = _shared_client
+    return client.stats() if client is not None else None
@@ -0,0 +1,139 @@
+"""Load-adaptive scoring tiers.
+
+Every scoring call picks one tier, from richest to cheapest:
+
+* ``full``: rules, both models and LLM insights for high-risk alerts;
+* ``no_llm``: as ``full`` but no insight is queued;
+* ``no_svm``: rules and the Isolation Forest only;
+* ``heuristics_only``: rules only, no preprocessing or models.
+
+The tier is the cheapest of three demands: the number of scoring calls in flight (each
+step has its own limit), the depth of the insight queue, and the caller's latency budget.
+The budget is checked against per-event costs of each stage, smoothed over recent calls,
+so a 100-event batch with a 20ms budget drops the SVM once the models are measured to be
+too slow for it. A stage the budget keeps out is not measured, so once its last sample is
+``probe_seconds`` old one budgeted call runs it again as a probe, and a sample taken after
+such a gap replaces the stale cost instead of being smoothed into it. Degraded calls still
+score, persist and learn from every event.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+TIERS = ("full", "no_llm", "no_svm", "heuristics_only")
+FULL, NO_LLM, NO_SVM, HEURISTICS_ONLY = range(len(TIERS))
+STAGES = ("rules", "preprocessing", "isolation_forest", "one_class_svm")
+TIER_STAGES = {
+    FULL: STAGES,
+    NO_LLM: STAGES,
+    NO_SVM: STAGES[:3],
+    HEURISTICS_ONLY: STAGES[:1],
+}
+
+
+class LoadGovernor:
+    """Counts in-flight scoring calls, learns stage costs and picks a tier per call.
+
+    ``in_flight_limits`` are the in-flight counts (including the new call) at which
+    ``no_llm``, ``no_svm`` and ``heuristics_only`` start; 0 disables a step. A stage
+    skipped for budget reasons is probed again every ``probe_seconds``.
+    """
+
+    def __init__(
+        self,
+        in_flight_limits: tuple[int, int, int] = (8, 16, 32),
+        insight_depth_limit: int = 80,
+        smoothing: float = 0.2,
+        probe_seconds: float = 10.0,
+    ) -> None:
+        self.in_flight_limits = in_flight_limits
+        self.insight_depth_limit = insight_depth_limit
+        self.smoothing = smoothing
+        self.probe_seconds = probe_seconds
+        self._in_flight = 0
+        self._tiers = [0] * len(TIERS)
+        self._over_budget = 0
+        # stage -> smoothed seconds per event
+        self._costs: dict[str, float] = {}
+        # stage -> monotonic time of its last sample, and of the last probe handed out
+        self._sampled_at: dict[str, float] = {}
+        self._probed_at: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def admit(self) -> Iterator[int]:
+        """Count the wrapped call as in flight; yields the count including it."""
+        with self._lock:
+            self._in_flight += 1
+            in_flight = self._in_flight
+        try:
+            yield in_flight
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+
+    def choose(self, rows: int, in_flight: int, budget_ms: float | None = None, insight_depth: int = 0) -> int:
+        """Index into ``TIERS`` for a call scoring ``rows`` events."""
+        tier = FULL
+        for step, limit in enumerate(self.in_flight_limits, start=NO_LLM):
+            if limit and in_flight >= limit:
+                tier = step
+        if self.insight_depth_limit and insight_depth >= self.insight_depth_limit:
+            tier = max(tier, NO_LLM)
+        if budget_ms:
+            while tier < HEURISTICS_ONLY and self.estimate_ms(tier, rows) > budget_ms:
+                if self._claim_probe(tier):
+                    break
+                tier += 1
+        with self._lock:
+            self._tiers[tier] += 1
+            if budget_ms and self._estimate_ms(tier, rows) > budget_ms:
+                self._over_budget += 1
+        return tier
+
+    def observe(self, stage: str, seconds: float, rows: int) -> None:
+        if rows <= 0:
+            return
+        per_event = seconds / rows
+        now = time.monotonic()
+        with self._lock:
+            previous = self._costs.get(stage)
+            if previous is None or now - self._sampled_at[stage] >= self.probe_seconds:
+                self._costs[stage] = per_event
+            else:
+                self._costs[stage] = previous + self.smoothing * (per_event - previous)
+            self._sampled_at[stage] = now
+
+    def estimate_ms(self, tier: int, rows: int) -> float:
+        with self._lock:
+            return self._estimate_ms(tier, rows)
+
+    def _claim_probe(self, tier: int) -> bool:
+        """True when a stage that the next tier drops is due for a probe; claims it."""
+        now = time.monotonic()
+        with self._lock:
+            dropped = [stage for stage in TIER_STAGES[tier] if stage not in TIER_STAGES[tier + 1]]
+            due = [
+                stage for stage in dropped
+                if now - max(self._sampled_at.get(stage, now), self._probed_at.get(stage, 0.0)) >= self.probe_seconds
+            ]
+            for stage in due:
+                self._probed_at[stage] = now
+        return bool(due)
+
+    def _estimate_ms(self, tier: int, rows: int) -> float:
+        return sum(self._costs.get(stage, 0.0) for stage in TIER_STAGES[tier]) * rows * 1000
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "in_flight": self._in_flight,
+                "tiers": dict(zip(TIERS, self._tiers)),
+                "over_budget": self._over_budget,
+                "stage_us_per_event": {stage: round(cost * 1e6, 2) for stage, cost in self._costs.items()},
+                "in_flight_limits": dict(zip(TIERS[1:], self.in_flight_limits)),
+                "insight_depth_limit": self.insight_depth_limit,
+            }
@@ -0,0 +1,112 @@
+"""Compact per-user membership sets for "have we seen this device/IP before?".
+
+A ``BloomFilter`` sized for ``capacity`` items at false-positive rate ``p`` needs
+``-capacity * ln(p) / ln(2)**2`` bits and ``ln(2) * bits / capacity`` hash probes, e.g.
+2,454 bits (307 bytes) and 7 probes for 256 items at 1%. A false positive can only hide a
+new device, never report a known one as new. Past ``capacity`` items the rate climbs, so
+``saturated`` filters are counted in the stats.
+"""
+from __future__ import annotations
+
+import hashlib
+import math
+import struct
+
+_HEADER = struct.Struct("<IIB")
+
+
+def _hashes(value) -> tuple[int, int]:
+    digest = hashlib.blake2b(str(value).strip().lower().encode("utf-8"), digest_size=16).digest()
+    return int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter using double hashing over one 128-bit digest."""
+
+    __slots__ = ("bits", "hash_count", "count", "capacity", "_array")
+
+    def __init__(self, bits: int, hash_count: int, count: int = 0, capacity: int = 0, array: bytearray | None = None) -> None:
+        self.bits = bits
+        self.hash_count = hash_count
+        self.count = count
+        self.capacity = capacity
+        self._array = array if array is not None else bytearray((bits + 7) // 8)
+
+    @classmethod
+    def for_capacity(cls, capacity: int, error_rate: float = 0.01) -> "BloomFilter":
+        if capacity <= 0 or not 0.0 < error_rate < 1.0:
+            raise ValueError("Bloom filters need a positive capacity and an error rate between 0 and 1")
+        bits = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        hash_count = max(1, round(bits / capacity * math.log(2)))
+        return cls(bits, hash_count, capacity=capacity)
+
+    def __contains__(self, value) -> bool:
+        array = self._array
+        for position in self._positions(value):
+            if not array[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+    def add(self, value) -> bool:
+        """Insert ``value``; returns True when it was (probably) not present before."""
+        array = self._array
+        added = False
+        for position in self._positions(value):
+            mask = 1 << (position & 7)
+            if not array[position >> 3] & mask:
+                array[position >> 3] |= mask
+                added = True
+        if added:
+            self.count += 1
+        return added
+
+    def empty_like(self) -> "BloomFilter":
+        """An empty filter with the same geometry, so it can later be merged into this one."""
+        return BloomFilter(self.bits, self.hash_count, capacity=self.capacity)
+
+    def update(self, other: "BloomFilter") -> None:
+        """Add every item of ``other`` (a bitwise OR); both filters need the same geometry."""
+        if (other.bits, other.hash_count) != (self.bits, self.hash_count):
+            raise ValueError("Bloom filters of different sizes cannot be merged")
+        merged = int.from_bytes(self._array, "little") | int.from_bytes(other._array, "little")
+        self._array = bytearray(merged.to_bytes(len(self._array), "little"))
+        # Items in both filters are counted once: estimate the count from the bits set.
+        set_bits = merged.bit_count()
+        estimate = self.count + other.count
+        if set_bits < self.bits:
+            estimate = min(estimate, round(-self.bits / self.hash_count * math.log1p(-set_bits / self.bits)))
+        self.count = max(self.count, other.count, estimate)
+
+    @property
+    def nbytes(self) -> int:
+        return len(self._array)
+
+    @property
+    def snapshot_size(self) -> int:
+        return _HEADER.size + len(self._array)
+
+    @property
+    def saturated(self) -> bool:
+        return bool(self.capacity) and self.count > self.capacity
+
+    def expected_error_rate(self) -> float:
+        """False-positive rate for the current number of inserted items."""
+        return (1.0 - math.exp(-self.hash_count * self.count / self.bits)) ** self.hash_count
+
+    def to_bytes(self) -> bytes:
+        return _HEADER.pack(self.count, self.bits, self.hash_count) + bytes(self._array)
+
+    @classmethod
+    def from_bytes(cls, payload: bytes, offset: int = 0, capacity: int = 0) -> tuple["BloomFilter", int]:
+        """Decode a filter written by ``to_bytes``; returns it and the offset after it."""
+        count, bits, hash_count = _HEADER.unpack_from(payload, offset)
+        start = offset + _HEADER.size
+        end = start + (bits + 7) // 8
+        if end > len(payload):
+            raise ValueError("Truncated Bloom filter")
+        return cls(bits, hash_count, count, capacity, bytearray(payload[start:end])), end
+
+    def _positions(self, value) -> list[int]:
+        first, step = _hashes(value)
+        bits = self.bits
+        return [(first + probe * step) % bits for probe in range(self.hash_count)]
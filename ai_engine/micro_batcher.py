@@ -0,0 +1,136 @@
+"""Coalesce concurrent single-item calls into one vectorized batch call.
+
+Callers block in ``submit``. A single daemon worker takes the first waiting item, keeps
+collecting until ``max_items`` are waiting or ``max_wait_ms`` have passed since that
+item arrived, calls ``score_batch`` once with all of them and hands each caller its own
+result. With no concurrency the wait is the only overhead; with 64 callers one model call
+replaces 64 small ones.
+
+One bad item must not fail the callers it was batched with. ``score_batch`` may put an
+exception in an item's slot to fail that caller alone, and when it raises for a batch of
+several items, each item is scored again on its own. It must therefore raise only before
+it has done anything that cannot be repeated, such as persisting results.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, Generic, TypeVar
+
+import numpy as np
+
+from ai_engine.insight_queue import LATENCY_WINDOW, summarise_samples
+
+logger = logging.getLogger(__name__)
+
+Item = TypeVar("Item")
+Result = TypeVar("Result")
+
+
+class _Pending(Generic[Item, Result]):
+    __slots__ = ("item", "done", "result", "error", "enqueued_at")
+
+    def __init__(self, item: Item) -> None:
+        self.item = item
+        self.done = threading.Event()
+        self.result: Result | None = None
+        self.error: BaseException | None = None
+        self.enqueued_at = time.perf_counter()
+
+
+class MicroBatcher(Generic[Item, Result]):
+    """Calls ``score_batch(items) -> results`` (same length and order) for coalesced items.
+
+    A result that is an exception is raised to that item's caller.
+    """
+
+    def __init__(self, score_batch: Callable[[list[Item]], list[Result]], max_items: int = 64, max_wait_ms: float = 2.0) -> None:
+        self.score_batch = score_batch
+        self.max_items = max(1, max_items)
+        self.max_wait_ms = max(0.0, max_wait_ms)
+        self._pending: deque[_Pending[Item, Result]] = deque()
+        self._ready = threading.Condition()
+        self._thread: threading.Thread | None = None
+        self._batches = 0
+        self._items = 0
+        self._largest = 0
+        self._wait_ms: deque[float] = deque(maxlen=LATENCY_WINDOW)
+
+    def submit(self, item: Item) -> Result:
+        """Block until ``item`` has been scored as part of a batch and return its result."""
+        pending = _Pending(item)
+        with self._ready:
+            self._ensure_worker()
+            self._pending.append(pending)
+            self._ready.notify()
+        pending.done.wait()
+        if pending.error is not None:
+            raise pending.error
+        if isinstance(pending.result, BaseException):
+            raise pending.result
+        return pending.result
+
+    def stats(self) -> Dict[str, Any]:
+        with self._ready:
+            return {
+                "max_items": self.max_items,
+                "max_wait_ms": self.max_wait_ms,
+                "waiting": len(self._pending),
+                "batches": self._batches,
+                "items": self._items,
+                "avg_batch": round(self._items / self._batches, 2) if self._batches else None,
+                "largest_batch": self._largest,
+                "queue_wait_ms": summarise_samples(np.array(self._wait_ms)),
+            }
+
+    def _ensure_worker(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._work, name="ai-micro-batcher", daemon=True)
+            self._thread.start()
+
+    def _next_batch(self) -> list[_Pending[Item, Result]]:
+        with self._ready:
+            while not self._pending:
+                self._ready.wait()
+            deadline = self._pending[0].enqueued_at + self.max_wait_ms / 1000
+            while len(self._pending) < self.max_items:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                self._ready.wait(remaining)
+            batch = [self._pending.popleft() for _ in range(min(self.max_items, len(self._pending)))]
+            started = time.perf_counter()
+            self._batches += 1
+            self._items += len(batch)
+            self._largest = max(self._largest, len(batch))
+            self._wait_ms.extend((started - pending.enqueued_at) * 1000 for pending in batch)
+        return batch
+
+    def _work(self) -> None:
+        while True:
+            batch = self._next_batch()
+            try:
+                self._score(batch)
+            except Exception as exc:
+                if len(batch) == 1:
+                    batch[0].error = exc
+                else:
+                    # Find the item that failed: every other caller still gets its result.
+                    logger.debug("Micro-batch of %s items failed (%s); scoring them one by one", len(batch), exc)
+                    for pending in batch:
+                        try:
+                            self._score([pending])
+                        except Exception as item_exc:  # fails its caller, never the worker
+                            pending.error = item_exc
+            finally:
+                for pending in batch:
+                    pending.done.set()
+
+    def _score(self, batch: list[_Pending[Item, Result]]) -> None:
+        results = self.score_batch([pending.item for pending in batch])
+        if len(results) != len(batch):
+            raise RuntimeError(f"Batch scorer returned {len(results)} results for {len(batch)} items")
+        for pending, result in zip(batch, results):
+            pending.result = result
@@ -0,0 +1,146 @@
+"""Versioned on-disk artifacts for fitted preprocessors and models."""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any
+
+import joblib
+import sklearn
+
+logger = logging.getLogger(__name__)
+
+ARTIFACT_FORMAT = 1
+MANIFEST_FILE = "manifest.json"
+BUNDLE_FILE = "bundle.joblib"
+
+
+@dataclass(slots=True)
+class LoadedArtifact:
+    version: str
+    manifest: dict
+    components: dict[str, Any]
+
+
+def feature_schema_hash(schema: dict) -> str:
+    """Hash the feature schema so artifacts built by other code revisions are rejected."""
+    payload = json.dumps({"artifact_format": ARTIFACT_FORMAT, "schema": schema}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def save_artifact(
+    directory: str,
+    components: dict[str, Any],
+    schema: dict,
+    training_rows: int,
+    keep: int = 3,
+    extra: dict | None = None,
+) -> str:
+    """Persist the fitted components as a new version and return its identifier.
+
+    The bundle is written uncompressed so numpy arrays can be memory-mapped on load,
+    and the version directory only appears once every file is complete. ``extra`` is
+    stored in the manifest alongside the standard fields.
+    """
+    os.makedirs(directory, exist_ok=True)
+    created_at = datetime.now(timezone.utc)
+    version = f"{created_at.strftime('%Y%m%dT%H%M%S%fZ')}-{training_rows}"
+    staging = tempfile.mkdtemp(prefix=".staging-", dir=directory)
+    try:
+        joblib.dump(components, os.path.join(staging, BUNDLE_FILE))
+        manifest = {
+            "version": version,
+            "artifact_format": ARTIFACT_FORMAT,
+            "created_at": created_at.isoformat(),
+            "training_rows": training_rows,
+            "feature_schema_hash": feature_schema_hash(schema),
+            "sklearn_version": sklearn.__version__,
+            **(extra or {}),
+        }
+        with open(os.path.join(staging, MANIFEST_FILE), "w", encoding="utf-8") as handle:
+            json.dump(manifest, handle, indent=2)
+        os.rename(staging, os.path.join(directory, version))
+    except Exception:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    _prune(directory, keep)
+    return version
+
+
+def load_latest_artifact(directory: str, schema: dict, max_age_seconds: float | None = None) -> LoadedArtifact | None:
+    """Load the newest artifact compatible with ``schema`` that is not older than ``max_age_seconds``."""
+    expected_hash = feature_schema_hash(schema)
+    for version in _list_versions(directory):
+        path = os.path.join(directory, version)
+        manifest = _read_manifest(path)
+        if manifest is None or not _is_compatible(manifest, expected_hash):
+            continue
+        if max_age_seconds and _age_seconds(manifest) > max_age_seconds:
+            # Versions are ordered newest first, so everything after this one is stale too.
+            logger.info("Newest compatible model artifact %s is stale", version)
+            return None
+        try:
+            components = joblib.load(os.path.join(path, BUNDLE_FILE), mmap_mode="r")
+        except Exception as exc:  # pragma: no cover - corrupt artifacts fall back to retraining
+            logger.warning("Unable to load model artifact %s: %s", version, exc)
+            continue
+        return LoadedArtifact(version, manifest, components)
+    return None
+
+
+def load_artifact(directory: str, version: str) -> LoadedArtifact:
+    """Memory-map one specific version; raises ``FileNotFoundError`` once it has been pruned."""
+    path = os.path.join(directory, version)
+    manifest = _read_manifest(path)
+    if manifest is None:
+        raise FileNotFoundError(f"Model artifact {version} not found in {directory}")
+    return LoadedArtifact(version, manifest, joblib.load(os.path.join(path, BUNDLE_FILE), mmap_mode="r"))
+
+
+def _list_versions(directory: str) -> list[str]:
+    if not os.path.isdir(directory):
+        return []
+    versions = [
+        entry
+        for entry in os.listdir(directory)
+        if not entry.startswith(".") and os.path.isfile(os.path.join(directory, entry, MANIFEST_FILE))
+    ]
+    return sorted(versions, reverse=True)
+
+
+def _read_manifest(path: str) -> dict | None:
+    try:
+        with open(os.path.join(path, MANIFEST_FILE), encoding="utf-8") as handle:
+            return json.load(handle)
+    except (OSError, ValueError):
+        return None
+
+
+def _is_compatible(manifest: dict, expected_hash: str) -> bool:
+    return (
+        manifest.get("artifact_format") == ARTIFACT_FORMAT
+        and manifest.get("feature_schema_hash") == expected_hash
+        and manifest.get("sklearn_version") == sklearn.__version__
+    )
+
+
+def _age_seconds(manifest: dict) -> float:
+    try:
+        created_at = datetime.fromisoformat(manifest["created_at"])
+    except (KeyError, TypeError, ValueError):
+        return float("inf")
+    return time.time() - created_at.timestamp()
+
+
+def _prune(directory: str, keep: int) -> None:
+    if keep <= 0:
+        return
+    for version in _list_versions(directory)[keep:]:
+        shutil.rmtree(os.path.join(directory, version), ignore_errors=True)
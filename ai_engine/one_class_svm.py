@@ -1,26 +1,103 @@
 """One-Class SVM wrapper."""
 from __future__ import annotations
 
+import numpy as np
+import scipy.sparse as sp
+from sklearn.kernel_approximation import Nystroem
+from sklearn.linear_model import SGDOneClassSVM
+from sklearn.pipeline import Pipeline
 from sklearn.svm import OneClassSVM
 
+SVM_BACKENDS = {"exact", "approx"}
+
 
 class OneClassSVMModel:
-    def __init__(self, kernel: str = "rbf", gamma: str | float = "scale", nu: float = 0.1) -> None:
-        self.model = OneClassSVM(kernel=kernel, gamma=gamma, nu=nu)
+    """RBF One-Class SVM with an exact (libsvm) or approximate (Nystroem + SGD) backend.
+
+    The exact solver is super-quadratic in the number of rows. The approximate backend maps
+    rows through ``n_components`` Nystroem features and fits a linear one-class SVM with SGD,
+    so training is linear in rows and scoring costs the same for every event.
+    """
+
+    def __init__(
+        self,
+        kernel: str = "rbf",
+        gamma: str | float = "scale",
+        nu: float = 0.1,
+        backend: str = "exact",
+        n_components: int = 300,
+        random_state: int = 42,
+    ) -> None:
+        if backend not in SVM_BACKENDS:
+            raise ValueError(f"Unknown One-Class SVM backend '{backend}'")
+        self.backend = backend
+        self.kernel = kernel
+        self.gamma = gamma
+        self.nu = nu
+        self.n_components = n_components
+        self.random_state = random_state
+        self.model = OneClassSVM(kernel=kernel, gamma=gamma, nu=nu) if backend == "exact" else None
         self.is_trained = False
 
     def fit(self, features) -> None:
+        if self.backend == "approx":
+            self.model = self._build_approximation(features)
         self.model.fit(features)
         self.is_trained = True
 
     def score(self, features) -> float:
+        return float(self.decision_scores(features).mean())
+
+    def predict(self, features) -> int:
+        return int(self.anomaly_flags(features)[0])
+
+    def decision_scores(self, features) -> np.ndarray:
+        """Return one decision value per row; negative values are anomalous."""
         if not self.is_trained:
             raise RuntimeError("OneClassSVMModel must be trained before scoring")
-        decision = self.model.decision_function(features)
-        return float(decision.mean())
+        return self.model.decision_function(features)
 
-    def predict(self, features) -> int:
+    def anomaly_flags(self, features) -> np.ndarray:
+        """Return a 0/1 anomaly flag per row."""
         if not self.is_trained:
             raise RuntimeError("OneClassSVMModel must be trained before prediction")
-        prediction = self.model.predict(features)
-        return int(prediction[0] == -1)
+        return self.flags_from_scores(self.decision_scores(features))
+
+    def flags_from_scores(self, scores: np.ndarray) -> np.ndarray:
+        """0/1 anomaly flags from ``decision_scores`` output, matching each backend's ``predict``.
+
+        libsvm only calls a row normal when its decision value is strictly positive, while
+        ``SGDOneClassSVM`` also accepts zero.
+        """
+        scores = np.asarray(scores)
+        anomalous = scores <= 0 if self.backend == "exact" else scores < 0
+        return anomalous.astype(int)
+
+    def _build_approximation(self, features) -> Pipeline:
+        n_rows = features.shape[0]
+        return Pipeline(
+            [
+                (
+                    "kernel",
+                    Nystroem(
+                        kernel=self.kernel,
+                        gamma=self._resolve_gamma(features),
+                        n_components=min(self.n_components, n_rows),
+                        random_state=self.random_state,
+                    ),
+                ),
+                ("svm", SGDOneClassSVM(nu=self.nu, random_state=self.random_state)),
+            ]
+        )
+
+    def _resolve_gamma(self, features) -> float:
+        """Resolve ``gamma="scale"`` the way ``OneClassSVM`` does so both backends share a kernel."""
+        if not isinstance(self.gamma, str):
+            return float(self.gamma)
+        if self.gamma == "auto":
+            return 1.0 / features.shape[1]
+        if sp.issparse(features):
+            variance = features.multiply(features).mean() - features.mean() ** 2
+        else:
+            variance = np.asarray(features).var()
+        return 1.0 / (features.shape[1] * variance) if variance != 0 else 1.0
@@ -0,0 +1,196 @@
+"""Sliding-window event, failure and byte counters per user and per source IP.
+
+Every key keeps one ring of ``buckets`` time buckets per window (1, 5 and 60 minutes) plus
+running totals, all in a single flat ``array('d')``. Recording an event adds to the current
+bucket and the totals; moving time forward subtracts and clears only the buckets that fell
+out, so updates and queries are O(1) amortised and a window is accurate to one bucket
+(5 s, 25 s and 5 min with the default 12 buckets). Keys idle for longer than the largest
+window are dropped, and at most ``max_keys`` per scope are kept (least recently updated
+first out), so memory stays bounded at about 1.3 KB per key.
+
+Counters are driven by arrival time rather than the event's own timestamp, so replayed
+or skewed timestamps cannot rewind or flush the windows.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from typing import Callable, Hashable, Iterable
+
+import numpy as np
+
+from ai_engine.data_preprocessor import to_number
+
+WINDOWS: dict[str, int] = {"1m": 60, "5m": 300, "60m": 3600}
+METRICS = ("events", "failed", "bytes")
+SCOPES = ("user", "ip")
+# Rule columns, e.g. ``ip_failed_5m`` = failed attempts from the event's source IP in the
+# last five minutes, this event and the rest of its batch included.
+RATE_COLUMNS = tuple(f"{scope}_{metric}_{window}" for scope in SCOPES for metric in METRICS for window in WINDOWS)
+
+
+class SlidingWindowCounter:
+    """Bucketed sliding-window sums of ``METRICS`` for many keys."""
+
+    def __init__(self, buckets: int = 12, max_keys: int = 100_000, clock: Callable[[], float] = time.time) -> None:
+        self.buckets = buckets
+        self.max_keys = max_keys
+        self.clock = clock
+        self.evicted = 0
+        self._widths = [seconds / buckets for seconds in WINDOWS.values()]
+        self._horizon = max(WINDOWS.values())
+        # Per window: ``buckets`` rows of len(METRICS) values, then one row of running totals.
+        self._stride = (buckets + 1) * len(METRICS)
+        self._states: "OrderedDict[Hashable, tuple[list[int], array]]" = OrderedDict()
+        self._last_seen: dict[Hashable, float] = {}
+
+    def __len__(self) -> int:
+        return len(self._states)
+
+    def add(self, key: Hashable, values: tuple[float, float, float], now: float | None = None) -> None:
+        now = self.clock() if now is None else now
+        state = self._states.get(key)
+        if state is None:
+            heads = [int(now // width) for width in self._widths]
+            state = self._states[key] = (heads, array("d", bytes(8 * self._stride * len(self._widths))))
+        else:
+            self._states.move_to_end(key)
+        self._last_seen[key] = now
+        heads, cells = state
+        metric_count = len(METRICS)
+        for window, width in enumerate(self._widths):
+            self._advance(heads, cells, window, int(now // width))
+            base = window * self._stride
+            bucket = base + (heads[window] % self.buckets) * metric_count
+            totals = base + self.buckets * metric_count
+            for offset, value in enumerate(values):
+                cells[bucket + offset] += value
+                cells[totals + offset] += value
+        self._expire(now)
+
+    def totals(self, key: Hashable, now: float | None = None) -> list[float]:
+        """Sums per window in ``WINDOWS`` order, each as ``METRICS`` values (flattened)."""
+        state = self._states.get(key)
+        result = [0.0] * (len(self._widths) * len(METRICS))
+        if state is None:
+            return result
+        now = self.clock() if now is None else now
+        heads, cells = state
+        metric_count = len(METRICS)
+        for window, width in enumerate(self._widths):
+            self._advance(heads, cells, window, int(now // width))
+            totals = window * self._stride + self.buckets * metric_count
+            result[window * metric_count:(window + 1) * metric_count] = cells[totals:totals + metric_count]
+        return result
+
+    def _advance(self, heads: list[int], cells: array, window: int, target: int) -> None:
+        steps = target - heads[window]
+        if steps <= 0:
+            # Clock went backwards: keep counting into the current bucket.
+            return
+        metric_count = len(METRICS)
+        base = window * self._stride
+        totals = base + self.buckets * metric_count
+        if steps >= self.buckets:
+            for position in range(base, totals + metric_count):
+                cells[position] = 0.0
+        else:
+            head = heads[window]
+            for step in range(1, steps + 1):
+                bucket = base + ((head + step) % self.buckets) * metric_count
+                for offset in range(metric_count):
+                    cells[totals + offset] -= cells[bucket + offset]
+                    cells[bucket + offset] = 0.0
+        heads[window] = target
+
+    def _expire(self, now: float) -> None:
+        states, last_seen = self._states, self._last_seen
+        while states:
+            oldest = next(iter(states))
+            if len(states) <= self.max_keys and now - last_seen[oldest] <= self._horizon:
+                return
+            del states[oldest]
+            del last_seen[oldest]
+            self.evicted += 1
+
+
+class RateTracker:
+    """Per-user and per-source-IP windows, exposed as rule columns."""
+
+    def __init__(self, buckets: int = 12, max_keys: int = 100_000, clock: Callable[[], float] = time.time) -> None:
+        self.clock = clock
+        self.counters = {scope: SlidingWindowCounter(buckets, max_keys, clock) for scope in SCOPES}
+        self._lock = threading.Lock()
+
+    def record_many(self, activities: Iterable[dict]) -> None:
+        now = self.clock()
+        with self._lock:
+            for activity in activities:
+                values = _event_values(activity)
+                for scope, key in _keys(activity):
+                    self.counters[scope].add(key, values, now)
+
+    def columns(self, activities: list[dict]) -> dict[str, np.ndarray]:
+        """Window totals per event, counting earlier events plus this event and its whole batch.
+
+        Nothing is recorded, so scoring without persisting leaves the windows untouched.
+        """
+        now = self.clock()
+        pending: dict[tuple[str, Hashable], list[float]] = {}
+        keyed = []
+        for activity in activities:
+            values = _event_values(activity)
+            keys = list(_keys(activity))
+            keyed.append(keys)
+            for scope_key in keys:
+                batch = pending.setdefault(scope_key, [0.0, 0.0, 0.0])
+                for offset, value in enumerate(values):
+                    batch[offset] += value
+
+        result = np.zeros((len(activities), len(RATE_COLUMNS)), dtype=np.float64)
+        cache: dict[tuple[str, Hashable], list[float]] = {}
+        per_scope = len(WINDOWS) * len(METRICS)
+        with self._lock:
+            for row, keys in enumerate(keyed):
+                for scope_key in keys:
+                    totals = cache.get(scope_key)
+                    if totals is None:
+                        scope, key = scope_key
+                        stored = self.counters[scope].totals(key, now)
+                        batch = pending[scope_key]
+                        # ``stored`` is window-major; add the batch sums to every window.
+                        totals = cache[scope_key] = _metric_major(
+                            [value + batch[index % len(METRICS)] for index, value in enumerate(stored)]
+                        )
+                    start = SCOPES.index(scope_key[0]) * per_scope
+                    result[row, start:start + per_scope] = totals
+        return {name: result[:, index] for index, name in enumerate(RATE_COLUMNS)}
+
+    def stats(self) -> dict:
+        return {
+            scope: {"keys": len(counter), "max_keys": counter.max_keys, "evicted": counter.evicted}
+            for scope, counter in self.counters.items()
+        }
+
+
+def _metric_major(totals: list[float]) -> list[float]:
+    """Reorder window-major totals to the ``RATE_COLUMNS`` order (metric, then window)."""
+    window_count, metric_count = len(WINDOWS), len(METRICS)
+    return [totals[window * metric_count + metric] for metric in range(metric_count) for window in range(window_count)]
+
+
+def _keys(activity: dict):
+    user_id = activity.get("user_id")
+    if user_id is not None:
+        yield "user", str(user_id)
+    source_ip = activity.get("source_ip")
+    if source_ip:
+        yield "ip", str(source_ip).strip()
+
+
+def _event_values(activity: dict) -> tuple[float, float, float]:
+    failed = to_number(activity.get("failed_attempts"), finite=True)
+    return 1.0, failed, to_number(activity.get("bytes_transferred"), finite=True)
+
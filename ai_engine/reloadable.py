@@ -0,0 +1,92 @@
+"""File-backed resources that are rebuilt when their files change and swapped in atomically."""
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Generic, Sequence, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class ReloadableResource(Generic[T]):
+    """Serves a value compiled from one or more files and recompiles it when they change.
+
+    ``current()`` stats the files at most every ``check_interval`` seconds. The replacement
+    is built completely before the reference is swapped, so readers see either the old or
+    the new value, never a mix; if building fails the previous value stays active.
+    """
+
+    label = "resource"
+    errors: tuple[type[BaseException], ...] = (OSError, ValueError)
+
+    def __init__(self, paths: tuple[str | None, ...], loader: Callable[[], T], empty: T, check_interval: float = 5.0) -> None:
+        self.paths = paths
+        self.check_interval = check_interval
+        self._loader = loader
+        self._lock = threading.Lock()
+        self._mtimes: tuple = ()
+        self._checked_at = 0.0
+        self._value = empty
+        try:
+            self.reload()
+        except self.errors as exc:
+            logger.warning("Unable to load %s from %s: %s", self.label, self._describe_paths(), exc)
+
+    def current(self) -> T:
+        now = time.monotonic()
+        if now - self._checked_at >= self.check_interval:
+            self._checked_at = now
+            if self._file_mtimes() != self._mtimes:
+                try:
+                    self.reload()
+                except self.errors as exc:
+                    logger.warning("Keeping previous %s; reloading %s failed: %s", self.label, self._describe_paths(), exc)
+        return self._value
+
+    def reload(self) -> T:
+        """Rebuild from the files and swap the result in; raises when they are unreadable or invalid."""
+        with self._lock:
+            return self.install(self.build())
+
+    def build(self) -> tuple[tuple, T]:
+        """Rebuild from the files without swapping it in; raises when they are unreadable or invalid."""
+        return self._file_mtimes(), self._loader()
+
+    def install(self, built: tuple[tuple, T]) -> T:
+        """Swap in a value returned by ``build``."""
+        mtimes, value = built
+        self._value = value
+        self._mtimes = mtimes
+        self._checked_at = time.monotonic()
+        logger.info("Loaded %s from %s", self.label, self._describe_paths())
+        return value
+
+    def _file_mtimes(self) -> tuple:
+        mtimes = []
+        for path in self.paths:
+            try:
+                mtimes.append(os.stat(path).st_mtime if path else None)
+            except OSError:
+                mtimes.append(None)
+        return tuple(mtimes)
+
+    def _describe_paths(self) -> str:
+        return ", ".join(path for path in self.paths if path)
+
+
+def reload_all(resources: Sequence[ReloadableResource[Any]]) -> list[Any]:
+    """Rebuild every resource, then swap them all in; if any fails to build, none is swapped.
+
+    Raises ``ValueError`` naming the resource that failed.
+    """
+    built = []
+    for resource in resources:
+        try:
+            built.append(resource.build())
+        except resource.errors as exc:
+            raise ValueError(f"{resource.label}: {exc}") from exc
+    return [resource.install(item) for resource, item in zip(resources, built)]
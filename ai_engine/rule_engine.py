@@ -0,0 +1,350 @@
+"""Declarative heuristic rules compiled into vectorized predicates over event columns.
+
+A rule file is JSON::
+
+    {"version": 1, "rules": [
+        {"id": "large_transfer", "score": 0.8, "description": "...",
+         "when": {"any": [{"field": "bytes_transferred", "op": "gte", "value": 1610612736},
+                          {"field": "event_type", "op": "contains", "value": "download"}]}}
+    ]}
+
+``when`` is either a comparison (``field``/``op``/``value``) or ``{"any": [...]}``,
+``{"all": [...]}`` or ``{"not": {...}}``. Text comparisons are case-insensitive. With
+``"score_from": "<numeric column>"`` a fired rule scores that column's value, capped by
+``score`` (default 1). A batch is
+converted to one array per column once, every distinct comparison is evaluated once per
+batch, and each rule is a boolean combination of those results.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Iterable
+
+import numpy as np
+
+from ai_engine.data_preprocessor import to_number
+from ai_engine.rate_windows import RATE_COLUMNS
+from ai_engine.reloadable import ReloadableResource
+
+NUMBER = "number"
+TEXT = "text"
+
+# Columns read from the events themselves. Missing numbers read as 0 and missing text as "";
+# ``hour``/``day_of_week`` are NaN when the event has no parseable timestamp.
+EVENT_COLUMNS: dict[str, str] = {
+    "hour": NUMBER,
+    "day_of_week": NUMBER,
+    "bytes_transferred": NUMBER,
+    "files_accessed": NUMBER,
+    "failed_attempts": NUMBER,
+    "session_duration": NUMBER,
+    "event_type": TEXT,
+    "description": TEXT,
+    "user_agent": TEXT,
+    "source_ip": TEXT,
+    "device": TEXT,
+    "location": TEXT,
+}
+# Columns the engine derives from lookups and attaches with ``EventColumns.add``; they read
+# as 0 when not supplied and can never be set by the event payload.
+DERIVED_COLUMNS: dict[str, str] = {
+    # IP reputation lists (1 when true).
+    "ip_blocklisted": NUMBER,
+    "ip_allowlisted": NUMBER,
+    # User-agent classifier: highest signature weight and comma-joined categories.
+    "ua_score": NUMBER,
+    "ua_category": TEXT,
+    # Per-user baselines: z-scores against the user's own history, share of the user's events
+    # outside this hour, 1 for a device/IP the user has never used before (Bloom filter
+    # lookups), how many events the baseline holds, and 1 once it holds AI_PROFILE_MIN_EVENTS.
+    "bytes_zscore": NUMBER,
+    "files_zscore": NUMBER,
+    "session_zscore": NUMBER,
+    "hour_rarity": NUMBER,
+    "new_device": NUMBER,
+    "new_ip": NUMBER,
+    "profile_events": NUMBER,
+    "profile_mature": NUMBER,
+    # Distance and speed from the user's previous resolved location; 1 when faster than allowed.
+    "travel_km": NUMBER,
+    "travel_kmh": NUMBER,
+    "impossible_travel": NUMBER,
+    # Sliding-window totals per user and per source IP, e.g. ``ip_failed_5m``.
+    **{name: NUMBER for name in RATE_COLUMNS},
+}
+COLUMN_TYPES: dict[str, str] = {**EVENT_COLUMNS, **DERIVED_COLUMNS}
+TEXT_DEFAULTS = {"source_ip": "0.0.0.0"}
+
+NUMBER_OPS: dict[str, Callable[[np.ndarray, Any], np.ndarray]] = {
+    "eq": np.equal,
+    "ne": np.not_equal,
+    "lt": np.less,
+    "lte": np.less_equal,
+    "gt": np.greater,
+    "gte": np.greater_equal,
+    "in": lambda column, values: np.isin(column, values),
+}
+TEXT_OPS: dict[str, Callable[[np.ndarray, Any], np.ndarray]] = {
+    "eq": lambda column, value: column == value,
+    "ne": lambda column, value: column != value,
+    "in": lambda column, values: np.isin(column, values),
+    "contains": lambda column, value: np.char.find(column, value) >= 0,
+    "startswith": lambda column, value: np.char.startswith(column, value),
+    "endswith": lambda column, value: np.char.endswith(column, value),
+    "regex": lambda column, pattern: np.fromiter(
+        (pattern.search(text) is not None for text in column), dtype=bool, count=len(column)
+    ),
+}
+
+
+class RuleError(ValueError):
+    """Raised when a rule file cannot be parsed or compiled."""
+
+
+class EventColumns:
+    """Column arrays for one batch of events, built once and shared by every rule."""
+
+    def __init__(self, size: int, columns: dict[str, np.ndarray] | None = None) -> None:
+        self.size = size
+        self.columns: dict[str, np.ndarray] = dict(columns or {})
+
+    @classmethod
+    def from_events(cls, events: list[dict]) -> "EventColumns":
+        columns: dict[str, np.ndarray] = {}
+        for field, kind in EVENT_COLUMNS.items():
+            if field in {"hour", "day_of_week"}:
+                continue
+            if kind == NUMBER:
+                columns[field] = np.fromiter((to_number(event.get(field)) for event in events), dtype=np.float64, count=len(events))
+            else:
+                default = TEXT_DEFAULTS.get(field, "")
+                columns[field] = np.array([str(event.get(field) or default).lower() for event in events], dtype=str)
+        hours = np.full(len(events), np.nan)
+        days = np.full(len(events), np.nan)
+        for index, event in enumerate(events):
+            timestamp = coerce_datetime(event.get("timestamp"))
+            if timestamp is not None:
+                hours[index] = timestamp.hour
+                days[index] = timestamp.weekday()
+        columns["hour"] = hours
+        columns["day_of_week"] = days
+        return cls(len(events), columns)
+
+    def add(self, name: str, values: Iterable) -> None:
+        """Attach a derived column (e.g. a lookup result) for rules to reference."""
+        array = np.asarray(values)
+        if array.shape != (self.size,):
+            raise ValueError(f"Column '{name}' has shape {array.shape}, expected ({self.size},)")
+        self.columns[name] = array
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        column = self.columns.get(name)
+        if column is None:
+            # Columns contributed by optional subsystems read as "absent" when not supplied.
+            kind = COLUMN_TYPES.get(name, NUMBER)
+            column = np.zeros(self.size) if kind == NUMBER else np.full(self.size, "", dtype=str)
+            self.columns[name] = column
+        return column
+
+
+@dataclass(frozen=True, slots=True)
+class Rule:
+    rule_id: str
+    score: float
+    description: str
+    condition: tuple
+    score_from: str | None = None
+
+
+@dataclass(slots=True)
+class RuleMatches:
+    """Per-event outcome: the highest fired score (0 when nothing fired) and a fired matrix."""
+
+    rule_ids: tuple[str, ...]
+    scores: np.ndarray
+    fired: np.ndarray
+
+    def fired_ids(self, index: int) -> list[str]:
+        return [self.rule_ids[position] for position in np.flatnonzero(self.fired[index])]
+
+
+class RuleSet:
+    """Compiled rules; immutable once built so it can be swapped in as a single reference."""
+
+    def __init__(self, rules: list[Rule], version: str = "") -> None:
+        self.rules = rules
+        self.version = version
+        self.rule_ids = tuple(rule.rule_id for rule in rules)
+        self._scores = np.array([rule.score for rule in rules], dtype=np.float64)
+        self._dynamic = [(position, rule.score_from) for position, rule in enumerate(rules) if rule.score_from]
+        self._predicates: dict[tuple, Callable[[EventColumns], np.ndarray]] = {}
+        for rule in rules:
+            self._collect_predicates(rule.condition)
+
+    def __len__(self) -> int:
+        return len(self.rules)
+
+    @classmethod
+    def from_dict(cls, payload: dict, version: str = "") -> "RuleSet":
+        if not isinstance(payload, dict) or not isinstance(payload.get("rules"), list):
+            raise RuleError("Rule file must be an object with a 'rules' list")
+        rules: list[Rule] = []
+        seen: set[str] = set()
+        for position, entry in enumerate(payload["rules"]):
+            rule = _compile_rule(entry, position)
+            if rule.rule_id in seen:
+                raise RuleError(f"Duplicate rule id '{rule.rule_id}'")
+            seen.add(rule.rule_id)
+            rules.append(rule)
+        return cls(rules, version)
+
+    @classmethod
+    def from_file(cls, path: str) -> "RuleSet":
+        with open(path, "rb") as handle:
+            raw = handle.read()
+        try:
+            payload = json.loads(raw)
+        except ValueError as exc:
+            raise RuleError(f"Invalid JSON in {path}: {exc}") from exc
+        return cls.from_dict(payload, version=hashlib.sha256(raw).hexdigest()[:12])
+
+    def evaluate(self, columns: EventColumns) -> RuleMatches:
+        fired = np.zeros((columns.size, len(self.rules)), dtype=bool)
+        if columns.size and self.rules:
+            cache: dict[tuple, np.ndarray] = {}
+            for position, rule in enumerate(self.rules):
+                fired[:, position] = self._evaluate(rule.condition, columns, cache)
+        rule_scores = np.where(fired, self._scores, 0.0)
+        for position, column in self._dynamic:
+            values = np.clip(np.nan_to_num(columns[column].astype(np.float64)), 0.0, self._scores[position])
+            rule_scores[:, position] = np.where(fired[:, position], values, 0.0)
+        scores = rule_scores.max(axis=1, initial=0.0)
+        return RuleMatches(self.rule_ids, np.minimum(scores, 1.0), fired)
+
+    def evaluate_events(self, events: list[dict]) -> RuleMatches:
+        return self.evaluate(EventColumns.from_events(events))
+
+    def _collect_predicates(self, condition: tuple) -> None:
+        kind = condition[0]
+        if kind == "leaf":
+            _, field, op, value = condition
+            function = (NUMBER_OPS if COLUMN_TYPES[field] == NUMBER else TEXT_OPS)[op]
+            self._predicates[condition] = lambda columns, f=field, fn=function, v=value: fn(columns[f], v)
+        elif kind == "not":
+            self._collect_predicates(condition[1])
+        else:
+            for child in condition[1]:
+                self._collect_predicates(child)
+
+    def _evaluate(self, condition: tuple, columns: EventColumns, cache: dict[tuple, np.ndarray]) -> np.ndarray:
+        kind = condition[0]
+        if kind == "leaf":
+            result = cache.get(condition)
+            if result is None:
+                result = cache[condition] = np.asarray(self._predicates[condition](columns), dtype=bool)
+            return result
+        if kind == "not":
+            return ~self._evaluate(condition[1], columns, cache)
+        children = [self._evaluate(child, columns, cache) for child in condition[1]]
+        reduce = np.logical_or if kind == "any" else np.logical_and
+        return reduce.reduce(children) if children else np.full(columns.size, kind == "all")
+
+
+class RuleStore(ReloadableResource[RuleSet]):
+    """Holds the active ``RuleSet`` for a rule file and recompiles it when the file changes."""
+
+    label = "heuristic rules"
+
+    def __init__(self, path: str, check_interval: float = 5.0) -> None:
+        self.path = path
+        super().__init__((path,), lambda: RuleSet.from_file(path), RuleSet([], version="empty"), check_interval)
+
+
+def coerce_datetime(value: Any) -> datetime | None:
+    if isinstance(value, datetime):
+        return value
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(str(value))
+    except ValueError:
+        try:
+            return datetime.strptime(str(value), "%Y-%m-%d %H:%M:%S")
+        except ValueError:
+            return None
+
+
+def user_key(user_id: Any) -> int | None:
+    """Integer user id of an event, or None when it has none; keys per-user state."""
+    try:
+        return int(user_id)
+    except (TypeError, ValueError):
+        return None
+
+
+def _compile_rule(entry: Any, position: int) -> Rule:
+    if not isinstance(entry, dict):
+        raise RuleError(f"Rule #{position} must be an object")
+    rule_id = entry.get("id")
+    if not isinstance(rule_id, str) or not rule_id:
+        raise RuleError(f"Rule #{position} needs a non-empty string 'id'")
+    score_from = entry.get("score_from")
+    if score_from is not None and COLUMN_TYPES.get(score_from) != NUMBER:
+        raise RuleError(f"Rule '{rule_id}': score_from must name a numeric column, got {score_from!r}")
+    try:
+        score = float(entry.get("score", 1.0 if score_from else None))
+    except (TypeError, ValueError) as exc:
+        raise RuleError(f"Rule '{rule_id}' needs a numeric 'score'") from exc
+    if not 0.0 <= score <= 1.0:
+        raise RuleError(f"Rule '{rule_id}' score must be between 0 and 1")
+    if "when" not in entry:
+        raise RuleError(f"Rule '{rule_id}' has no 'when' condition")
+    condition = _compile_condition(entry["when"], rule_id)
+    return Rule(rule_id, score, str(entry.get("description", "")), condition, score_from)
+
+
+def _compile_condition(node: Any, rule_id: str) -> tuple:
+    if not isinstance(node, dict):
+        raise RuleError(f"Rule '{rule_id}': conditions must be objects")
+    for combinator in ("any", "all"):
+        if combinator in node:
+            children = node[combinator]
+            if not isinstance(children, list):
+                raise RuleError(f"Rule '{rule_id}': '{combinator}' needs a list")
+            return (combinator, tuple(_compile_condition(child, rule_id) for child in children))
+    if "not" in node:
+        return ("not", _compile_condition(node["not"], rule_id))
+
+    field, op, value = node.get("field"), node.get("op"), node.get("value")
+    kind = COLUMN_TYPES.get(field)
+    if kind is None:
+        raise RuleError(f"Rule '{rule_id}': unknown field '{field}'")
+    operators = NUMBER_OPS if kind == NUMBER else TEXT_OPS
+    if op not in operators:
+        raise RuleError(f"Rule '{rule_id}': operator '{op}' is not supported for {kind} field '{field}'")
+    return ("leaf", field, op, _normalise_value(kind, op, value, rule_id))
+
+
+def _normalise_value(kind: str, op: str, value: Any, rule_id: str):
+    if op == "in":
+        if not isinstance(value, list):
+            raise RuleError(f"Rule '{rule_id}': 'in' needs a list value")
+        items = [_normalise_value(kind, "eq", item, rule_id) for item in value]
+        return tuple(items)
+    if kind == NUMBER:
+        try:
+            return float(value)
+        except (TypeError, ValueError) as exc:
+            raise RuleError(f"Rule '{rule_id}': expected a number, got {value!r}") from exc
+    if not isinstance(value, str):
+        raise RuleError(f"Rule '{rule_id}': expected a string, got {value!r}")
+    if op == "regex":
+        try:
+            return re.compile(value, re.IGNORECASE)
+        except re.error as exc:
+            raise RuleError(f"Rule '{rule_id}': invalid regex {value!r}: {exc}") from exc
+    return value.lower()
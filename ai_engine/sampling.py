@@ -0,0 +1,161 @@
+"""Bounded-memory training samples drawn from ``activity_logs`` in primary-key order."""
+from __future__ import annotations
+
+import heapq
+import random
+from datetime import datetime
+from typing import Callable, Hashable, Iterable, Iterator
+
+from database.database import fetch_all
+
+ACTIVITY_COLUMNS = (
+    "id, user_id, event_type, source_ip, device, location, bytes_transferred, "
+    "files_accessed, failed_attempts, session_duration, timestamp"
+)
+SAMPLING_MODES = {"reservoir", "stratified"}
+
+
+def iter_activity_chunks(chunk_size: int = 5000, fetch: Callable | None = None) -> Iterator[list[dict]]:
+    """Yield ``activity_logs`` rows in id order, one keyset-paginated chunk at a time.
+
+    ``WHERE id > ? ORDER BY id LIMIT ?`` is a range scan on the primary key, so no
+    query ever sorts or materialises the whole table.
+    """
+    fetch = fetch or fetch_all
+    last_id = 0
+    while True:
+        rows = fetch(
+            f"SELECT {ACTIVITY_COLUMNS} FROM activity_logs WHERE id > %s ORDER BY id LIMIT %s",
+            (last_id, chunk_size),
+        )
+        if not rows:
+            return
+        yield rows
+        if len(rows) < chunk_size:
+            return
+        last_id = rows[-1]["id"]
+
+
+class ReservoirSampler:
+    """Uniform sample of at most ``size`` rows from a stream (Algorithm R)."""
+
+    def __init__(self, size: int, seed: int = 42) -> None:
+        self.size = size
+        self.seen = 0
+        self.rows: list[dict] = []
+        self._rng = random.Random(seed)
+
+    def add(self, row: dict) -> None:
+        self.seen += 1
+        if len(self.rows) < self.size:
+            self.rows.append(row)
+            return
+        slot = self._rng.randrange(self.seen)
+        if slot < self.size:
+            self.rows[slot] = row
+
+    def sample(self) -> list[dict]:
+        return list(self.rows)
+
+
+class StratifiedSampler:
+    """Sample of at most ``size`` rows spread as evenly as possible across strata.
+
+    Every stratum keeps its own reservoir. Whenever the total exceeds ``size``, one random
+    row is evicted from the currently largest reservoir and that reservoir's capacity
+    shrinks by one, so a single busy user, event type or hour cannot crowd out the rest.
+    Each reservoir stays a uniform sample of its stratum. Memory is ``size`` rows plus two
+    counters and at most two heap entries per stratum.
+    """
+
+    def __init__(self, size: int, key: Callable[[dict], Hashable], seed: int = 42) -> None:
+        self.size = size
+        self.key = key
+        self.seen = 0
+        self._rng = random.Random(seed)
+        self._reservoirs: dict[Hashable, list[dict]] = {}
+        self._capacity: dict[Hashable, int] = {}
+        self._stratum_seen: dict[Hashable, int] = {}
+        self._stored = 0
+        # Max-heap of (-length, tiebreak, stratum); entries go stale and are skipped lazily,
+        # and the heap is rebuilt once stale entries outnumber the strata.
+        self._heap: list[tuple[int, float, Hashable]] = []
+
+    def add(self, row: dict) -> None:
+        self.seen += 1
+        stratum = self.key(row)
+        reservoir = self._reservoirs.get(stratum)
+        if reservoir is None:
+            reservoir = self._reservoirs[stratum] = []
+            self._capacity[stratum] = self.size
+            self._stratum_seen[stratum] = 0
+        self._stratum_seen[stratum] += 1
+
+        capacity = self._capacity[stratum]
+        if len(reservoir) < capacity:
+            reservoir.append(row)
+            self._stored += 1
+            self._push(stratum)
+            if self._stored > self.size:
+                self._evict_from_largest()
+            return
+        slot = self._rng.randrange(self._stratum_seen[stratum])
+        if slot < capacity:
+            reservoir[slot] = row
+
+    def sample(self) -> list[dict]:
+        return [row for reservoir in self._reservoirs.values() for row in reservoir]
+
+    @property
+    def strata(self) -> int:
+        return len(self._reservoirs)
+
+    def _push(self, stratum: Hashable) -> None:
+        heapq.heappush(self._heap, (-len(self._reservoirs[stratum]), self._rng.random(), stratum))
+        if len(self._heap) > 2 * len(self._reservoirs):
+            self._heap = [
+                (-len(reservoir), self._rng.random(), key) for key, reservoir in self._reservoirs.items() if reservoir
+            ]
+            heapq.heapify(self._heap)
+
+    def _evict_from_largest(self) -> None:
+        while self._heap:
+            negative_length, _, stratum = heapq.heappop(self._heap)
+            reservoir = self._reservoirs[stratum]
+            if -negative_length != len(reservoir) or not reservoir:
+                continue
+            slot = self._rng.randrange(len(reservoir))
+            reservoir[slot] = reservoir[-1]
+            reservoir.pop()
+            self._capacity[stratum] = len(reservoir)
+            self._stored -= 1
+            self._push(stratum)
+            return
+
+
+def activity_stratum(row: dict) -> tuple:
+    """Stratify by user, event type and six-hour time-of-day band."""
+    timestamp = row.get("timestamp")
+    band = timestamp.hour // 6 if isinstance(timestamp, datetime) else None
+    return row.get("user_id"), row.get("event_type"), band
+
+
+def sample_rows(rows: Iterable[dict], size: int, mode: str = "stratified", seed: int = 42) -> list[dict]:
+    if mode not in SAMPLING_MODES:
+        raise ValueError(f"Unknown sampling mode '{mode}'")
+    sampler = ReservoirSampler(size, seed) if mode == "reservoir" else StratifiedSampler(size, activity_stratum, seed)
+    for row in rows:
+        sampler.add(row)
+    return sampler.sample()
+
+
+def sample_activity_logs(
+    size: int,
+    mode: str = "stratified",
+    chunk_size: int = 5000,
+    seed: int = 42,
+    fetch: Callable | None = None,
+) -> list[dict]:
+    """Stream the whole table once and return a bounded training sample."""
+    rows = (row for chunk in iter_activity_chunks(chunk_size, fetch) for row in chunk)
+    return sample_rows(rows, size, mode, seed)
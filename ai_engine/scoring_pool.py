@@ -0,0 +1,218 @@
+"""Process-pool model scoring over memory-mapped artifacts.
+
+Scoring inside one process is serialised by the GIL wherever sklearn holds it, and every
+gunicorn worker keeps its own unpickled models. With ``AI_SCORING_WORKERS`` set, a batch
+is split into chunks of at least ``min_chunk_rows`` events and each chunk is one task in
+a pool of spawned processes: the worker preprocesses it once, runs the Isolation Forest
+and then the One-Class SVM on the rows its ``SvmPlan`` selects. Each worker loads the
+artifact version named in the task with ``mmap_mode="r"``, so the numpy arrays stored in
+the artifact file are page-cache pages shared by all workers, and reloads when a task names
+a newer version. Rules, per-user state and calibrated risk stay in the calling process.
+
+``PoolScorer`` and ``LocalScorer`` share one interface, ``scores(plan, rule_scores)``, and
+report the time of each stage to ``observe``. The pool scorer falls back to local scoring
+when the pool or the artifact is gone.
+"""
+from __future__ import annotations
+
+import logging
+import math
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from typing import Callable
+
+import numpy as np
+
+from ai_engine import model_store
+from ai_engine.bundle import ModelBundle
+from ai_engine.cascade import ONE_CLASS_SVM, SvmPlan
+
+logger = logging.getLogger(__name__)
+
+# Worker-process cache: (model directory, version) -> bundle.
+_worker_bundle: tuple[tuple[str, str], ModelBundle] | None = None
+
+
+@dataclass
+class ModelScores:
+    """Model outputs for a batch; ``svm`` is NaN for events the plan kept from the SVM."""
+
+    iso: np.ndarray
+    svm: np.ndarray
+    stages: np.ndarray
+    # stage -> (seconds, rows) spent by the models on this batch
+    timings: dict[str, tuple[float, int]] = field(default_factory=dict)
+
+    @classmethod
+    def concatenate(cls, parts: list["ModelScores"]) -> "ModelScores":
+        timings: dict[str, tuple[float, int]] = {}
+        for part in parts:
+            for stage, (seconds, rows) in part.timings.items():
+                total_seconds, total_rows = timings.get(stage, (0.0, 0))
+                timings[stage] = (total_seconds + seconds, total_rows + rows)
+        return cls(
+            np.concatenate([part.iso for part in parts]),
+            np.concatenate([part.svm for part in parts]),
+            np.concatenate([part.stages for part in parts]),
+            timings,
+        )
+
+
+def score_models(bundle: ModelBundle, features, plan: SvmPlan, rule_scores: np.ndarray) -> ModelScores:
+    """Isolation Forest scores for every row, then SVM scores for the rows ``plan`` selects."""
+    started = time.perf_counter()
+    iso_scores = np.asarray(bundle.isolation_forest.decision_scores(features))
+    timings = {"isolation_forest": (time.perf_counter() - started, len(iso_scores))}
+    stages = plan.stages(iso_scores, rule_scores)
+    svm_scores = np.full(len(iso_scores), np.nan)
+    rows = np.flatnonzero(stages == ONE_CLASS_SVM)
+    if len(rows):
+        started = time.perf_counter()
+        # Row selection copies the matrix, so full batches pass it through as is.
+        svm_scores[rows] = bundle.one_class_svm.decision_scores(features if len(rows) == len(stages) else features[rows])
+        timings["one_class_svm"] = (time.perf_counter() - started, len(rows))
+    return ModelScores(iso_scores, svm_scores, stages, timings)
+
+
+def _worker_scores(
+    model_dir: str, version: str, activities: list[dict], plan: SvmPlan, rule_scores: np.ndarray
+) -> tuple[ModelScores, bool]:
+    """Runs in a pool process: both models on one chunk, and whether the artifact was (re)loaded."""
+    global _worker_bundle
+    key = (model_dir, version)
+    loaded = _worker_bundle is None or _worker_bundle[0] != key
+    if loaded:
+        artifact = model_store.load_artifact(model_dir, version)
+        training_rows = int(artifact.manifest.get("training_rows") or 0)
+        _worker_bundle = (key, ModelBundle.from_components(artifact.components, training_rows, version))
+    bundle = _worker_bundle[1]
+    started = time.perf_counter()
+    features = bundle.preprocessor.transform(activities)
+    preprocessing = time.perf_counter() - started
+    scores = score_models(bundle, features, plan, rule_scores)
+    scores.timings["preprocessing"] = (preprocessing, len(activities))
+    return scores, loaded
+
+
+def _report(observe: Callable[[str, float, int], None] | None, scores: ModelScores) -> ModelScores:
+    if observe is not None:
+        for stage, (seconds, rows) in scores.timings.items():
+            observe(stage, seconds, rows)
+    return scores
+
+
+class LocalScorer:
+    """Preprocesses once and scores with the in-memory bundle."""
+
+    def __init__(self, bundle: ModelBundle, activities: list[dict], observe: Callable[[str, float, int], None] | None = None) -> None:
+        self.bundle = bundle
+        self.activities = activities
+        self.observe = observe
+
+    def scores(self, plan: SvmPlan, rule_scores: np.ndarray) -> ModelScores:
+        started = time.perf_counter()
+        features = self.bundle.preprocessor.transform(list(self.activities))
+        preprocessing = time.perf_counter() - started
+        scores = score_models(self.bundle, features, plan, rule_scores)
+        scores.timings["preprocessing"] = (preprocessing, len(self.activities))
+        return _report(self.observe, scores)
+
+
+class ScoringPool:
+    """Lazily started pool of ``workers`` spawned processes scoring saved artifacts from ``model_dir``."""
+
+    def __init__(self, model_dir: str, workers: int, min_chunk_rows: int = 64) -> None:
+        self.model_dir = model_dir
+        self.workers = max(1, workers)
+        self.min_chunk_rows = max(1, min_chunk_rows)
+        self._executor: ProcessPoolExecutor | None = None
+        self._lock = threading.Lock()
+        self._tasks = 0
+        self._rows = 0
+        self._loads = 0
+        self._fallbacks = 0
+
+    def scorer(self, bundle: ModelBundle, activities: list[dict], observe=None) -> "PoolScorer | LocalScorer":
+        if bundle.version is None:
+            # Never saved (read-only model directory): workers have nothing to map.
+            return LocalScorer(bundle, activities, observe)
+        return PoolScorer(self, bundle, activities, observe)
+
+    def map_scores(self, version: str, activities: list[dict], plan: SvmPlan, rule_scores: np.ndarray) -> ModelScores:
+        """Both models' scores for ``activities``, in order, from up to ``workers`` parallel chunks.
+
+        Timings are summed over the chunks, so they measure work per event, not wall time.
+        """
+        chunks = max(1, min(self.workers, math.ceil(len(activities) / self.min_chunk_rows)))
+        size = math.ceil(len(activities) / chunks)
+        rule_scores = np.asarray(rule_scores)
+        futures = [
+            self._pool().submit(
+                _worker_scores, self.model_dir, version, activities[offset:offset + size], plan, rule_scores[offset:offset + size]
+            )
+            for offset in range(0, len(activities), size)
+        ]
+        outcomes = [future.result() for future in futures]
+        with self._lock:
+            self._tasks += len(futures)
+            self._rows += len(activities)
+            self._loads += sum(loaded for _, loaded in outcomes)
+        return ModelScores.concatenate([scores for scores, _ in outcomes])
+
+    def record_fallback(self, exc: Exception) -> None:
+        with self._lock:
+            self._fallbacks += 1
+        if isinstance(exc, BrokenProcessPool):
+            # A worker died; start a fresh pool on the next call.
+            self.shutdown()
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def worker_pids(self) -> list[int]:
+        executor = self._executor
+        return sorted(executor._processes) if executor is not None else []
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "running": self._executor is not None,
+                "tasks": self._tasks,
+                "rows": self._rows,
+                "artifact_loads": self._loads,
+                "fallbacks": self._fallbacks,
+            }
+
+    def _pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # Spawned, not forked: the parent has threads and open database connections.
+                self._executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+            return self._executor
+
+
+class PoolScorer:
+    """``LocalScorer`` interface backed by ``ScoringPool``; degrades to local scoring on failure."""
+
+    def __init__(self, pool: ScoringPool, bundle: ModelBundle, activities: list[dict], observe=None) -> None:
+        self.pool = pool
+        self.bundle = bundle
+        self.activities = activities
+        self.observe = observe
+
+    def scores(self, plan: SvmPlan, rule_scores: np.ndarray) -> ModelScores:
+        try:
+            scores = self.pool.map_scores(self.bundle.version, self.activities, plan, rule_scores)
+        except Exception as exc:  # broken pool, pruned artifact: keep scoring in-process
+            logger.warning("Scoring pool failed (%s); scoring in-process", exc)
+            self.pool.record_fallback(exc)
+            return LocalScorer(self.bundle, self.activities, self.observe).scores(plan, rule_scores)
+        return _report(self.observe, scores)
@@ -0,0 +1,126 @@
+"""Local scoring sidecar: a UNIX-socket server in front of a micro-batched engine.
+
+Clients send one JSON object per line, ``{"event": {...}, "budget_ms": 50}``, and get one
+line back, ``{"result": {...}}`` (``DetectionResult.as_dict``) or ``{"error": "..."}``.
+Each connection is served by its own thread that blocks in ``MicroBatcher.submit``, so
+concurrent connections are scored together. Every request gets a reply line, whatever
+fails while scoring it.
+
+``ScoringClient`` keeps one connection per calling thread. It reconnects and resends only
+when sending fails on a connection the sidecar already closed (it was restarted). Once a
+request has been sent it is never resent: scoring persists alerts and updates per-user
+state, so a lost reply is raised as ``RuntimeError`` rather than scored again.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import socket
+import socketserver
+import threading
+from typing import Callable
+
+from ai_engine.micro_batcher import MicroBatcher
+
+logger = logging.getLogger(__name__)
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    server: "ScoringServer"
+
+    def handle(self) -> None:
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+                item = (request["event"], request.get("budget_ms"))
+            except (ValueError, KeyError, TypeError) as exc:
+                response = {"error": f"Malformed request: {exc}"}
+            else:
+                try:
+                    response = {"result": self.server.batcher.submit(item).as_dict()}
+                except RuntimeError as exc:
+                    response = {"error": str(exc)}
+                except Exception as exc:  # e.g. a database error while persisting: still reply
+                    logger.exception("Scoring sidecar request failed")
+                    response = {"error": f"Scoring failed: {type(exc).__name__}: {exc}"}
+            self.wfile.write(json.dumps(response, default=str).encode("utf-8") + b"\n")
+            self.wfile.flush()
+
+
+class ScoringServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Serves ``batcher`` on the UNIX socket at ``path``, replacing a stale socket file."""
+
+    daemon_threads = True
+    # Every web worker thread keeps its own connection, so many connect at once after a restart.
+    request_queue_size = 256
+
+    def __init__(self, path: str, batcher: MicroBatcher) -> None:
+        self.path = path
+        self.batcher = batcher
+        if os.path.exists(path):
+            os.unlink(path)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        super().__init__(path, _Handler)
+
+    def server_close(self) -> None:
+        super().server_close()
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+
+class ScoringClient:
+    """Thread-safe client for ``ScoringServer``; ``decode`` turns result dicts into objects."""
+
+    def __init__(self, path: str, decode: Callable[[dict], object] = lambda result: result, timeout: float = 30.0) -> None:
+        self.path = path
+        self.decode = decode
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def score(self, event: dict, budget_ms: float | None = None):
+        line = json.dumps({"event": event, "budget_ms": budget_ms}, default=str).encode("utf-8") + b"\n"
+        for attempt in (1, 2):
+            stream = self._stream()
+            try:
+                stream.write(line)
+                stream.flush()
+                break
+            except ConnectionError:
+                # A restarted sidecar leaves a dead connection behind; resend once on a new one.
+                self.close()
+                if attempt == 2:
+                    raise
+            except OSError:
+                self.close()
+                raise
+        # The request is out: whatever happens now, it may already have been scored.
+        try:
+            reply = stream.readline()
+        except OSError as exc:
+            self.close()
+            raise RuntimeError(f"Scoring sidecar did not reply: {exc}") from exc
+        if not reply:
+            self.close()
+            raise RuntimeError("Scoring sidecar closed the connection before replying")
+        response = json.loads(reply)
+        if "error" in response:
+            raise RuntimeError(response["error"])
+        return self.decode(response["result"])
+
+    def close(self) -> None:
+        stream = getattr(self._local, "stream", None)
+        if stream is not None:
+            self._local.stream = None
+            stream.close()
+            self._local.sock.close()
+
+    def _stream(self):
+        stream = getattr(self._local, "stream", None)
+        if stream is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            sock.connect(self.path)
+            self._local.sock = sock
+            self._local.stream = stream = sock.makefile("rwb")
+        return stream
@@ -0,0 +1,106 @@
+"""Background execution and status tracking for model retraining."""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+MAX_TRACKED_JOBS = 50
+
+
+@dataclass(slots=True)
+class TrainingJob:
+    job_id: str
+    params: Dict[str, Any]
+    status: str = "queued"
+    stage: str = "queued"
+    progress: float = 0.0
+    created_at: float = field(default_factory=time.time)
+    started_at: float | None = None
+    finished_at: float | None = None
+    error: str | None = None
+    result: Dict[str, Any] | None = None
+
+    @property
+    def duration(self) -> float | None:
+        if self.started_at is None:
+            return None
+        return (self.finished_at or time.time()) - self.started_at
+
+    @property
+    def is_active(self) -> bool:
+        return self.status in {"queued", "running"}
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.job_id,
+            "params": self.params,
+            "status": self.status,
+            "stage": self.stage,
+            "progress": round(self.progress, 3),
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "duration": self.duration,
+            "error": self.error,
+            "result": self.result,
+        }
+
+
+class TrainingJobManager:
+    """Runs training callables one at a time on a single background worker."""
+
+    def __init__(self) -> None:
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ai-training")
+        self._jobs: "OrderedDict[str, TrainingJob]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, runner: Callable[..., Dict[str, Any] | None], **params: Any) -> TrainingJob:
+        """Queue ``runner(progress=..., **params)`` unless a job is already pending.
+
+        The runner receives a ``progress(stage, fraction)`` callback and may return a
+        summary dictionary that is exposed as the job result.
+        """
+        with self._lock:
+            active = next((job for job in self._jobs.values() if job.is_active), None)
+            if active is not None:
+                return active
+            job = TrainingJob(job_id=uuid.uuid4().hex, params=params)
+            self._jobs[job.job_id] = job
+            while len(self._jobs) > MAX_TRACKED_JOBS:
+                self._jobs.popitem(last=False)
+        self._executor.submit(self._run, job, runner)
+        return job
+
+    def get(self, job_id: str) -> TrainingJob | None:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _run(self, job: TrainingJob, runner: Callable[..., Dict[str, Any] | None]) -> None:
+        job.status = "running"
+        job.stage = "starting"
+        job.started_at = time.time()
+
+        def progress(stage: str, fraction: float) -> None:
+            job.stage = stage
+            job.progress = max(job.progress, min(1.0, fraction))
+
+        try:
+            job.result = runner(progress=progress, **job.params)
+        except Exception as exc:
+            logger.exception("Training job %s failed", job.job_id)
+            job.status = "failed"
+            job.error = str(exc)
+        else:
+            job.status = "completed"
+            job.stage = "completed"
+            job.progress = 1.0
+        finally:
+            job.finished_at = time.time()
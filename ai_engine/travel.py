@@ -0,0 +1,281 @@
+"""Impossible-travel detection from each user's last known location.
+
+Location names are resolved to coordinates through a local JSON table
+(``ai_engine/rules/locations.json``: ``{"locations": {"NYC HQ": [lat, lon], ...}}``,
+matched case-insensitively, and also on the part before the first comma). Every user's
+last resolved location and time is kept in memory, so comparing an event with the
+previous one is a dict lookup and a haversine. The cache is flushed periodically to the
+``user_last_seen`` table and loaded back at startup. Names that do not resolve, such as
+"Remote", neither raise signals nor replace the last known location.
+
+Every web worker keeps its own cache. A flush never replaces a stored entry with an older
+one, and afterwards adopts stored sightings made since the worker's previous flush, so
+workers see each other's sightings with up to ``flush_interval`` delay. When that delay
+matters, run a single ``scripts.scoring_sidecar`` that owns the state for all workers.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import math
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Iterable
+
+import numpy as np
+
+from ai_engine.reloadable import ReloadableResource
+from ai_engine.rule_engine import coerce_datetime, user_key
+from database.database import execute_many, fetch_all
+
+EARTH_RADIUS_KM = 6371.0088
+# Same-instant jumps report this speed instead of infinity.
+MAX_REPORTED_KMH = 1_000_000.0
+TRAVEL_COLUMNS = ("travel_km", "travel_kmh", "impossible_travel")
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+class LocationTable:
+    """Immutable name -> (latitude, longitude) lookup."""
+
+    def __init__(self, coordinates: dict[str, tuple[float, float]], version: str = "") -> None:
+        self.coordinates = coordinates
+        self.version = version
+
+    def __len__(self) -> int:
+        return len(self.coordinates)
+
+    @classmethod
+    def from_dict(cls, payload: dict, version: str = "") -> "LocationTable":
+        if not isinstance(payload, dict) or not isinstance(payload.get("locations"), dict):
+            raise ValueError("Location file must be an object with a 'locations' mapping")
+        coordinates = {}
+        for name, point in payload["locations"].items():
+            try:
+                latitude, longitude = (float(value) for value in point)
+            except (TypeError, ValueError) as exc:
+                raise ValueError(f"Location '{name}' needs [latitude, longitude]") from exc
+            if not (-90.0 <= latitude <= 90.0 and -180.0 <= longitude <= 180.0):
+                raise ValueError(f"Location '{name}' has out-of-range coordinates")
+            coordinates[_normalise(name)] = (latitude, longitude)
+        return cls(coordinates, version)
+
+    @classmethod
+    def from_file(cls, path: str) -> "LocationTable":
+        with open(path, "rb") as handle:
+            raw = handle.read()
+        return cls.from_dict(json.loads(raw), version=hashlib.sha256(raw).hexdigest()[:12])
+
+    def resolve(self, name) -> tuple[float, float] | None:
+        if not name:
+            return None
+        key = _normalise(name)
+        point = self.coordinates.get(key)
+        if point is None and "," in key:
+            point = self.coordinates.get(key.split(",", 1)[0].strip())
+        return point
+
+    def stats(self) -> dict:
+        return {"version": self.version, "locations": len(self)}
+
+
+class LocationStore(ReloadableResource[LocationTable]):
+    """Serves the active location table and reloads it when the file changes."""
+
+    label = "location table"
+
+    def __init__(self, path: str, check_interval: float = 5.0) -> None:
+        self.path = path
+        super().__init__((path,), lambda: LocationTable.from_file(path), LocationTable({}, version="empty"), check_interval)
+
+
+class TravelDetector:
+    """Per-user last-seen cache that flags transitions faster than ``max_kmh``.
+
+    Jumps shorter than ``min_km`` are ignored so nearby offices and geolocation noise do not
+    count as travel. ``fetch``/``execute_many`` default to the database helpers.
+    """
+
+    def __init__(
+        self,
+        locations: Callable[[], LocationTable],
+        max_kmh: float = 900.0,
+        min_km: float = 100.0,
+        flush_interval: float = 60.0,
+        fetch: Callable | None = None,
+        execute_many: Callable | None = None,
+    ) -> None:
+        self.locations = locations
+        self.max_kmh = max_kmh
+        self.min_km = min_km
+        self.flush_interval = flush_interval
+        self.flagged = 0
+        self._fetch = fetch
+        self._execute_many = execute_many
+        # user_id -> (location name, latitude, longitude, epoch seconds)
+        self._last_seen: dict[int, tuple[str, float, float, float]] = {}
+        self._dirty: set[int] = set()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._flushed_at = time.monotonic()
+        # Epoch seconds of the last load or flush; entries seen after it are adopted.
+        self._synced_at: float | None = None
+
+    def __len__(self) -> int:
+        return len(self._last_seen)
+
+    def last_seen(self, user_id) -> tuple[str, float, float, float] | None:
+        return self._last_seen.get(user_key(user_id))
+
+    def columns(self, activities: list[dict]) -> dict[str, np.ndarray]:
+        """Distance, speed and an impossible-travel flag per event versus the previous location.
+
+        Events in a batch are compared in order, each with the user's latest earlier event
+        in the batch or, failing that, the cached last-seen entry. Nothing is recorded.
+        """
+        columns = {name: np.zeros(len(activities), dtype=np.float64) for name in TRAVEL_COLUMNS}
+        table = self.locations()
+        overlay: dict[int, tuple[str, float, float, float]] = {}
+        with self._lock:
+            for row, activity in enumerate(activities):
+                sighting = _sighting(activity, table)
+                if sighting is None:
+                    continue
+                user_id = sighting[0]
+                previous = overlay.get(user_id) or self._last_seen.get(user_id)
+                entry = sighting[1:]
+                if previous is not None:
+                    distance, speed = _travel(previous, entry)
+                    columns["travel_km"][row] = distance
+                    columns["travel_kmh"][row] = speed
+                    columns["impossible_travel"][row] = float(distance >= self.min_km and speed > self.max_kmh)
+                if previous is None or entry[3] >= previous[3]:
+                    overlay[user_id] = entry
+        return columns
+
+    def record_many(self, activities: Iterable[dict]) -> None:
+        table = self.locations()
+        with self._lock:
+            for activity in activities:
+                sighting = _sighting(activity, table)
+                if sighting is None:
+                    continue
+                user_id, entry = sighting[0], sighting[1:]
+                previous = self._last_seen.get(user_id)
+                if previous is not None:
+                    distance, speed = _travel(previous, entry)
+                    if distance >= self.min_km and speed > self.max_kmh:
+                        self.flagged += 1
+                    if entry[3] < previous[3]:
+                        # Late arrivals never move the last-seen point backwards in time.
+                        continue
+                self._last_seen[user_id] = entry
+                self._dirty.add(user_id)
+
+    def load(self) -> int:
+        fetch = self._fetch or fetch_all
+        rows = fetch("SELECT user_id, location, latitude, longitude, seen_at FROM user_last_seen", None)
+        last_seen = {}
+        for row in rows:
+            seen_at = coerce_datetime(row["seen_at"])
+            if seen_at is None:
+                continue
+            last_seen[int(row["user_id"])] = (row["location"], float(row["latitude"]), float(row["longitude"]), seen_at.timestamp())
+        with self._lock:
+            self._last_seen = last_seen
+            self._dirty.clear()
+        self._synced_at = time.time()
+        return len(last_seen)
+
+    def maybe_flush(self) -> int:
+        if time.monotonic() - self._flushed_at < self.flush_interval:
+            return 0
+        return self.flush()
+
+    def flush(self) -> int:
+        """Store every last-seen entry changed since the last flush unless a newer one is stored."""
+        with self._flush_lock:
+            with self._lock:
+                dirty, self._dirty = self._dirty, set()
+                rows = []
+                for user_id in dirty:
+                    location, latitude, longitude, seen_at = self._last_seen[user_id]
+                    rows.append((user_id, location, latitude, longitude, datetime.fromtimestamp(seen_at)))
+            self._flushed_at = time.monotonic()
+            if not rows:
+                return 0
+            synced_at, self._synced_at = self._synced_at, time.time()
+            try:
+                # MySQL applies the assignments in order, so ``seen_at`` has to come last.
+                (self._execute_many or execute_many)(
+                    "INSERT INTO user_last_seen (user_id, location, latitude, longitude, seen_at) "
+                    "VALUES (%s, %s, %s, %s, %s) ON DUPLICATE KEY UPDATE "
+                    "location = IF(VALUES(seen_at) >= seen_at, VALUES(location), location), "
+                    "latitude = IF(VALUES(seen_at) >= seen_at, VALUES(latitude), latitude), "
+                    "longitude = IF(VALUES(seen_at) >= seen_at, VALUES(longitude), longitude), "
+                    "seen_at = GREATEST(seen_at, VALUES(seen_at))",
+                    rows,
+                )
+                if synced_at is not None:
+                    # ``seen_at`` has one-second resolution.
+                    self._adopt((self._fetch or fetch_all)(
+                        "SELECT user_id, location, latitude, longitude, seen_at FROM user_last_seen WHERE seen_at >= %s",
+                        (datetime.fromtimestamp(synced_at - 1),),
+                    ))
+            except Exception:
+                with self._lock:
+                    self._dirty.update(dirty)
+                self._synced_at = synced_at
+                raise
+            return len(rows)
+
+    def _adopt(self, rows: Iterable[dict]) -> None:
+        """Take over stored entries newer than the cached ones."""
+        with self._lock:
+            for row in rows:
+                seen_at = coerce_datetime(row["seen_at"])
+                user_id = int(row["user_id"])
+                previous = self._last_seen.get(user_id)
+                if seen_at is None or (previous is not None and previous[3] >= seen_at.timestamp()):
+                    continue
+                self._last_seen[user_id] = (row["location"], float(row["latitude"]), float(row["longitude"]), seen_at.timestamp())
+
+    def stats(self) -> dict:
+        return {
+            "users": len(self._last_seen),
+            "pending_flush": len(self._dirty),
+            "impossible_travel": self.flagged,
+            "max_kmh": self.max_kmh,
+        }
+
+
+def _travel(previous: tuple[str, float, float, float], current: tuple[str, float, float, float]) -> tuple[float, float]:
+    distance = haversine_km(previous[1], previous[2], current[1], current[2])
+    hours = abs(current[3] - previous[3]) / 3600.0
+    if distance == 0.0:
+        return 0.0, 0.0
+    return distance, min(distance / hours, MAX_REPORTED_KMH) if hours > 0 else MAX_REPORTED_KMH
+
+
+def _sighting(activity: dict, table: LocationTable) -> tuple[int, str, float, float, float] | None:
+    user_id = user_key(activity.get("user_id"))
+    if user_id is None:
+        return None
+    point = table.resolve(activity.get("location"))
+    if point is None:
+        return None
+    timestamp = coerce_datetime(activity.get("timestamp"))
+    seen_at = timestamp.timestamp() if timestamp else time.time()
+    return user_id, str(activity.get("location"))[:120], point[0], point[1], seen_at
+
+
+def _normalise(name) -> str:
+    return " ".join(str(name).split()).casefold()
@@ -0,0 +1,172 @@
+"""User-agent classification with an Aho-Corasick automaton over weighted tool signatures.
+
+Signatures are case-insensitive substrings, each with a weight and a category. All of them
+are compiled into one automaton, so a user agent is scanned once no matter how many
+signatures exist, and overlapping signatures ("python" inside "python-urllib") are all
+reported. A user agent's score is the highest weight among its matches. Results are
+memoised in an LRU because fleets send the same few strings over and over.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+from collections import deque
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Iterable
+
+import numpy as np
+
+from ai_engine.reloadable import ReloadableResource
+
+
+@dataclass(frozen=True, slots=True)
+class Signature:
+    pattern: str
+    weight: float
+    category: str = "tool"
+
+
+@dataclass(frozen=True, slots=True)
+class UserAgentMatch:
+    score: float
+    categories: tuple[str, ...] = ()
+    patterns: tuple[str, ...] = ()
+
+
+NO_MATCH = UserAgentMatch(0.0)
+
+
+class AhoCorasick:
+    """Multi-pattern substring matcher; ``search`` returns the indices of every pattern found."""
+
+    def __init__(self, patterns: Iterable[str]) -> None:
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._output: list[tuple[int, ...]] = [()]
+        for index, pattern in enumerate(patterns):
+            self._insert(pattern, index)
+        self._link()
+
+    def search(self, text: str) -> set[int]:
+        goto, fail, output = self._goto, self._fail, self._output
+        found: set[int] = set()
+        node = 0
+        for char in text:
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if output[node]:
+                found.update(output[node])
+        return found
+
+    def _insert(self, pattern: str, index: int) -> None:
+        node = 0
+        for char in pattern:
+            following = self._goto[node].get(char)
+            if following is None:
+                following = len(self._goto)
+                self._goto[node][char] = following
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(())
+            node = following
+        self._output[node] = self._output[node] + (index,)
+
+    def _link(self) -> None:
+        # Breadth-first so every failure target is finished before the nodes that use it.
+        pending = deque(self._goto[0].values())
+        while pending:
+            node = pending.popleft()
+            for char, child in self._goto[node].items():
+                pending.append(child)
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[child] = target if target != child else 0
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+
+
+class UserAgentClassifier:
+    """Compiled signature list; immutable, so it can be swapped in as a single reference."""
+
+    def __init__(self, signatures: list[Signature], cache_size: int = 4096, version: str = "") -> None:
+        self.signatures = signatures
+        self.version = version
+        self._automaton = AhoCorasick(signature.pattern for signature in signatures)
+        self._classify = lru_cache(maxsize=cache_size)(self._match)
+
+    def __len__(self) -> int:
+        return len(self.signatures)
+
+    @classmethod
+    def from_dict(cls, payload: dict, cache_size: int = 4096, version: str = "") -> "UserAgentClassifier":
+        if not isinstance(payload, dict) or not isinstance(payload.get("signatures"), list):
+            raise ValueError("User-agent file must be an object with a 'signatures' list")
+        signatures = []
+        for position, entry in enumerate(payload["signatures"]):
+            try:
+                pattern = str(entry["pattern"]).strip().lower()
+                weight = float(entry["weight"])
+            except (KeyError, TypeError, ValueError) as exc:
+                raise ValueError(f"Signature #{position} needs a 'pattern' and a numeric 'weight'") from exc
+            if not pattern or not 0.0 <= weight <= 1.0:
+                raise ValueError(f"Signature #{position} needs a non-empty pattern and a weight between 0 and 1")
+            signatures.append(Signature(pattern, weight, str(entry.get("category", "tool"))))
+        return cls(signatures, cache_size, version)
+
+    @classmethod
+    def from_file(cls, path: str, cache_size: int = 4096) -> "UserAgentClassifier":
+        with open(path, "rb") as handle:
+            raw = handle.read()
+        return cls.from_dict(json.loads(raw), cache_size, version=hashlib.sha256(raw).hexdigest()[:12])
+
+    def classify(self, user_agent: str | None) -> UserAgentMatch:
+        if not user_agent:
+            return NO_MATCH
+        return self._classify(str(user_agent).lower())
+
+    def classify_many(self, user_agents: Iterable[str | None]) -> list[UserAgentMatch]:
+        return [self.classify(user_agent) for user_agent in user_agents]
+
+    def columns(self, user_agents: Iterable[str | None]) -> dict[str, np.ndarray]:
+        """Rule columns for a batch: ``ua_score`` and comma-joined ``ua_category``."""
+        matches = self.classify_many(user_agents)
+        return {
+            "ua_score": np.array([match.score for match in matches], dtype=np.float64),
+            "ua_category": np.array([",".join(match.categories) for match in matches], dtype=str),
+        }
+
+    def cache_info(self) -> dict:
+        info = self._classify.cache_info()
+        return {"hits": info.hits, "misses": info.misses, "size": info.currsize, "max_size": info.maxsize}
+
+    def stats(self) -> dict:
+        return {"version": self.version, "signatures": len(self), "cache": self.cache_info()}
+
+    def _match(self, user_agent: str) -> UserAgentMatch:
+        found = self._automaton.search(user_agent)
+        if not found:
+            return NO_MATCH
+        matched = sorted((self.signatures[index] for index in found), key=lambda signature: (-signature.weight, signature.pattern))
+        return UserAgentMatch(
+            score=matched[0].weight,
+            categories=tuple(sorted({signature.category for signature in matched})),
+            patterns=tuple(signature.pattern for signature in matched),
+        )
+
+
+class UserAgentStore(ReloadableResource[UserAgentClassifier]):
+    """Serves the active classifier and recompiles it when the signature file changes."""
+
+    label = "user-agent signatures"
+
+    def __init__(self, path: str, check_interval: float = 5.0, cache_size: int = 4096) -> None:
+        self.path = path
+        super().__init__(
+            (path,),
+            lambda: UserAgentClassifier.from_file(path, cache_size),
+            UserAgentClassifier([], cache_size, version="empty"),
+            check_interval,
+        )
@@ -0,0 +1,368 @@
+"""Per-user behavioural baselines updated in O(1) per event.
+
+Each profile keeps a running mean and variance (Welford) of the transfer, file and session
+metrics, a 24-bucket hour-of-day histogram and Bloom filters of the devices and source IPs
+the user has used (``ai_engine.membership``). Profiles are serialised to a compact binary
+snapshot (149 bytes plus the two filters, 781 bytes in total at the default 256 items and
+1% false positives) in the ``user_profiles`` table. New events are merged into the stored
+profiles periodically (see ``ProfileStore``), and the whole store is read back at startup.
+``activity_logs`` is scanned only once, in a single streaming pass, to bootstrap an empty
+table.
+"""
+from __future__ import annotations
+
+import logging
+import math
+import struct
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Iterable
+
+import numpy as np
+
+from ai_engine.data_preprocessor import to_number
+from ai_engine.membership import BloomFilter
+from ai_engine.rule_engine import coerce_datetime, user_key
+from ai_engine.sampling import iter_activity_chunks
+from database.database import fetch_all, get_cursor
+
+logger = logging.getLogger(__name__)
+
+METRICS = ("bytes_transferred", "files_accessed", "session_duration")
+# Rule column for each metric's deviation from the user's own baseline.
+ZSCORE_COLUMNS = {"bytes_transferred": "bytes_zscore", "files_accessed": "files_zscore", "session_duration": "session_zscore"}
+SIGNAL_COLUMNS = (*ZSCORE_COLUMNS.values(), "hour_rarity", "new_device", "new_ip", "profile_events", "profile_mature")
+# Z-scores are clipped so a first-ever large value after a constant history stays finite.
+MAX_ZSCORE = 1000.0
+
+SNAPSHOT_FORMAT = 2
+_HEADER = struct.Struct("<BI6d24I")
+# Users whose stored rows are locked and read per query during a flush.
+FLUSH_CHUNK_USERS = 500
+
+
+class UserProfile:
+    """Running statistics for one user."""
+
+    __slots__ = ("count", "means", "m2", "hours", "devices", "ips")
+
+    def __init__(self, devices: BloomFilter, ips: BloomFilter) -> None:
+        self.count = 0
+        self.means = [0.0] * len(METRICS)
+        self.m2 = [0.0] * len(METRICS)
+        self.hours = [0] * 24
+        self.devices = devices
+        self.ips = ips
+
+    def observe(self, values: tuple[float, ...], hour: int | None, device: str | None, ip: str | None) -> None:
+        self.count += 1
+        for index, value in enumerate(values):
+            delta = value - self.means[index]
+            self.means[index] += delta / self.count
+            self.m2[index] += delta * (value - self.means[index])
+        if hour is not None:
+            self.hours[hour] += 1
+        if device is not None:
+            self.devices.add(device)
+        if ip is not None:
+            self.ips.add(ip)
+
+    def merge(self, other: "UserProfile") -> None:
+        """Fold in the statistics of ``other``, as if its events had been observed here."""
+        if other.count == 0:
+            return
+        total = self.count + other.count
+        for index in range(len(METRICS)):
+            # Chan et al.: combined mean and sum of squared deviations of two samples.
+            delta = other.means[index] - self.means[index]
+            self.means[index] += delta * other.count / total
+            self.m2[index] += other.m2[index] + delta * delta * self.count * other.count / total
+        self.count = total
+        self.hours = [mine + theirs for mine, theirs in zip(self.hours, other.hours)]
+        for mine, theirs in ((self.devices, other.devices), (self.ips, other.ips)):
+            try:
+                mine.update(theirs)
+            except ValueError:
+                # Sized under another membership configuration: keep the filter already here.
+                pass
+
+    def empty_like(self) -> "UserProfile":
+        """A profile with no events whose filters can be merged into this one."""
+        return UserProfile(self.devices.empty_like(), self.ips.empty_like())
+
+    def copy(self) -> "UserProfile":
+        return UserProfile.from_bytes(self.to_bytes(), self.devices.capacity)
+
+    def std(self, index: int) -> float:
+        return math.sqrt(self.m2[index] / self.count) if self.count > 1 else 0.0
+
+    def zscore(self, index: int, value: float) -> float:
+        deviation = value - self.means[index]
+        # A one-unit floor keeps constant histories (std 0) from dividing by zero.
+        return max(-MAX_ZSCORE, min(MAX_ZSCORE, deviation / max(self.std(index), 1.0)))
+
+    @property
+    def snapshot_size(self) -> int:
+        return _HEADER.size + self.devices.snapshot_size + self.ips.snapshot_size
+
+    def to_bytes(self) -> bytes:
+        header = _HEADER.pack(SNAPSHOT_FORMAT, self.count, *self.means, *self.m2, *self.hours)
+        return header + self.devices.to_bytes() + self.ips.to_bytes()
+
+    @classmethod
+    def from_bytes(cls, payload: bytes, capacity: int = 0) -> "UserProfile":
+        fields = _HEADER.unpack_from(payload)
+        if fields[0] != SNAPSHOT_FORMAT:
+            raise ValueError(f"Unsupported profile snapshot format {fields[0]}")
+        devices, offset = BloomFilter.from_bytes(payload, _HEADER.size, capacity)
+        ips, _ = BloomFilter.from_bytes(payload, offset, capacity)
+        profile = cls(devices, ips)
+        profile.count = fields[1]
+        profile.means = list(fields[2:5])
+        profile.m2 = list(fields[5:8])
+        profile.hours = list(fields[8:32])
+        return profile
+
+
+class ProfileStore:
+    """All user profiles in memory, with deviation signals and periodic MySQL persistence.
+
+    ``fetch`` and ``transaction`` (a context manager yielding a dictionary cursor whose
+    statements commit together) default to the database helpers and are injectable for
+    tests and offline tools. Profiles with fewer than ``min_events`` events produce no
+    deviation z-scores, so new users are not flagged against a baseline that does not exist
+    yet; ``new_device``/``new_ip`` are reported from a user's second event on.
+
+    Every web worker keeps its own store, so none of them owns the table. Besides each
+    profile, the store keeps the events observed since its last flush as a separate
+    pending profile. ``flush`` locks the stored rows of those users, merges the pending
+    events into them and writes the result back, so concurrent workers add up instead of
+    overwriting each other. It then adopts every row changed since its previous flush, so
+    a worker sees the others' events with up to ``flush_interval`` delay. When that delay
+    matters, run a single ``scripts.scoring_sidecar`` that owns the state for all workers.
+    The engine flushes from a background thread, so requests never wait on these row locks.
+    """
+
+    def __init__(
+        self,
+        min_events: int = 20,
+        membership_capacity: int = 256,
+        membership_error_rate: float = 0.01,
+        flush_interval: float = 60.0,
+        fetch: Callable | None = None,
+        transaction: Callable | None = None,
+    ) -> None:
+        self.min_events = min_events
+        self.membership_capacity = membership_capacity
+        self.membership_error_rate = membership_error_rate
+        self.flush_interval = flush_interval
+        self._fetch = fetch
+        self._transaction = transaction
+        self._profiles: dict[int, UserProfile] = {}
+        # Events observed since the last flush, per user.
+        self._pending: dict[int, UserProfile] = {}
+        # Profiles rebuilt from history; written only for users with no stored row yet.
+        self._baseline: dict[int, UserProfile] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._flushed_at = time.monotonic()
+        # Wall-clock time of the last load or flush; rows updated after it are adopted.
+        self._synced_at: datetime | None = None
+
+    def __len__(self) -> int:
+        return len(self._profiles)
+
+    def get(self, user_id) -> UserProfile | None:
+        return self._profiles.get(user_key(user_id))
+
+    def observe(self, activity: dict) -> None:
+        self.observe_many([activity])
+
+    def observe_many(self, activities: Iterable[dict]) -> None:
+        with self._lock:
+            for activity in activities:
+                user_id = user_key(activity.get("user_id"))
+                if user_id is None:
+                    continue
+                profile = self._profiles.get(user_id)
+                if profile is None:
+                    profile = self._profiles[user_id] = self._new_profile()
+                pending = self._pending.get(user_id)
+                if pending is None:
+                    pending = self._pending[user_id] = profile.empty_like()
+                features = _event_features(activity)
+                profile.observe(*features)
+                pending.observe(*features)
+
+    def signals(self, activities: list[dict]) -> dict[str, np.ndarray]:
+        """Deviation of each event from its user's baseline, as rule columns.
+
+        Every event is compared with the profile as it stood before the batch.
+        """
+        columns = {name: np.zeros(len(activities), dtype=np.float64) for name in SIGNAL_COLUMNS}
+        with self._lock:
+            for row, activity in enumerate(activities):
+                profile = self._profiles.get(user_key(activity.get("user_id")))
+                if profile is None:
+                    continue
+                columns["profile_events"][row] = profile.count
+                values, hour, device, ip = _event_features(activity)
+                columns["new_device"][row] = float(device is not None and device not in profile.devices)
+                columns["new_ip"][row] = float(ip is not None and ip not in profile.ips)
+                if profile.count < self.min_events:
+                    continue
+                columns["profile_mature"][row] = 1.0
+                for index, metric in enumerate(METRICS):
+                    columns[ZSCORE_COLUMNS[metric]][row] = profile.zscore(index, values[index])
+                timestamped = sum(profile.hours)
+                if hour is not None and timestamped:
+                    # Only events with a timestamp reached the histogram.
+                    columns["hour_rarity"][row] = 1.0 - profile.hours[hour] / timestamped
+        return columns
+
+    def load(self) -> int:
+        """Replace the in-memory profiles with the stored snapshots; returns how many loaded."""
+        fetch = self._fetch or fetch_all
+        rows = fetch("SELECT user_id, snapshot FROM user_profiles", None)
+        profiles = self._decode(rows)
+        with self._lock:
+            self._profiles = profiles
+            self._pending.clear()
+            self._baseline.clear()
+        self._synced_at = datetime.now()
+        return len(profiles)
+
+    def build_from_history(self, chunk_size: int = 5000) -> int:
+        """Rebuild every profile in one streaming pass over ``activity_logs``; returns events read.
+
+        Memory stays at one chunk of rows plus the profiles. The next flush stores each
+        rebuilt profile unless another worker already stored one for that user, so this
+        only has to run once.
+        """
+        fresh = ProfileStore(self.min_events, self.membership_capacity, self.membership_error_rate)
+        events = 0
+        for chunk in iter_activity_chunks(chunk_size, self._fetch):
+            fresh.observe_many(chunk)
+            events += len(chunk)
+        with self._lock:
+            self._profiles = fresh._profiles
+            self._pending.clear()
+            self._baseline = {user_id: profile.copy() for user_id, profile in fresh._profiles.items()}
+        return events
+
+    def maybe_flush(self) -> int:
+        if time.monotonic() - self._flushed_at < self.flush_interval:
+            return 0
+        return self.flush()
+
+    def flush(self) -> int:
+        """Merge the events observed since the last flush into the stored profiles.
+
+        Returns how many profiles were written. On failure the events stay pending.
+        """
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+                baseline, self._baseline = self._baseline, {}
+            self._flushed_at = time.monotonic()
+            if not pending and not baseline:
+                return 0
+            synced_at, self._synced_at = self._synced_at, datetime.now()
+            try:
+                written, stored = self._write_merged(pending, baseline, synced_at)
+            except Exception:
+                with self._lock:
+                    for user_id, events in pending.items():
+                        later = self._pending.get(user_id)
+                        if later is not None:
+                            events.merge(later)
+                        self._pending[user_id] = events
+                    self._baseline = {**baseline, **self._baseline}
+                self._synced_at = synced_at
+                raise
+            with self._lock:
+                for user_id, profile in stored.items():
+                    # The stored profile plus whatever this worker observed during the flush.
+                    later = self._pending.get(user_id)
+                    if later is not None:
+                        profile.merge(later)
+                    self._profiles[user_id] = profile
+            return written
+
+    def _write_merged(
+        self, pending: dict[int, UserProfile], baseline: dict[int, UserProfile], synced_at: datetime | None
+    ) -> tuple[int, dict[int, UserProfile]]:
+        """Read-merge-write in one transaction; returns rows written and the profiles now stored."""
+        user_ids = sorted(pending.keys() | baseline.keys())
+        stored: dict[int, UserProfile] = {}
+        with (self._transaction or get_cursor)() as cursor:
+            # Locked in user order, so concurrent flushes cannot deadlock on each other's rows.
+            for offset in range(0, len(user_ids), FLUSH_CHUNK_USERS):
+                chunk = user_ids[offset:offset + FLUSH_CHUNK_USERS]
+                placeholders = ", ".join(["%s"] * len(chunk))
+                cursor.execute(
+                    f"SELECT user_id, snapshot FROM user_profiles WHERE user_id IN ({placeholders}) FOR UPDATE",
+                    tuple(chunk),
+                )
+                stored.update(self._decode(cursor.fetchall()))
+            now = datetime.now()
+            rows = []
+            for user_id in user_ids:
+                profile = stored.get(user_id) or baseline.get(user_id)
+                events = pending.get(user_id)
+                if profile is None:
+                    profile = events.empty_like()
+                if events is not None:
+                    profile.merge(events)
+                stored[user_id] = profile
+                rows.append((user_id, profile.count, profile.to_bytes(), now))
+            if rows:
+                cursor.executemany(
+                    "INSERT INTO user_profiles (user_id, event_count, snapshot, updated_at) VALUES (%s, %s, %s, %s) "
+                    "ON DUPLICATE KEY UPDATE event_count = VALUES(event_count), snapshot = VALUES(snapshot), "
+                    "updated_at = VALUES(updated_at)",
+                    rows,
+                )
+            if synced_at is not None:
+                # Other workers' flushes since ours; ``updated_at`` has one-second resolution.
+                cursor.execute(
+                    "SELECT user_id, snapshot FROM user_profiles WHERE updated_at >= %s",
+                    (synced_at - timedelta(seconds=1),),
+                )
+                for user_id, profile in self._decode(cursor.fetchall()).items():
+                    stored.setdefault(user_id, profile)
+        return len(rows), stored
+
+    def _decode(self, rows: Iterable[dict]) -> dict[int, UserProfile]:
+        profiles = {}
+        for row in rows:
+            try:
+                profiles[int(row["user_id"])] = UserProfile.from_bytes(bytes(row["snapshot"]), self.membership_capacity)
+            except (struct.error, ValueError) as exc:
+                logger.warning("Skipping unreadable profile snapshot for user %s: %s", row.get("user_id"), exc)
+        return profiles
+
+    def stats(self) -> dict:
+        with self._lock:
+            profiles = list(self._profiles.values())
+            pending = len(self._pending.keys() | self._baseline.keys())
+        return {
+            "users": len(profiles),
+            "pending_flush": pending,
+            "snapshot_bytes": sum(profile.snapshot_size for profile in profiles),
+            "saturated_membership_filters": sum(profile.devices.saturated + profile.ips.saturated for profile in profiles),
+        }
+
+    def _new_profile(self) -> UserProfile:
+        return UserProfile(
+            BloomFilter.for_capacity(self.membership_capacity, self.membership_error_rate),
+            BloomFilter.for_capacity(self.membership_capacity, self.membership_error_rate),
+        )
+
+
+def _event_features(activity: dict) -> tuple[tuple[float, ...], int | None, str | None, str | None]:
+    values = tuple(to_number(activity.get(metric), finite=True) for metric in METRICS)
+    timestamp = coerce_datetime(activity.get("timestamp"))
+    return values, timestamp.hour if timestamp else None, activity.get("device") or None, activity.get("source_ip") or None
+
@@ -31,10 +31,10 @@ def create_app() -> Flask:
 
     # Attach AI engine
     ai_engine = AIEngine()
-    app.extensions["ai_engine"] = ai_engine
+    ai_engine.init_app(app)
     with app.app_context():
         try:
-            ai_engine.warm_start()
+            ai_engine.load_or_train()
         except RuntimeError:
             app.logger.warning("AI engine warm start skipped; insufficient data")
 
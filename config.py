@@ -3,6 +3,8 @@ import os
 
 load_dotenv()
 
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
 
 class Config:
     """Application configuration loaded from environment variables."""
@@ -19,6 +21,84 @@ class Config:
 
     HF_API_BASE = os.getenv("HF_API_BASE")
     HF_API_KEY = os.getenv("HF_API_KEY")
+    HF_MODEL = os.getenv("HF_MODEL", "Qwen/Qwen2.5-7B-Instruct")
+
+    AI_MODEL_DIR = os.getenv("AI_MODEL_DIR", os.path.join(BASE_DIR, "instance", "models"))
+    AI_MODEL_MAX_AGE_HOURS = float(os.getenv("AI_MODEL_MAX_AGE_HOURS", 24))
+    AI_MODEL_KEEP_VERSIONS = int(os.getenv("AI_MODEL_KEEP_VERSIONS", 3))
+    AI_SPARSE_FEATURES = os.getenv("AI_SPARSE_FEATURES", "true").lower() in {"1", "true", "yes"}
+    # Per-field categorical encoding, e.g. "source_ip=hash:4096,device=topk:500"; others stay one-hot.
+    AI_CATEGORICAL_ENCODING = os.getenv("AI_CATEGORICAL_ENCODING", "")
+    # "exact" libsvm One-Class SVM, or "approx" (Nystroem kernel approximation + SGD) for large baselines.
+    AI_SVM_BACKEND = os.getenv("AI_SVM_BACKEND", "exact")
+    AI_SVM_APPROX_COMPONENTS = int(os.getenv("AI_SVM_APPROX_COMPONENTS", 300))
+    # Training streams activity_logs by primary key and keeps a bounded sample.
+    AI_TRAINING_SAMPLE_SIZE = int(os.getenv("AI_TRAINING_SAMPLE_SIZE", 500))
+    AI_TRAINING_SAMPLE_MODE = os.getenv("AI_TRAINING_SAMPLE_MODE", "stratified")
+    AI_TRAINING_CHUNK_SIZE = int(os.getenv("AI_TRAINING_CHUNK_SIZE", 5000))
+    AI_MAX_BATCH_SIZE = int(os.getenv("AI_MAX_BATCH_SIZE", 5000))
+    # IsolationForest tree-building workers (-1 = all cores); IF and SVM fit side by side when parallel.
+    AI_ISOLATION_FOREST_N_JOBS = int(os.getenv("AI_ISOLATION_FOREST_N_JOBS", -1))
+    AI_PARALLEL_FIT = os.getenv("AI_PARALLEL_FIT", "true").lower() in {"1", "true", "yes"}
+    # Declarative heuristic rules; the file is re-read when it changes (checked every few seconds).
+    AI_RULES_PATH = os.getenv("AI_RULES_PATH", os.path.join(BASE_DIR, "ai_engine", "rules", "heuristics.json"))
+    AI_RULES_CHECK_SECONDS = float(os.getenv("AI_RULES_CHECK_SECONDS", 5))
+    AI_IP_BLOCKLIST_PATH = os.getenv("AI_IP_BLOCKLIST_PATH", os.path.join(BASE_DIR, "ai_engine", "rules", "ip_blocklist.txt"))
+    AI_IP_ALLOWLIST_PATH = os.getenv("AI_IP_ALLOWLIST_PATH", os.path.join(BASE_DIR, "ai_engine", "rules", "ip_allowlist.txt"))
+    AI_USER_AGENTS_PATH = os.getenv("AI_USER_AGENTS_PATH", os.path.join(BASE_DIR, "ai_engine", "rules", "user_agents.json"))
+    AI_USER_AGENT_CACHE_SIZE = int(os.getenv("AI_USER_AGENT_CACHE_SIZE", 4096))
+    # Per-user baselines: events needed before deviations count, and how often changes are flushed.
+    AI_PROFILE_MIN_EVENTS = int(os.getenv("AI_PROFILE_MIN_EVENTS", 20))
+    AI_PROFILE_FLUSH_SECONDS = float(os.getenv("AI_PROFILE_FLUSH_SECONDS", 60))
+    # Per-user Bloom filters of known devices and IPs: items each filter is sized for, false-positive rate.
+    AI_MEMBERSHIP_CAPACITY = int(os.getenv("AI_MEMBERSHIP_CAPACITY", 256))
+    AI_MEMBERSHIP_ERROR_RATE = float(os.getenv("AI_MEMBERSHIP_ERROR_RATE", 0.01))
+    # Sliding-window rate counters: buckets per window and most users/IPs tracked per scope.
+    AI_RATE_BUCKETS = int(os.getenv("AI_RATE_BUCKETS", 12))
+    AI_RATE_MAX_KEYS = int(os.getenv("AI_RATE_MAX_KEYS", 100000))
+    # Impossible travel: location -> coordinates table, fastest plausible speed, shortest jump that counts.
+    AI_LOCATIONS_PATH = os.getenv("AI_LOCATIONS_PATH", os.path.join(BASE_DIR, "ai_engine", "rules", "locations.json"))
+    AI_TRAVEL_MAX_KMH = float(os.getenv("AI_TRAVEL_MAX_KMH", 900))
+    AI_TRAVEL_MIN_KM = float(os.getenv("AI_TRAVEL_MIN_KM", 100))
+    # Model scores are mapped to risk by their training percentile; each level fires on this top share of events.
+    AI_CALIBRATION_POINTS = int(os.getenv("AI_CALIBRATION_POINTS", 1001))
+    AI_RISK_MEDIUM_TOP_PERCENT = float(os.getenv("AI_RISK_MEDIUM_TOP_PERCENT", 10))
+    AI_RISK_HIGH_TOP_PERCENT = float(os.getenv("AI_RISK_HIGH_TOP_PERCENT", 2))
+    AI_RISK_CRITICAL_TOP_PERCENT = float(os.getenv("AI_RISK_CRITICAL_TOP_PERCENT", 0.2))
+    # "cascade" runs the One-Class SVM only for events whose Isolation Forest percentile is inside this band.
+    AI_SCORING_MODE = os.getenv("AI_SCORING_MODE", "ensemble").lower()
+    AI_CASCADE_LOWER_PERCENTILE = float(os.getenv("AI_CASCADE_LOWER_PERCENTILE", 0.8))
+    AI_CASCADE_UPPER_PERCENTILE = float(os.getenv("AI_CASCADE_UPPER_PERCENTILE", 0.998))
+    # Under load scoring drops LLM insights, then the SVM, then both models (a limit of 0 disables that step).
+    AI_LATENCY_BUDGET_MS = float(os.getenv("AI_LATENCY_BUDGET_MS", 0))
+    AI_LOAD_NO_LLM_IN_FLIGHT = int(os.getenv("AI_LOAD_NO_LLM_IN_FLIGHT", 8))
+    AI_LOAD_NO_SVM_IN_FLIGHT = int(os.getenv("AI_LOAD_NO_SVM_IN_FLIGHT", 16))
+    AI_LOAD_HEURISTICS_ONLY_IN_FLIGHT = int(os.getenv("AI_LOAD_HEURISTICS_ONLY_IN_FLIGHT", 32))
+    AI_LOAD_NO_LLM_QUEUE_DEPTH = int(os.getenv("AI_LOAD_NO_LLM_QUEUE_DEPTH", 80))
+    # Seconds after which a stage dropped to meet latency budgets is measured again.
+    AI_LOAD_PROBE_SECONDS = float(os.getenv("AI_LOAD_PROBE_SECONDS", 10))
+    # Single /ai/detect events are scored directly, micro-batched in-process, or on a UNIX-socket sidecar.
+    AI_SCORING_SERVICE = os.getenv("AI_SCORING_SERVICE", "direct").lower()
+    AI_BATCH_MAX_ITEMS = int(os.getenv("AI_BATCH_MAX_ITEMS", 64))
+    AI_BATCH_MAX_WAIT_MS = float(os.getenv("AI_BATCH_MAX_WAIT_MS", 2))
+    AI_SCORING_SOCKET = os.getenv("AI_SCORING_SOCKET", os.path.join(BASE_DIR, "instance", "scoring.sock"))
+    # Processes that run preprocessing and model passes on the memory-mapped artifact (0 keeps them in-process).
+    AI_SCORING_WORKERS = int(os.getenv("AI_SCORING_WORKERS", 0))
+    AI_SCORING_CHUNK_ROWS = int(os.getenv("AI_SCORING_CHUNK_ROWS", 64))
+    # LLM insights are generated by background workers; requests beyond the queue size are dropped.
+    AI_INSIGHT_QUEUE_SIZE = int(os.getenv("AI_INSIGHT_QUEUE_SIZE", 100))
+    AI_INSIGHT_WORKERS = int(os.getenv("AI_INSIGHT_WORKERS", 2))
+    # Identical prompts reuse the cached insight; set a path to keep the cache across restarts.
+    AI_INSIGHT_CACHE_SIZE = int(os.getenv("AI_INSIGHT_CACHE_SIZE", 512))
+    AI_INSIGHT_CACHE_TTL_SECONDS = float(os.getenv("AI_INSIGHT_CACHE_TTL_SECONDS", 3600))
+    AI_INSIGHT_CACHE_PATH = os.getenv("AI_INSIGHT_CACHE_PATH", "")
+    # One shared LLM client: per-call timeout, capped concurrency and a circuit breaker.
+    AI_LLM_TIMEOUT_SECONDS = float(os.getenv("AI_LLM_TIMEOUT_SECONDS", 10))
+    AI_LLM_MAX_RETRIES = int(os.getenv("AI_LLM_MAX_RETRIES", 1))
+    AI_LLM_MAX_CONCURRENCY = int(os.getenv("AI_LLM_MAX_CONCURRENCY", 4))
+    AI_LLM_ACQUIRE_TIMEOUT_SECONDS = float(os.getenv("AI_LLM_ACQUIRE_TIMEOUT_SECONDS", 0.5))
+    AI_LLM_BREAKER_THRESHOLD = int(os.getenv("AI_LLM_BREAKER_THRESHOLD", 5))
+    AI_LLM_BREAKER_RESET_SECONDS = float(os.getenv("AI_LLM_BREAKER_RESET_SECONDS", 30))
 
     LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
 
@@ -88,3 +88,9 @@ def execute(query: str, params: tuple | dict | None = None) -> int:
     with get_cursor() as cur:
         cur.execute(query, params or ())
         return cur.rowcount
+
+
+def execute_many(query: str, rows: list[tuple]) -> int:
+    with get_cursor() as cur:
+        cur.executemany(query, rows)
+        return cur.rowcount
@@ -2,6 +2,8 @@
 CREATE DATABASE IF NOT EXISTS cyber_sentinel_db;
 USE cyber_sentinel_db;
 
+DROP TABLE IF EXISTS user_last_seen;
+DROP TABLE IF EXISTS user_profiles;
 DROP TABLE IF EXISTS notifications;
 DROP TABLE IF EXISTS files;
 DROP TABLE IF EXISTS user_files;
@@ -96,6 +98,28 @@ CREATE TABLE notifications (
     created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (user_id) REFERENCES users(id)
 );
+
+-- One compact behavioural baseline per user, maintained by the AI engine.
+CREATE TABLE user_profiles (
+    user_id INT PRIMARY KEY,
+    event_count INT NOT NULL DEFAULT 0,
+    snapshot BLOB NOT NULL,
+    updated_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (user_id) REFERENCES users(id),
+    -- Each flush reads back the profiles other workers changed since its previous one.
+    INDEX idx_user_profiles_updated_at (updated_at)
+);
+
+-- Last resolved location per user, used for impossible-travel checks.
+CREATE TABLE user_last_seen (
+    user_id INT PRIMARY KEY,
+    location VARCHAR(120) NOT NULL,
+    latitude DOUBLE NOT NULL,
+    longitude DOUBLE NOT NULL,
+    seen_at DATETIME NOT NULL,
+    FOREIGN KEY (user_id) REFERENCES users(id),
+    INDEX idx_user_last_seen_seen_at (seen_at)
+);
 INSERT INTO users (username, password_hash, full_name, role, department, is_active, last_login, created_at) VALUES
 ('admin', '$2b$12$F2hiR0YgJcGaNFqInlYJ7uHNB3cGv0oTPhSfKszYVSyWrtG9WnK8m', 'Aiden Hunt', 'admin', 'Security Operations', 1, '2025-01-08 09:12:00', '2025-11-01 08:00:00'),
 ('jdoe', '$2b$12$QXG8NwBnUv3YyoNuj66badZPntgd9YdJh7w7V7KHVUFThVj.dGgqe', 'Jordan Doe', 'user', 'Finance', 1, '2025-01-08 07:45:00', '2025-11-02 09:15:00'),
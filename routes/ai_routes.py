@@ -7,7 +7,9 @@ from typing import Iterable, Tuple
 from flask import Blueprint, current_app, jsonify, request, session
 
 from database.database import fetch_all, fetch_one
-from ai_engine.engine import generate_alert_insight
+from ai_engine import llm_client
+from ai_engine.engine import generate_alert_insight, insight_cache
+from ai_engine.reloadable import reload_all
 
 
 def _get_engine():
@@ -24,24 +26,107 @@ def detect_activity():
     if not session.get("user_id"):
         return {"error": "Authentication required"}, 401
     payload = request.get_json() or {}
+    if not isinstance(payload, dict):
+        return {"error": "Expected an activity object"}, 400
     payload.setdefault("user_id", session.get("user_id"))
     payload.setdefault("description", payload.get("event_type", "Manual scan"))
     engine = _get_engine()
     try:
-        result = engine.analyse_activity(payload)
+        result = engine.analyse_coalesced(payload, budget_ms=request.args.get("budget_ms", type=float))
     except RuntimeError as exc:
         return {"error": str(exc)}, 400
     return jsonify(result.as_dict())
 
 
+@ai_bp.route("/detect/batch", methods=["POST"])
+def detect_activity_batch():
+    if not session.get("user_id"):
+        return {"error": "Authentication required"}, 401
+    payload = request.get_json() or {}
+    events = payload if isinstance(payload, list) else payload.get("events") if isinstance(payload, dict) else None
+    if not isinstance(events, list) or not all(isinstance(event, dict) for event in events):
+        return {"error": "Expected a list of activity objects under 'events'"}, 400
+    max_batch = current_app.config.get("AI_MAX_BATCH_SIZE", 5000)
+    if len(events) > max_batch:
+        return {"error": f"Batch too large; at most {max_batch} events are accepted"}, 413
+    for event in events:
+        event.setdefault("user_id", session.get("user_id"))
+        event.setdefault("description", event.get("event_type", "Manual scan"))
+    engine = _get_engine()
+    try:
+        results = engine.analyse_batch(events, budget_ms=request.args.get("budget_ms", type=float))
+    except RuntimeError as exc:
+        return {"error": str(exc)}, 400
+    return jsonify({"count": len(results), "results": [result.as_dict() for result in results]})
+
+
 @ai_bp.route("/train", methods=["POST"])
 def train_models():
     if session.get("role") != "admin":
         return {"error": "Admin access required"}, 403
-    limit = int((request.get_json() or {}).get("limit", 500))
+    limit = int((request.get_json() or {}).get("limit") or current_app.config["AI_TRAINING_SAMPLE_SIZE"])
+    engine = _get_engine()
+    job = engine.start_training(limit=limit)
+    return {"status": job.status, "job_id": job.job_id, "limit": job.params.get("limit", limit)}, 202
+
+
+@ai_bp.route("/train/<job_id>", methods=["GET"])
+def training_status(job_id: str):
+    if session.get("role") != "admin":
+        return {"error": "Admin access required"}, 403
+    job = _get_engine().training_jobs.get(job_id)
+    if job is None:
+        return {"error": "Unknown training job"}, 404
+    return jsonify(job.as_dict())
+
+
+@ai_bp.route("/metrics", methods=["GET"])
+def engine_metrics():
+    if session.get("role") != "admin":
+        return {"error": "Admin access required"}, 403
     engine = _get_engine()
-    engine.warm_start(limit=limit)
-    return {"status": "trained", "limit": limit}
+    rules = engine.rules.current()
+    return jsonify(
+        {
+            "model_version": engine.model_version,
+            "calibration": engine.calibration_stats,
+            "scoring": {"mode": engine.scoring_mode, **engine.cascade.stats()},
+            "load": engine.load.stats(),
+            "micro_batching": {"service": engine.scoring_service, **engine.batcher.stats()},
+            "scoring_pool": engine.pool.stats() if engine.pool else None,
+            "rules": {"version": rules.version, "count": len(rules)},
+            "ip_reputation": engine.ip_reputation.current().stats(),
+            "user_agents": engine.user_agents.current().stats(),
+            "user_profiles": engine.profiles.stats(),
+            "rate_windows": engine.rates.stats(),
+            "travel": {**engine.travel.stats(), "locations": engine.locations.current().stats()},
+            "insight_queue": engine.insights.metrics(),
+            "insight_cache": insight_cache.stats(),
+            "llm_client": llm_client.client_stats(),
+        }
+    )
+
+
+@ai_bp.route("/rules/reload", methods=["POST"])
+def reload_rules():
+    if session.get("role") != "admin":
+        return {"error": "Admin access required"}, 403
+    engine = _get_engine()
+    try:
+        # All four are validated before any is swapped in, so a bad file leaves every one as it was.
+        rules, reputation, user_agents, locations = reload_all(
+            (engine.rules, engine.ip_reputation, engine.user_agents, engine.locations)
+        )
+    except ValueError as exc:
+        return {"error": f"Rules not reloaded: {exc}"}, 400
+    return {
+        "version": rules.version,
+        "count": len(rules),
+        "rules": list(rules.rule_ids),
+        "ip_reputation": reputation.stats(),
+        "user_agents": user_agents.stats(),
+        "locations": locations.stats(),
+    }
 
 
 @ai_bp.route("/activity-feed", methods=["GET"])
@@ -0,0 +1,98 @@
+"""Compare cascade scoring with the full model ensemble.
+
+Run from the repository root:
+
+    python -m scripts.bench_cascade --train-rows 5000 --events 20000 --batch 100
+
+Both modes score the same holdout through ``AIEngine.analyse_batch`` (nothing is persisted).
+The model stage, preprocessing included, is also timed on its own against the previous
+four passes (``decision_function`` and ``predict`` on both models). The report shows throughput,
+the stage that settled each event in cascade mode, how often the two modes agree on the
+risk level, and the levels each mode gives the seed scenarios.
+"""
+from __future__ import annotations
+
+import argparse
+import time
+from collections import Counter
+
+import numpy as np
+
+from ai_engine import engine as engine_module
+from ai_engine.bundle import train_bundle
+from ai_engine.scoring_pool import LocalScorer
+from scripts.seed_scenarios import detection_scenarios
+from scripts.synthetic_activity import generate_activity
+
+
+def _batches(events: list[dict], size: int):
+    for offset in range(0, len(events), size):
+        yield events[offset:offset + size]
+
+
+def _score(engine, events: list[dict], batch: int) -> tuple[list, float]:
+    started = time.perf_counter()
+    results = [result for chunk in _batches(events, batch) for result in engine.analyse_batch(chunk, persist=False)]
+    return results, time.perf_counter() - started
+
+
+def _four_passes(bundle, features) -> None:
+    for model in (bundle.isolation_forest, bundle.one_class_svm):
+        model.decision_scores(features)
+        model.model.predict(features)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--train-rows", type=int, default=5000)
+    parser.add_argument("--events", type=int, default=20_000)
+    parser.add_argument("--batch", type=int, default=100)
+    parser.add_argument("--users", type=int, default=200)
+    args = parser.parse_args()
+
+    logs = list(generate_activity(args.train_rows + args.events, users=args.users, seed=13))
+    bundle = train_bundle(logs[: args.train_rows])
+    holdout = logs[args.train_rows :]
+    print(f"Trained on {args.train_rows:,} rows; scoring {len(holdout):,} events in batches of {args.batch}")
+
+    engine = engine_module.AIEngine()
+    engine._bundle = bundle
+    levels = {}
+    for mode in ("ensemble", "cascade"):
+        engine.scoring_mode = mode
+        engine.cascade = engine_module.CascadeCounters()
+        results, seconds = _score(engine, holdout, args.batch)
+        levels[mode] = [result.risk_level for result in results]
+        stats = engine.cascade.stats()
+        scenario_levels = [result.risk_level for result in engine.analyse_batch(detection_scenarios(), persist=False)]
+
+        model_seconds = 0.0
+        for chunk in _batches(holdout, args.batch):
+            rules = engine.rules.current().evaluate(engine._event_columns(chunk)).scores
+            started = time.perf_counter()
+            engine._model_scores(bundle, LocalScorer(bundle, chunk), rules)
+            model_seconds += time.perf_counter() - started
+
+        print(f"\n{mode}: {len(holdout) / seconds:,.0f} events/s end to end, model stage {model_seconds:.2f}s")
+        print(f"  levels {dict(sorted(Counter(levels[mode]).items()))}")
+        print(f"  seed scenarios {scenario_levels}")
+        if mode == "cascade":
+            print(f"  settled by {stats['stages']} (SVM skipped for {stats['svm_skip_rate']:.1%})")
+
+    legacy_seconds = 0.0
+    for chunk in _batches(holdout, args.batch):
+        started = time.perf_counter()
+        _four_passes(bundle, bundle.preprocessor.transform(chunk))
+        legacy_seconds += time.perf_counter() - started
+    print(f"\nPrevious four model passes: {legacy_seconds:.2f}s")
+
+    agreement = np.mean([a == b for a, b in zip(levels["ensemble"], levels["cascade"])])
+    alerting = {"medium", "high", "critical"}
+    ensemble_alerts = {index for index, level in enumerate(levels["ensemble"]) if level in alerting}
+    cascade_alerts = {index for index, level in enumerate(levels["cascade"]) if level in alerting}
+    kept = len(ensemble_alerts & cascade_alerts) / len(ensemble_alerts) if ensemble_alerts else 1.0
+    print(f"Risk-level agreement {agreement:.1%}; cascade keeps {kept:.1%} of the ensemble's alerts")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Compare sklearn and flattened-array Isolation Forest scoring.
+
+Run from the repository root:
+
+    python -m scripts.bench_flat_forest --batches 1 100 10000
+
+An Isolation Forest is fitted on preprocessed synthetic activity, flattened with
+``FlatForest.from_sklearn`` and both are timed on the same batches of unseen events. The
+report shows milliseconds per call, the largest absolute difference between the decision
+values and whether the anomaly votes agree on every row. ``IsolationForestModel`` only
+takes the flat path up to ``FLAT_MAX_ROWS`` rows.
+"""
+from __future__ import annotations
+
+import argparse
+import time
+
+import numpy as np
+
+from ai_engine.bundle import build_preprocessor
+from ai_engine.flat_forest import FlatForest
+from ai_engine.isolation_forest import FLAT_MAX_ROWS, IsolationForestModel
+from scripts.synthetic_activity import generate_activity
+
+
+def _per_call_ms(score, features, repeats: int) -> float:
+    score(features)
+    started = time.perf_counter()
+    for _ in range(repeats):
+        score(features)
+    return (time.perf_counter() - started) / repeats * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--train-rows", type=int, default=5000)
+    parser.add_argument("--batches", type=int, nargs="+", default=[1, 100, 10_000])
+    parser.add_argument("--repeats", type=int, default=200, help="calls per batch size, scaled down for large batches")
+    args = parser.parse_args()
+
+    logs = list(generate_activity(args.train_rows + max(args.batches), users=500, seed=43))
+    preprocessor = build_preprocessor()
+    training = preprocessor.fit(logs[: args.train_rows])
+    events = preprocessor.transform(logs[args.train_rows :])
+    model = IsolationForestModel()
+    model.fit(training)
+    forest = model.model
+    started = time.perf_counter()
+    flat = FlatForest.from_sklearn(forest)
+    flatten_ms = (time.perf_counter() - started) * 1000
+    print(
+        f"{len(forest.estimators_)} trees, depth {flat.max_depth}, {len(flat.columns)} of {flat.n_features} columns split on; "
+        f"flattened in {flatten_ms:.1f} ms to {flat.nbytes / 1024:,.0f} KiB; model flat path up to {FLAT_MAX_ROWS:,} rows"
+    )
+
+    print(f"\n{'batch':>7} {'sklearn ms':>11} {'flat ms':>9} {'speed-up':>9} {'max |diff|':>11} {'votes agree':>12}")
+    for batch in args.batches:
+        features = events[:batch]
+        repeats = max(3, args.repeats * 100 // max(batch, 100))
+        reference = forest.decision_function(features)
+        scores = flat.decision_function(features)
+        votes_agree = bool(((scores < 0) == (forest.predict(features) == -1)).all())
+        sklearn_ms = _per_call_ms(forest.decision_function, features, repeats)
+        flat_ms = _per_call_ms(flat.decision_function, features, repeats)
+        print(
+            f"{batch:>7,} {sklearn_ms:>11.3f} {flat_ms:>9.3f} {sklearn_ms / flat_ms:>8.1f}x "
+            f"{np.abs(scores - reference).max():>11.2e} {str(votes_agree):>12}"
+        )
+
+
+if __name__ == "__main__":
+    main()
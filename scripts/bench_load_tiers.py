@@ -0,0 +1,79 @@
+"""Measure scoring latency during a burst with and without load-adaptive tiers.
+
+Run from the repository root:
+
+    python -m scripts.bench_load_tiers --clients 48 --seconds 5 --batch 20 --budget-ms 50
+
+``--clients`` threads call ``AIEngine.analyse_batch`` back to back (nothing is persisted),
+first with every degradation step disabled and then with the configured in-flight limits
+and ``--budget-ms``. The report shows throughput, p50/p99 call latency and the tiers used.
+"""
+from __future__ import annotations
+
+import argparse
+import threading
+import time
+
+import numpy as np
+
+from ai_engine import engine as engine_module
+from ai_engine.bundle import train_bundle
+from ai_engine.load_shedding import LoadGovernor
+from config import Config
+from scripts.synthetic_activity import generate_activity
+
+
+def _burst(engine, events: list[dict], clients: int, seconds: float, batch: int, budget_ms: float | None) -> list[float]:
+    latencies: list[float] = []
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def client(offset: int) -> None:
+        local = []
+        while time.perf_counter() < deadline:
+            chunk = events[offset:offset + batch]
+            offset = (offset + batch) % (len(events) - batch)
+            started = time.perf_counter()
+            engine.analyse_batch(chunk, persist=False, budget_ms=budget_ms)
+            local.append(time.perf_counter() - started)
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=client, args=(index * batch,)) for index in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--train-rows", type=int, default=5000)
+    parser.add_argument("--clients", type=int, default=48)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--batch", type=int, default=20)
+    parser.add_argument("--budget-ms", type=float, default=50.0)
+    args = parser.parse_args()
+
+    logs = list(generate_activity(args.train_rows + 20_000, users=200, seed=17))
+    engine = engine_module.AIEngine()
+    engine._bundle = train_bundle(logs[: args.train_rows])
+    events = logs[args.train_rows :]
+    limits = (Config.AI_LOAD_NO_LLM_IN_FLIGHT, Config.AI_LOAD_NO_SVM_IN_FLIGHT, Config.AI_LOAD_HEURISTICS_ONLY_IN_FLIGHT)
+    print(f"{args.clients} clients, {args.batch}-event calls for {args.seconds:.0f}s each run")
+
+    for label, governor, budget in (
+        ("full pipeline only", LoadGovernor((0, 0, 0), insight_depth_limit=0), None),
+        (f"adaptive tiers, limits {limits}, budget {args.budget_ms:.0f}ms", LoadGovernor(limits), args.budget_ms),
+    ):
+        engine.load = governor
+        latencies = np.array(_burst(engine, events, args.clients, args.seconds, args.batch, budget)) * 1000
+        p50, p99 = np.percentile(latencies, [50, 99])
+        print(f"\n{label}")
+        print(f"  {len(latencies) * args.batch / args.seconds:,.0f} events/s, p50 {p50:.1f}ms, p99 {p99:.1f}ms")
+        print(f"  tiers {governor.stats()['tiers']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Measure per-user device/IP membership memory and speed at fleet scale.
+
+Run from the repository root:
+
+    python -m scripts.bench_membership --users 50000
+
+Builds the profile store in one streaming pass over synthetic history, then reports the
+lookup rate of ``ProfileStore.signals``, the measured false-positive rate of the "first
+seen" check and the memory per user: snapshot size, and heap use of the whole profile
+versus plain Python sets of the same device/IP strings (traced on ``--memory-users``
+users, since tracing slows the build several times over).
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import time
+import tracemalloc
+
+from ai_engine.user_profiles import ProfileStore
+from config import Config
+
+
+def _history(users: int, devices: int, ips: int, rng: random.Random):
+    for user_id in range(1, users + 1):
+        for index in range(devices + ips):
+            yield {
+                "user_id": user_id,
+                "device": f"dev-{user_id}-{index % devices}",
+                "source_ip": f"10.{user_id % 250}.{index}.{user_id % 199}",
+                "bytes_transferred": rng.randrange(1, 50_000_000),
+                "files_accessed": rng.randrange(0, 40),
+                "session_duration": rng.randrange(60, 28_800),
+                "timestamp": f"2025-01-08 {rng.randrange(24):02d}:00:00",
+            }
+
+
+def _build(users: int, devices: int, ips: int, seed: int) -> tuple[ProfileStore, int]:
+    store = ProfileStore(
+        membership_capacity=Config.AI_MEMBERSHIP_CAPACITY,
+        membership_error_rate=Config.AI_MEMBERSHIP_ERROR_RATE,
+    )
+    events = 0
+    chunk: list[dict] = []
+    for event in _history(users, devices, ips, random.Random(seed)):
+        chunk.append(event)
+        if len(chunk) == 5000:
+            store.observe_many(chunk)
+            events += len(chunk)
+            chunk = []
+    store.observe_many(chunk)
+    return store, events + len(chunk)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=50_000)
+    parser.add_argument("--devices", type=int, default=3, help="distinct devices per user")
+    parser.add_argument("--ips", type=int, default=12, help="distinct source IPs per user")
+    parser.add_argument("--memory-users", type=int, default=5_000, help="users traced for heap use")
+    parser.add_argument("--probes", type=int, default=100_000, help="unseen devices used to measure false positives")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    started = time.perf_counter()
+    store, events = _build(args.users, args.devices, args.ips, args.seed)
+    build_seconds = time.perf_counter() - started
+
+    traced_users = min(args.memory_users, args.users)
+    tracemalloc.start()
+    traced, _ = _build(traced_users, args.devices, args.ips, args.seed)
+    store_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del traced
+    tracemalloc.start()
+    plain = {}
+    for event in _history(traced_users, args.devices, args.ips, random.Random(args.seed)):
+        sets = plain.setdefault(event["user_id"], (set(), set()))
+        sets[0].add(event["device"].lower())
+        sets[1].add(event["source_ip"])
+    plain_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del plain
+
+    probes = [{"user_id": rng.randrange(1, args.users + 1), "device": f"unseen-{n}"} for n in range(args.probes)]
+    started = time.perf_counter()
+    signals = store.signals(probes)
+    lookup_seconds = time.perf_counter() - started
+    false_positive_rate = 1.0 - signals["new_device"].mean()
+
+    stats = store.stats()
+    print(f"Users: {stats['users']:,}  events: {events:,}  build: {build_seconds:.2f}s ({events / build_seconds:,.0f} events/s)")
+    print(
+        f"Filters: capacity {store.membership_capacity} at {store.membership_error_rate:.2%}, "
+        f"snapshot {stats['snapshot_bytes'] / stats['users']:.0f} bytes/user, "
+        f"{stats['snapshot_bytes'] / 1024**2:.1f} MiB in total"
+    )
+    print(
+        f"Heap per user: whole profile {store_bytes / traced_users:,.0f} bytes "
+        f"(~{store_bytes / traced_users * args.users / 1024**2:.0f} MiB for {args.users:,} users); "
+        f"plain device/IP string sets alone {plain_bytes / traced_users:,.0f} bytes"
+    )
+    print(
+        f"Lookups: {len(probes) / lookup_seconds:,.0f} events/s through ProfileStore.signals; "
+        f"measured false-positive rate {false_positive_rate:.3%}"
+    )
+
+
+if __name__ == "__main__":
+    main()
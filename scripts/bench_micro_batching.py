@@ -0,0 +1,120 @@
+"""Compare per-request scoring with micro-batching under concurrent single-event clients.
+
+Run from the repository root:
+
+    python -m scripts.bench_micro_batching --clients 64 --requests 100
+
+``--clients`` threads each send ``--requests`` single events, one at a time:
+
+* ``per-request``: every thread calls ``AIEngine.analyse_activity`` itself;
+* ``in-process``: threads submit to a ``MicroBatcher`` in front of ``analyse_batch``;
+* ``sidecar``: threads use ``ScoringClient`` against a ``ScoringServer`` in a child process.
+
+Nothing is persisted and load shedding is disabled, so every event gets the full
+pipeline. The report shows throughput, p50/p99 request latency and the mean batch size.
+"""
+from __future__ import annotations
+
+import argparse
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+from ai_engine.load_shedding import LoadGovernor
+from ai_engine.micro_batcher import MicroBatcher
+from ai_engine.scoring_service import ScoringClient, ScoringServer
+from scripts.synthetic_activity import generate_activity
+
+
+def _engine(train_rows: int):
+    from ai_engine.bundle import train_bundle
+    from ai_engine.engine import AIEngine
+
+    engine = AIEngine()
+    engine._bundle = train_bundle(list(generate_activity(train_rows, users=200, seed=19)))
+    engine.load = LoadGovernor((0, 0, 0), insight_depth_limit=0)
+    return engine
+
+
+def _batcher(engine, max_items: int, max_wait_ms: float) -> MicroBatcher:
+    return MicroBatcher(
+        lambda items: engine.analyse_batch([event for event, _ in items], persist=False), max_items, max_wait_ms
+    )
+
+
+def _serve(path: str, train_rows: int, max_items: int, max_wait_ms: float, ready) -> None:
+    server = ScoringServer(path, _batcher(_engine(train_rows), max_items, max_wait_ms))
+    ready.set()
+    server.serve_forever()
+
+
+def _run(score, events: list[dict], clients: int, requests: int) -> tuple[float, np.ndarray]:
+    latencies: list[float] = []
+    lock = threading.Lock()
+
+    def client(index: int) -> None:
+        local = []
+        for offset in range(requests):
+            event = events[(index * requests + offset) % len(events)]
+            started = time.perf_counter()
+            score(event)
+            local.append(time.perf_counter() - started)
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=client, args=(index,)) for index in range(clients)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - started, np.array(latencies) * 1000
+
+
+def _report(label: str, elapsed: float, latencies: np.ndarray, batch: str = "") -> None:
+    p50, p99 = np.percentile(latencies, [50, 99])
+    print(f"{label:<12} {len(latencies) / elapsed:>9,.0f} events/s  p50 {p50:>7.2f}ms  p99 {p99:>7.2f}ms  {batch}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--train-rows", type=int, default=5000)
+    parser.add_argument("--clients", type=int, default=64)
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--max-items", type=int, default=64)
+    parser.add_argument("--max-wait-ms", type=float, default=2.0)
+    args = parser.parse_args()
+
+    events = list(generate_activity(20_000, users=200, seed=23))
+    engine = _engine(args.train_rows)
+    print(f"{args.clients} clients x {args.requests} single-event requests; window {args.max_items} events / {args.max_wait_ms}ms")
+
+    elapsed, latencies = _run(lambda event: engine.analyse_activity(event, persist=False), events, args.clients, args.requests)
+    _report("per-request", elapsed, latencies)
+
+    batcher = _batcher(engine, args.max_items, args.max_wait_ms)
+    elapsed, latencies = _run(batcher.submit, [(event, None) for event in events], args.clients, args.requests)
+    _report("in-process", elapsed, latencies, f"avg batch {batcher.stats()['avg_batch']}")
+
+    path = os.path.join(tempfile.mkdtemp(prefix="scoring-"), "scoring.sock")
+    context = multiprocessing.get_context("spawn")
+    ready = context.Event()
+    sidecar = context.Process(target=_serve, args=(path, args.train_rows, args.max_items, args.max_wait_ms, ready), daemon=True)
+    sidecar.start()
+    try:
+        if not ready.wait(600):
+            raise RuntimeError("Scoring sidecar did not start")
+        client = ScoringClient(path)
+        elapsed, latencies = _run(client.score, events, args.clients, args.requests)
+        _report("sidecar", elapsed, latencies)
+    finally:
+        sidecar.terminate()
+        sidecar.join()
+
+
+if __name__ == "__main__":
+    main()
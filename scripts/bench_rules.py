@@ -0,0 +1,117 @@
+"""Measure heuristic rule throughput with a large generated rule file.
+
+Run from the repository root:
+
+    python -m scripts.bench_rules --rules 150 --events 100000
+
+The default rules are extended with ``--rules`` generated rules over every event column and
+operator. The report separates column extraction (including the IP reputation and
+user-agent lookups) from rule evaluation and compares a
+single large batch against scoring events one at a time.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import time
+
+from ai_engine.ip_reputation import IPReputation
+from ai_engine.rule_engine import EVENT_COLUMNS, NUMBER, EventColumns, RuleSet
+from ai_engine.user_agents import UserAgentClassifier
+from config import Config
+from scripts.synthetic_activity import generate_activity
+
+TEXT_SAMPLES = {
+    "event_type": ["mass", "copy", "download", "upload", "login", "delete", "export", "share"],
+    "description": ["privilege", "escalation", "export", "bulk", "remote", "script", "archive"],
+    "user_agent": ["python", "curl", "wget", "powershell", "rclone", "go-http", "java", "okhttp"],
+    "source_ip": ["10.0.", "10.1.", "172.16.", "192.168.", "198.51.", "203.0.113.", "100.64."],
+    "device": ["vm", "surface", "macbook", "automation", "kiosk", "build"],
+    "location": ["remote", "nyc", "london", "vpn", "unknown"],
+}
+NUMBER_RANGES = {
+    "hour": (0, 23),
+    "day_of_week": (0, 6),
+    "bytes_transferred": (0, 4 * 1024**3),
+    "files_accessed": (0, 500),
+    "failed_attempts": (0, 10),
+    "session_duration": (0, 28_800),
+}
+
+
+def _generated_rule(index: int, rng: random.Random) -> dict:
+    def leaf() -> dict:
+        field = rng.choice(sorted(EVENT_COLUMNS))
+        if EVENT_COLUMNS[field] == NUMBER:
+            low, high = NUMBER_RANGES[field]
+            return {"field": field, "op": rng.choice(["lt", "lte", "gt", "gte"]), "value": rng.uniform(low, high)}
+        op = rng.choice(["contains", "startswith", "endswith", "eq", "in"])
+        if op == "in":
+            return {"field": field, "op": op, "value": rng.sample(TEXT_SAMPLES[field], 3)}
+        return {"field": field, "op": op, "value": rng.choice(TEXT_SAMPLES[field])}
+
+    combinator = rng.choice(["any", "all"])
+    return {
+        "id": f"generated_{index:04d}",
+        "score": round(rng.uniform(0.3, 0.9), 2),
+        "when": {combinator: [leaf() for _ in range(rng.randint(1, 4))]},
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rules", type=int, default=150, help="generated rules added to the defaults")
+    parser.add_argument("--events", type=int, default=100_000)
+    parser.add_argument("--single-events", type=int, default=2_000, help="events scored one at a time")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    with open(Config.AI_RULES_PATH, encoding="utf-8") as handle:
+        payload = json.load(handle)
+    payload["rules"] += [_generated_rule(index, rng) for index in range(args.rules)]
+
+    started = time.perf_counter()
+    rules = RuleSet.from_dict(payload)
+    compile_seconds = time.perf_counter() - started
+    events = list(generate_activity(args.events, users=500, distinct_ips=2000, seed=args.seed))
+    reputation = IPReputation.from_files(Config.AI_IP_BLOCKLIST_PATH, Config.AI_IP_ALLOWLIST_PATH)
+    user_agents = UserAgentClassifier.from_file(Config.AI_USER_AGENTS_PATH)
+
+    def build_columns(batch: list[dict]) -> EventColumns:
+        columns = EventColumns.from_events(batch)
+        derived = {
+            **reputation.flag_columns(event.get("source_ip") for event in batch),
+            **user_agents.columns(event.get("user_agent") for event in batch),
+        }
+        for name, values in derived.items():
+            columns.add(name, values)
+        return columns
+
+    started = time.perf_counter()
+    columns = build_columns(events)
+    column_seconds = time.perf_counter() - started
+    started = time.perf_counter()
+    matches = rules.evaluate(columns)
+    evaluate_seconds = time.perf_counter() - started
+
+    single = events[: args.single_events]
+    started = time.perf_counter()
+    for event in single:
+        rules.evaluate(build_columns([event]))
+    single_seconds = time.perf_counter() - started
+
+    batch_seconds = column_seconds + evaluate_seconds
+    print(f"Rules: {len(rules)} ({len(payload['rules']) - args.rules} default)  compile: {compile_seconds * 1000:.1f}ms")
+    print(f"Events: {len(events)}  events with a fired rule: {int(matches.fired.any(axis=1).sum())}")
+    print(f"Column extraction and lookups: {column_seconds:.3f}s  rule evaluation: {evaluate_seconds:.3f}s")
+    print(
+        f"Batch throughput: {len(events) / batch_seconds:,.0f} events/s, "
+        f"{len(events) * len(rules) / evaluate_seconds:,.0f} rule evaluations/s"
+    )
+    print(f"One event at a time: {len(single) / single_seconds:,.0f} events/s ({single_seconds / len(single) * 1e6:.0f}us per event)")
+
+
+if __name__ == "__main__":
+    main()
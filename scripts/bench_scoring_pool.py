@@ -0,0 +1,87 @@
+"""Measure process-pool scoring throughput and per-worker memory.
+
+Run from the repository root:
+
+    python -m scripts.bench_scoring_pool --workers 1 2 4 --events 40000 --batch 2000
+
+A bundle is trained on synthetic activity and saved as an artifact in a temporary model
+directory. Each pool size then scores the same events with both models (one task per
+chunk), after a warm-up
+that makes every worker map the artifact. The report compares throughput with in-process
+scoring and shows each worker's resident memory split into private pages and file-backed
+pages, which are the memory-mapped artifact arrays shared between workers.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from ai_engine import model_store
+from ai_engine.bundle import artifact_schema, train_bundle
+from ai_engine.cascade import SvmPlan
+from ai_engine.scoring_pool import LocalScorer, ScoringPool
+from scripts.synthetic_activity import generate_activity
+
+
+def _resident_kb(pid: int) -> tuple[int, int]:
+    """(private, file-backed) resident kilobytes from ``/proc/<pid>/status``."""
+    usage = {}
+    with open(f"/proc/{pid}/status", encoding="ascii") as handle:
+        for line in handle:
+            key, _, value = line.partition(":")
+            if key in ("RssAnon", "RssFile"):
+                usage[key] = int(value.split()[0])
+    return usage.get("RssAnon", 0), usage.get("RssFile", 0)
+
+
+def _score_all(score, events: list[dict], batch: int) -> float:
+    started = time.perf_counter()
+    for offset in range(0, len(events), batch):
+        chunk = events[offset:offset + batch]
+        score(chunk, SvmPlan("all"), np.zeros(len(chunk)))
+    return time.perf_counter() - started
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--train-rows", type=int, default=5000)
+    parser.add_argument("--events", type=int, default=40_000)
+    parser.add_argument("--batch", type=int, default=2000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    args = parser.parse_args()
+
+    logs = list(generate_activity(args.train_rows + args.events, users=500, seed=29))
+    bundle = train_bundle(logs[: args.train_rows])
+    events = logs[args.train_rows :]
+    model_dir = tempfile.mkdtemp(prefix="scoring-pool-")
+    version = model_store.save_artifact(model_dir, bundle.components(), artifact_schema(), bundle.training_rows)
+    artifact_kb = os.path.getsize(os.path.join(model_dir, version, model_store.BUNDLE_FILE)) // 1024
+    print(f"{os.cpu_count()} CPUs; artifact {artifact_kb:,} KiB; {len(events):,} events in batches of {args.batch:,}")
+
+    local = _score_all(lambda chunk, plan, rules: LocalScorer(bundle, chunk).scores(plan, rules), events, args.batch)
+    print(f"\nin-process     {len(events) / local:>9,.0f} events/s")
+
+    for workers in args.workers:
+        pool = ScoringPool(model_dir, workers, min_chunk_rows=max(1, args.batch // workers))
+        try:
+            for _ in range(3):
+                pool.map_scores(version, events[: args.batch], SvmPlan("none"), np.zeros(args.batch))
+            elapsed = _score_all(lambda chunk, plan, rules: pool.map_scores(version, chunk, plan, rules), events, args.batch)
+            memory = [_resident_kb(pid) for pid in pool.worker_pids()]
+            private = sum(kb for kb, _ in memory) / len(memory)
+            shared = sum(kb for _, kb in memory) / len(memory)
+            print(
+                f"{workers} worker(s)    {len(events) / elapsed:>9,.0f} events/s ({local / elapsed:.2f}x in-process); "
+                f"per worker {private / 1024:,.1f} MiB private + {shared / 1024:,.1f} MiB file-backed; "
+                f"artifact loads {pool.stats()['artifact_loads']}"
+            )
+        finally:
+            pool.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Compare memory and fit time of dense versus sparse (CSR) feature matrices.
+
+Run from the repository root:
+
+    python -m scripts.bench_sparse_features --sizes 10000 100000 1000000
+
+The exact One-Class SVM scales super-quadratically, so it is only fitted up to
+``--svm-max-rows``; dense runs are skipped when the matrix would exceed ``--max-dense-gb``.
+"""
+from __future__ import annotations
+
+import argparse
+import time
+import tracemalloc
+
+from ai_engine.data_preprocessor import DataPreprocessor
+from ai_engine.isolation_forest import IsolationForestModel
+from ai_engine.one_class_svm import OneClassSVMModel
+from scripts.synthetic_activity import generate_activity
+
+
+def _matrix_bytes(matrix) -> int:
+    if hasattr(matrix, "indptr"):
+        return matrix.data.nbytes + matrix.indices.nbytes + matrix.indptr.nbytes
+    return matrix.nbytes
+
+
+def _run(logs: list[dict], sparse: bool, fit_svm: bool) -> dict:
+    tracemalloc.start()
+    started = time.perf_counter()
+    preprocessor = DataPreprocessor(sparse=sparse)
+    features = preprocessor.fit(logs)
+    encode_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    IsolationForestModel().fit(features)
+    iforest_seconds = time.perf_counter() - started
+
+    svm_seconds = None
+    if fit_svm:
+        started = time.perf_counter()
+        OneClassSVMModel().fit(features)
+        svm_seconds = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "width": len(preprocessor.fitted_columns or []),
+        "matrix_mb": _matrix_bytes(features) / 2**20,
+        "peak_mb": peak / 2**20,
+        "encode_s": encode_seconds,
+        "iforest_s": iforest_seconds,
+        "svm_s": svm_seconds,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--svm-max-rows", type=int, default=10_000)
+    parser.add_argument("--max-dense-gb", type=float, default=4.0)
+    args = parser.parse_args()
+
+    header = f"{'rows':>9} {'mode':>6} {'width':>8} {'matrix MB':>10} {'peak MB':>9} {'encode s':>9} {'IF fit s':>9} {'SVM fit s':>10}"
+    print(header)
+    print("-" * len(header))
+    for size in args.sizes:
+        logs = list(generate_activity(size))
+        for sparse in (False, True):
+            mode = "sparse" if sparse else "dense"
+            if not sparse:
+                width = 6 + sum(len({str(log[field]) for log in logs}) for field in ("event_type", "source_ip", "device", "location"))
+                if size * width * 8 > args.max_dense_gb * 2**30:
+                    print(f"{size:>9} {mode:>6} {width:>8} {'skipped: dense matrix exceeds --max-dense-gb':>50}")
+                    continue
+            row = _run(logs, sparse, fit_svm=size <= args.svm_max_rows)
+            svm = f"{row['svm_s']:.2f}" if row["svm_s"] is not None else "-"
+            print(
+                f"{size:>9} {mode:>6} {row['width']:>8} {row['matrix_mb']:>10.1f} {row['peak_mb']:>9.1f} "
+                f"{row['encode_s']:>9.2f} {row['iforest_s']:>9.2f} {svm:>10}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""Compare the exact and approximate One-Class SVM backends on the seed scenarios.
+
+Run from the repository root:
+
+    python -m scripts.compare_svm_backends --synthetic-rows 2000 --scale-rows 200000
+
+Both backends are trained on the same baseline (the rows ``seed_scenarios`` inserts plus
+synthetic normal traffic). The report shows per-scenario decisions, anomaly-flag agreement
+and rank correlation on a holdout set, then fit/score timings of the approximate backend
+at ``--scale-rows`` rows, where the exact solver is impractical.
+"""
+from __future__ import annotations
+
+import argparse
+import time
+from datetime import datetime
+
+import numpy as np
+from scipy.stats import spearmanr
+
+from ai_engine.bundle import build_preprocessor
+from ai_engine.one_class_svm import OneClassSVMModel
+from scripts.seed_scenarios import USERS, baseline_activity, detection_scenarios
+from scripts.synthetic_activity import generate_activity
+
+
+def _seed_baseline() -> list[dict]:
+    user_ids = {user["username"]: index for index, user in enumerate(USERS, start=1)}
+    rows = []
+    for entry in baseline_activity(datetime.utcnow().replace(minute=0, second=0, microsecond=0)):
+        row = {key: value for key, value in entry.items() if key != "username"}
+        row["user_id"] = user_ids[entry["username"]]
+        rows.append(row)
+    return rows
+
+
+def _fit(backend: str, features, components: int) -> tuple[OneClassSVMModel, float]:
+    model = OneClassSVMModel(backend=backend, n_components=components)
+    started = time.perf_counter()
+    model.fit(features)
+    return model, time.perf_counter() - started
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--synthetic-rows", type=int, default=2000)
+    parser.add_argument("--holdout-rows", type=int, default=1000)
+    parser.add_argument("--scale-rows", type=int, default=200_000)
+    parser.add_argument("--components", type=int, default=300)
+    args = parser.parse_args()
+
+    synthetic = list(generate_activity(args.synthetic_rows + args.holdout_rows, users=50, distinct_ips=200))
+    baseline = _seed_baseline() + synthetic[: args.synthetic_rows]
+    holdout = synthetic[args.synthetic_rows :]
+    scenarios = detection_scenarios()
+
+    preprocessor = build_preprocessor()
+    features = preprocessor.fit(baseline)
+    exact, exact_seconds = _fit("exact", features, args.components)
+    approx, approx_seconds = _fit("approx", features, args.components)
+    print(f"Baseline rows: {len(baseline)}  exact fit: {exact_seconds:.2f}s  approx fit: {approx_seconds:.2f}s")
+
+    print("\nSeed scenarios")
+    scenario_features = preprocessor.transform(scenarios)
+    exact_scores = exact.decision_scores(scenario_features)
+    approx_scores = approx.decision_scores(scenario_features)
+    exact_flags = exact.anomaly_flags(scenario_features)
+    approx_flags = approx.anomaly_flags(scenario_features)
+    for index, scenario in enumerate(scenarios):
+        agree = "agree" if exact_flags[index] == approx_flags[index] else "DISAGREE"
+        print(
+            f"  {scenario['event_type']:<20} exact={exact_scores[index]:>10.4f} ({exact_flags[index]}) "
+            f"approx={approx_scores[index]:>10.4f} ({approx_flags[index]})  {agree}"
+        )
+
+    holdout_features = preprocessor.transform(scenarios + holdout)
+    exact_holdout = exact.decision_scores(holdout_features)
+    approx_holdout = approx.decision_scores(holdout_features)
+    agreement = float(np.mean(exact.anomaly_flags(holdout_features) == approx.anomaly_flags(holdout_features)))
+    correlation = spearmanr(exact_holdout, approx_holdout).statistic
+    decile = max(1, holdout_features.shape[0] // 10)
+    overlap = len(set(np.argsort(exact_holdout)[:decile]) & set(np.argsort(approx_holdout)[:decile])) / decile
+    print(
+        f"\nHoldout ({holdout_features.shape[0]} rows): flag agreement {agreement:.1%}, "
+        f"most-anomalous decile overlap {overlap:.1%}, Spearman rho {correlation:.3f}"
+    )
+
+    if args.scale_rows:
+        large = list(generate_activity(args.scale_rows, seed=11))
+        scale_preprocessor = build_preprocessor()
+        large_features = scale_preprocessor.fit(large)
+        model, seconds = _fit("approx", large_features, args.components)
+        single = scale_preprocessor.transform(large[:1])
+        started = time.perf_counter()
+        for _ in range(200):
+            model.decision_scores(single)
+        per_event = (time.perf_counter() - started) / 200
+        print(f"\nApprox backend at {args.scale_rows} rows: fit {seconds:.2f}s, single-event score {per_event * 1e6:.0f}us")
+
+
+if __name__ == "__main__":
+    main()
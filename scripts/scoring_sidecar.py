@@ -0,0 +1,45 @@
+"""Run the micro-batching scoring sidecar on a UNIX socket.
+
+Run from the repository root, next to the web app:
+
+    python -m scripts.scoring_sidecar --socket instance/scoring.sock
+
+The sidecar builds the same Flask app (database, models, rules) and serves
+``AIEngine.analyse_batch`` through a ``MicroBatcher`` sized by ``AI_BATCH_MAX_ITEMS`` and
+``AI_BATCH_MAX_WAIT_MS``. Web workers started with ``AI_SCORING_SERVICE=sidecar`` send
+single ``/ai/detect`` events to it and fall back to in-process scoring if it is down.
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+
+from config import Config
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--socket", default=Config.AI_SCORING_SOCKET)
+    args = parser.parse_args()
+
+    from ai_engine.scoring_service import ScoringServer
+    from app import app
+
+    engine = app.extensions["ai_engine"]
+    server = ScoringServer(args.socket, engine.batcher)
+    logging.getLogger(__name__).info(
+        "Scoring sidecar listening on %s (batches of up to %s events, %sms window)",
+        args.socket,
+        engine.batcher.max_items,
+        engine.batcher.max_wait_ms,
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
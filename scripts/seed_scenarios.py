@@ -7,7 +7,6 @@ from typing import Dict, Iterable
 import mysql.connector
 from dotenv import load_dotenv
 
-from app import create_app
 from config import Config
 from services.auth_service import hash_password
 from ai_engine.engine import AIEngine
@@ -74,8 +73,8 @@ def _activity_exists(cursor, user_id: int, event_type: str, timestamp: datetime)
     return cursor.fetchone() is not None
 
 
-def _seed_activity_logs(cursor, user_ids: Dict[str, int]) -> None:
-    now = datetime.utcnow().replace(minute=0, second=0, microsecond=0)
+def baseline_activity(now: datetime) -> list[dict]:
+    """Return the seeded ``activity_logs`` rows, keyed by username rather than user id."""
     scenarios = [
         {
             "username": "ssmith",
@@ -210,7 +209,12 @@ def _seed_activity_logs(cursor, user_ids: Dict[str, int]) -> None:
         "timestamp": now + timedelta(days=7),
     }
 
-    for entry in list(scenarios) + list(normals) + list(normals_2) + list(normals_3) + [future_activity]:
+    return list(scenarios) + list(normals) + list(normals_2) + list(normals_3) + [future_activity]
+
+
+def _seed_activity_logs(cursor, user_ids: Dict[str, int]) -> None:
+    now = datetime.utcnow().replace(minute=0, second=0, microsecond=0)
+    for entry in baseline_activity(now):
         user_id = user_ids[entry["username"]]
         if _activity_exists(cursor, user_id, entry["event_type"], entry["timestamp"]):
             continue
@@ -236,42 +240,50 @@ def _seed_activity_logs(cursor, user_ids: Dict[str, int]) -> None:
         )
 
 
+def detection_scenarios() -> list[dict]:
+    """Return the suspicious events that seeding expects the engine to alert on."""
+    return [
+        {
+            "user_id": 3,
+            "event_type": "late_night_login",
+            "timestamp": datetime.utcnow().replace(hour=3, minute=0, second=0, microsecond=0),
+            "source_ip": "10.0.2.18",
+            "device": "Surface-Pro-HR03",
+            "location": "Remote",
+            "description": "Automated seed: late night login",
+        },
+        {
+            "user_id": 9,
+            "event_type": "mass_copy",
+            "timestamp": datetime.utcnow(),
+            "source_ip": "10.0.4.77",
+            "device": "MacBook-Pro-PD01",
+            "bytes_transferred": int(1.8 * 1024 * 1024 * 1024),
+            "files_accessed": 140,
+            "description": "Automated seed: mass copy",
+        },
+        {
+            "user_id": 6,
+            "event_type": "remote_download",
+            "timestamp": datetime.utcnow(),
+            "source_ip": "203.0.113.88",
+            "device": "Automation-VM",
+            "user_agent": "Python-urllib/3.13",
+            "description": "Automated seed: remote script download",
+        },
+    ]
+
+
 def _run_detection() -> None:
+    # Imported lazily: importing ``app`` builds the Flask app, which harnesses reusing the
+    # scenario data above do not need.
+    from app import create_app
+
     flask_app = create_app()
     with flask_app.app_context():
         engine: AIEngine = flask_app.extensions["ai_engine"]  # type: ignore[attr-defined]
         engine.warm_start()
-        scenarios = [
-            {
-                "user_id": 3,
-                "event_type": "late_night_login",
-                "timestamp": datetime.utcnow().replace(hour=3, minute=0, second=0, microsecond=0),
-                "source_ip": "10.0.2.18",
-                "device": "Surface-Pro-HR03",
-                "location": "Remote",
-                "description": "Automated seed: late night login",
-            },
-            {
-                "user_id": 9,
-                "event_type": "mass_copy",
-                "timestamp": datetime.utcnow(),
-                "source_ip": "10.0.4.77",
-                "device": "MacBook-Pro-PD01",
-                "bytes_transferred": int(1.8 * 1024 * 1024 * 1024),
-                "files_accessed": 140,
-                "description": "Automated seed: mass copy",
-            },
-            {
-                "user_id": 6,
-                "event_type": "remote_download",
-                "timestamp": datetime.utcnow(),
-                "source_ip": "203.0.113.88",
-                "device": "Automation-VM",
-                "user_agent": "Python-urllib/3.13",
-                "description": "Automated seed: remote script download",
-            },
-        ]
-        for payload in scenarios:
+        for payload in detection_scenarios():
             engine.analyse_activity(payload)
 
 
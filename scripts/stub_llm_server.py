@@ -0,0 +1,130 @@
+"""Local OpenAI-compatible chat completion server for tests and latency experiments.
+
+Run from the repository root and point the app at it:
+
+    python -m scripts.stub_llm_server --port 8089 --delay 1.5
+    HF_API_BASE=http://127.0.0.1:8089/v1 HF_API_KEY=stub flask run
+
+Every ``POST /v1/chat/completions`` answers with a short canned insight after ``--delay``
+seconds; ``--fail-rate`` turns that fraction of requests into HTTP 500s.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubLLMServer:
+    """Threaded chat completion server; usable as a context manager that serves in the background."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, delay: float = 0.0, fail_rate: float = 0.0) -> None:
+        self.delay = delay
+        self.fail_rate = fail_rate
+        self.requests = 0
+        self.connections: set[tuple] = set()
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread: threading.Thread | None = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "StubLLMServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="stub-llm", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def serve_forever(self) -> None:
+        self._server.serve_forever()
+
+    def __enter__(self) -> "StubLLMServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def _record_request(self, client_address: tuple) -> bool:
+        with self._lock:
+            self.requests += 1
+            self.connections.add(client_address)
+        return random.random() < self.fail_rate
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # HTTP/1.1 keeps connections open, so clients can show connection reuse.
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self) -> None:  # noqa: N802 - http.server naming
+                length = int(self.headers.get("Content-Length") or 0)
+                payload = json.loads(self.rfile.read(length) or b"{}")
+                fail = stub._record_request(self.client_address)
+                if stub.delay:
+                    time.sleep(stub.delay)
+                if not self.path.rstrip("/").endswith("/chat/completions") or fail:
+                    self._reply(500 if fail else 404, {"error": {"message": "stub failure" if fail else "not found"}})
+                    return
+                prompt = (payload.get("messages") or [{}])[-1].get("content", "")
+                self._reply(200, _completion(payload.get("model", "stub"), prompt))
+
+            def log_message(self, format: str, *args) -> None:  # noqa: A002 - silence request logging
+                return
+
+            def _reply(self, status: int, body: dict) -> None:
+                data = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        return Handler
+
+
+def _completion(model: str, prompt: str) -> dict:
+    summary = " ".join(prompt.split())[:80]
+    content = (
+        "### Stub insight\n"
+        f"- Reviewed: {summary}\n"
+        "- Recommendation: verify the activity with the account owner."
+    )
+    return {
+        "id": f"chatcmpl-stub-{int(time.time() * 1000)}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+        "usage": {"prompt_tokens": len(prompt.split()), "completion_tokens": len(content.split()), "total_tokens": 0},
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--delay", type=float, default=0.0, help="seconds to wait before answering")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="fraction of requests answered with HTTP 500")
+    args = parser.parse_args()
+
+    server = StubLLMServer(args.host, args.port, args.delay, args.fail_rate)
+    print(f"Stub LLM server listening on {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
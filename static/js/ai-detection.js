@@ -26,6 +26,7 @@
           <strong>Risk Level:</strong> ${data.risk_level.toUpperCase()}<br>
           <strong>Score:</strong> ${(data.risk_score * 100).toFixed(1)}%
           ${data.insight ? `<hr><strong>Insight:</strong> ${data.insight}` : ''}
+          ${data.insight_pending ? '<hr><em>AI insight is being generated and will appear with the alert.</em>' : ''}
         </div>`;
     } catch (error) {
       resultContainer.innerHTML = `<div class="alert alert-danger">${error.message}</div>`;
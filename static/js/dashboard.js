@@ -20,6 +20,18 @@
     }
   }
 
+  async function waitForTrainingJob(jobId) {
+    for (;;) {
+      const response = await fetch(`/ai/train/${jobId}`);
+      if (!response.ok) throw new Error('Training status unavailable');
+      const job = await response.json();
+      if (job.status === 'completed') return job;
+      if (job.status === 'failed') throw new Error(job.error || 'Training failed');
+      trainBtn.innerHTML = `<span class="spinner-border spinner-border-sm"></span> Training ${Math.round((job.progress || 0) * 100)}%`;
+      await new Promise((resolve) => setTimeout(resolve, 1000));
+    }
+  }
+
   async function retrainModels() {
     if (!config.alertsEndpoint) return;
     trainBtn.disabled = true;
@@ -31,6 +43,8 @@
         body: JSON.stringify({ limit: 500 })
       });
       if (!response.ok) throw new Error('Training failed');
+      const job = await response.json();
+      await waitForTrainingJob(job.job_id);
       trainBtn.innerHTML = '<i class="fa-solid fa-check"></i> Models Updated';
     } catch (error) {
       console.error(error);
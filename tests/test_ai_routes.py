@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import json
+from types import SimpleNamespace
+
+from flask import Flask
+
+from ai_engine.ip_reputation import IPReputationStore
+from ai_engine.rule_engine import RuleStore
+from ai_engine.travel import LocationStore
+from ai_engine.user_agents import UserAgentStore
+from routes.ai_routes import ai_bp
+
+RULES_PATH = "ai_engine/rules/heuristics.json"
+
+
+def _client(engine=None, role: str = "user"):
+    app = Flask(__name__)
+    app.secret_key = "test"
+    app.register_blueprint(ai_bp)
+    if engine is not None:
+        app.extensions["ai_engine"] = engine
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session["user_id"] = 1
+        session["role"] = role
+    return client
+
+
+def test_non_object_payloads_are_rejected_before_scoring():
+    client = _client()
+
+    for body in ("text", 5, [1]):
+        response = client.post("/ai/detect", json=body)
+        assert response.status_code == 400 and response.get_json() == {"error": "Expected an activity object"}
+        response = client.post("/ai/detect/batch", json=body)
+        assert response.status_code == 400 and "events" in response.get_json()["error"]
+
+
+def test_rule_reload_swaps_nothing_when_one_file_is_invalid(tmp_path):
+    rules_path = tmp_path / "heuristics.json"
+    rules_path.write_text(open(RULES_PATH, encoding="utf-8").read())
+    locations_path = tmp_path / "locations.json"
+    locations_path.write_text(json.dumps({"locations": {"NYC HQ": [40.7, -74.0]}}))
+    engine = SimpleNamespace(
+        rules=RuleStore(str(rules_path)),
+        ip_reputation=IPReputationStore("ai_engine/rules/ip_blocklist.txt"),
+        user_agents=UserAgentStore("ai_engine/rules/user_agents.json"),
+        locations=LocationStore(str(locations_path)),
+    )
+    client = _client(engine, role="admin")
+    assert client.post("/ai/rules/reload").status_code == 200
+    rules = engine.rules.current()
+
+    rules_path.write_text(json.dumps({"rules": []}))
+    locations_path.write_text(json.dumps({"locations": {"Nowhere": [200, 0]}}))
+    response = client.post("/ai/rules/reload")
+    assert response.status_code == 400 and "location table" in response.get_json()["error"]
+    assert engine.rules.current() is rules and len(engine.locations.current()) == 1
@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from ai_engine import model_store
+from ai_engine.bundle import ModelBundle, artifact_schema, train_bundle
+from ai_engine.calibration import ScoreCalibration, combined_scores, tail_anchors
+from ai_engine.engine import RISK_CRITICAL_THRESHOLD, AIEngine
+from scripts.synthetic_activity import generate_activity
+
+ANCHORS = tail_anchors({0.4: 10.0, 0.7: 2.0, 0.9: 0.2})
+
+
+def test_percentiles_are_monotonic_and_collapse_ties():
+    scores = np.concatenate([np.zeros(500), np.random.default_rng(3).normal(size=500)])
+    calibration = ScoreCalibration.fit(scores)
+    assert np.all(np.diff(calibration.scores) > 0)
+    probes = np.linspace(-5, 5, 1001)
+    assert np.all(np.diff(calibration.percentiles(probes)) >= 0)
+    assert calibration.percentiles(np.array([-1e9, 1e9])).tolist() == [0.0, 1.0]
+    # Half the training scores are exactly zero, so zero sits mid-way through its tie.
+    assert 0.45 < calibration.percentiles(np.array([0.0]))[0] < 0.8
+
+    constant = ScoreCalibration.fit(np.full(10, 2.0))
+    assert constant.percentiles(np.array([1.0, 2.0, 3.0])).tolist() == [0.0, 0.5, 1.0]
+
+
+def test_risk_levels_fire_on_the_configured_training_tails():
+    rng = np.random.default_rng(7)
+    training = rng.standard_t(3, size=20_000) * 0.05
+    calibration = ScoreCalibration.fit(training)
+    risk = calibration.risk(training, ANCHORS)
+    assert np.mean(risk >= 0.4) == pytest.approx(0.10, abs=0.005)
+    assert np.mean(risk >= 0.7) == pytest.approx(0.02, abs=0.002)
+    assert np.mean(risk >= 0.9) == pytest.approx(0.002, abs=0.001)
+    # Rescaling the raw scores, as a retrain would, leaves the alert volume unchanged.
+    assert np.allclose(ScoreCalibration.fit(training * 40 + 3).risk(training * 40 + 3, ANCHORS), risk)
+    with pytest.raises(ValueError):
+        tail_anchors({0.4: 2.0, 0.7: 10.0})
+
+
+def test_trained_bundle_keeps_its_calibration_through_an_artifact(tmp_path):
+    logs = list(generate_activity(400, users=20, seed=5))
+    bundle = train_bundle(logs, parallel=False)
+    assert bundle.calibration is not None and bundle.calibration.training_rows == 400
+
+    version = model_store.save_artifact(str(tmp_path), bundle.components(), artifact_schema(), bundle.training_rows)
+    artifact = model_store.load_latest_artifact(str(tmp_path), artifact_schema())
+    restored = ModelBundle.from_components(artifact.components, 400, version)
+    assert np.array_equal(restored.calibration.scores, bundle.calibration.scores)
+
+    features = bundle.preprocessor.transform(logs[:50])
+    combined = combined_scores(
+        bundle.isolation_forest.decision_scores(features), bundle.one_class_svm.decision_scores(features)
+    )
+    assert np.allclose(restored.calibration.risk(combined, ANCHORS), bundle.calibration.risk(combined, ANCHORS))
+
+    legacy = {name: component for name, component in bundle.components().items() if name != "calibration"}
+    assert ModelBundle.from_components(legacy, 400, version).calibration is None
+
+
+def test_model_votes_do_not_bypass_the_calibrated_levels():
+    logs = list(generate_activity(1200, users=40, seed=6))
+    engine = AIEngine()
+    engine._bundle = train_bundle(logs[:600], parallel=False)
+    results = engine.analyse_batch(logs[600:], persist=False)
+    assert all((result.risk_level == "critical") == (result.risk_score >= RISK_CRITICAL_THRESHOLD) for result in results)
+    assert any(result.anomaly_votes == 2 and result.risk_level != "critical" for result in results)
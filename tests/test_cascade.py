@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from ai_engine.bundle import train_bundle
+from ai_engine.cascade import CLEAR_ANOMALY, CLEAR_NORMAL, ONE_CLASS_SVM, RULES, CascadeCounters, cascade_stages
+from ai_engine.engine import AIEngine
+from scripts.synthetic_activity import generate_activity
+
+
+@pytest.fixture(scope="module")
+def bundle():
+    return train_bundle(list(generate_activity(600, users=20, seed=9)), parallel=False)
+
+
+def test_stages_follow_the_band_and_rules_win():
+    stages = cascade_stages(np.array([0.1, 0.5, 0.999, 0.5, 0.999]), np.array([0, 0, 0, 0.95, 0.3]), 0.2, 0.99, 0.9)
+    assert stages.tolist() == [CLEAR_NORMAL, ONE_CLASS_SVM, CLEAR_ANOMALY, RULES, CLEAR_ANOMALY]
+    counters = CascadeCounters()
+    counters.record(stages)
+    assert counters.stats() == {
+        "events": 5,
+        "stages": {"rules": 1, "clear_normal": 1, "clear_anomaly": 2, "one_class_svm": 1},
+        "svm_skip_rate": 0.8,
+    }
+
+
+def test_flags_derived_from_scores_match_predict(bundle):
+    features = bundle.preprocessor.transform(list(generate_activity(300, users=20, seed=10)))
+    for model in (bundle.isolation_forest, bundle.one_class_svm):
+        assert np.array_equal(model.anomaly_flags(features), (model.model.predict(features) == -1).astype(int))
+
+
+def test_cascade_only_sends_the_band_to_the_svm(bundle, monkeypatch):
+    events = list(generate_activity(200, users=20, seed=11))
+    engine = AIEngine()
+    engine._bundle = bundle
+    full = engine.analyse_batch(events, persist=False)
+
+    scored_rows = []
+    svm_scores = bundle.one_class_svm.decision_scores
+    monkeypatch.setattr(bundle.one_class_svm, "decision_scores", lambda rows: scored_rows.append(rows.shape[0]) or svm_scores(rows))
+    engine.scoring_mode = "cascade"
+    engine.cascade = CascadeCounters()
+    cascaded = engine.analyse_batch(events, persist=False)
+
+    stats = engine.cascade.stats()
+    assert scored_rows == [stats["stages"]["one_class_svm"]] and stats["svm_skip_rate"] > 0.5
+    for before, after in zip(full, cascaded):
+        assert after.iso_score == before.iso_score
+        if after.svm_score is None:
+            assert after.anomaly_votes == int(before.iso_score < 0)
+        else:
+            # Inside the band the cascade scores exactly like the full ensemble.
+            assert after.svm_score == pytest.approx(before.svm_score)
+            assert after.risk_score == pytest.approx(before.risk_score)
+            assert (after.anomaly_votes, after.risk_level) == (before.anomaly_votes, before.risk_level)
@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+import pytest
+
+from ai_engine.data_preprocessor import (
+    CATEGORICAL_FIELDS,
+    NUMERICAL_FIELDS,
+    DataPreprocessor,
+    FieldEncoding,
+    parse_encodings,
+    to_number,
+)
+
+BASELINE = [
+    {
+        "event_type": event_type,
+        "source_ip": f"10.0.1.{index % 7}",
+        "device": device,
+        "location": "NYC HQ" if index % 3 else "Remote",
+        "bytes_transferred": 1048576 * index,
+        "files_accessed": index % 5,
+        "failed_attempts": index % 2,
+        "session_duration": 60 * index,
+        "timestamp": datetime(2025, 1, 8, 9) - timedelta(hours=5 * index),
+    }
+    for index, (event_type, device) in enumerate(
+        [("login", "Windows-Desktop-FIN01"), ("file_access", "Dell-Latitude-FIN05"), ("file_upload", "ThinkPad-IT09")] * 8
+    )
+]
+
+
+def _pandas_reference(preprocessor: DataPreprocessor, logs: list[dict]) -> np.ndarray:
+    """The original DataFrame + get_dummies encoding the compiled encoder must reproduce."""
+    frame = pd.DataFrame(logs)
+    if "timestamp" in frame.columns:
+        frame["timestamp"] = pd.to_datetime(frame["timestamp"], errors="coerce", format="mixed")
+        frame["hour"] = frame["timestamp"].dt.hour.fillna(0)
+        frame["day_of_week"] = frame["timestamp"].dt.dayofweek.fillna(0)
+    else:
+        frame["hour"] = 0
+        frame["day_of_week"] = 0
+    for field in NUMERICAL_FIELDS:
+        if field not in frame:
+            frame[field] = 0
+        frame[field] = pd.to_numeric(frame[field], errors="coerce").fillna(0)
+    for field in CATEGORICAL_FIELDS:
+        if field not in frame:
+            frame[field] = "unknown"
+        frame[field] = frame[field].fillna("unknown")
+    categorical = pd.get_dummies(frame[CATEGORICAL_FIELDS], prefix=CATEGORICAL_FIELDS, dtype=int)
+    numerical = frame[["hour", "day_of_week"] + NUMERICAL_FIELDS].astype(float)
+    encoded = pd.concat([numerical, categorical], axis=1)
+    return encoded.reindex(columns=preprocessor.fitted_columns, fill_value=0).to_numpy(dtype=float)
+
+
+def test_compiled_encoder_matches_pandas_encoding():
+    preprocessor = DataPreprocessor()
+    features = preprocessor.fit(BASELINE)
+    assert np.array_equal(features, _pandas_reference(preprocessor, BASELINE))
+
+    events = [
+        {"event_type": "login", "source_ip": "10.0.1.3", "timestamp": "2025-01-08 03:00:00"},
+        {"event_type": "mass_copy", "device": None, "bytes_transferred": " 2048 ", "timestamp": "2025-01-08T10:00:00+03:00"},
+        {"location": float("nan"), "files_accessed": "n/a", "timestamp": date(2025, 1, 9)},
+        {"timestamp": "not a date", "session_duration": "1e3"},
+        {},
+    ]
+    for event in events:
+        assert np.array_equal(preprocessor.transform(event), _pandas_reference(preprocessor, [event]))
+    # A batch encodes exactly like the same events one by one, even with mixed timestamp formats.
+    expected = np.vstack([_pandas_reference(preprocessor, [event]) for event in events])
+    assert np.array_equal(preprocessor.transform(events), expected)
+
+
+def test_unseen_categories_are_dropped():
+    preprocessor = DataPreprocessor()
+    preprocessor.fit(BASELINE)
+    row = preprocessor.transform({"event_type": "never_seen", "device": "Unknown-Laptop"})
+    assert row.shape == (1, len(preprocessor.fitted_columns))
+    assert row[0, 6:].sum() == 0
+
+
+def test_sparse_encoding_matches_dense():
+    dense = DataPreprocessor()
+    compressed = DataPreprocessor(sparse=True)
+    dense_features = dense.fit(BASELINE)
+    sparse_features = compressed.fit(BASELINE)
+
+    assert sparse_features.format == "csr"
+    assert sparse_features.has_sorted_indices
+    assert np.array_equal(sparse_features.toarray(), dense_features)
+    event = {"event_type": "login", "source_ip": "10.0.1.3", "bytes_transferred": 4096, "timestamp": "2025-01-08 03:00"}
+    assert np.array_equal(compressed.transform(event).toarray(), dense.transform(event))
+
+
+def test_hash_and_topk_encodings_bound_width():
+    encodings = parse_encodings("source_ip=hash:8, device=topk:2")
+    assert encodings == {"source_ip": FieldEncoding("hash", 8), "device": FieldEncoding("topk", 2)}
+
+    preprocessor = DataPreprocessor(encodings=encodings)
+    features = preprocessor.fit(BASELINE)
+    columns = preprocessor.fitted_columns
+    assert len([c for c in columns if c.startswith("source_ip_")]) == 8
+    # Equally frequent devices are ranked alphabetically, so the result is deterministic.
+    assert [c for c in columns if c.startswith("device_")] == [
+        "device_Dell-Latitude-FIN05",
+        "device_ThinkPad-IT09",
+        "device___other",
+    ]
+    assert features.shape == (len(BASELINE), len(columns))
+
+    unseen = preprocessor.transform({"source_ip": "192.0.2.77", "device": "Brand-New-Laptop"})
+    assert unseen[0, columns.index("device___other")] == 1
+    hashed = [index for index, column in enumerate(columns) if column.startswith("source_ip_")]
+    assert unseen[0, hashed].sum() == 1
+    assert np.array_equal(unseen, preprocessor.transform({"source_ip": "192.0.2.77", "device": "Other-Laptop"}))
+
+
+def test_invalid_encoding_spec_is_rejected():
+    with pytest.raises(ValueError):
+        parse_encodings("hostname=hash:16")
+    with pytest.raises(ValueError):
+        parse_encodings("source_ip=hash")
+
+
+def test_to_number_matches_pandas_and_optionally_drops_infinities():
+    values = [None, "", "12.5", 3, "abc", float("nan"), "-inf"]
+    expected = pd.to_numeric(pd.Series(values, dtype=object), errors="coerce").fillna(0).tolist()
+    assert [to_number(value) for value in values] == expected
+    assert [to_number(value, finite=True) for value in values] == [0.0, 0.0, 12.5, 3.0, 0.0, 0.0, 0.0]
+    assert to_number(float("inf"), finite=True) == 0.0
@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import pickle
+
+import numpy as np
+import pytest
+import scipy.sparse as sp
+from sklearn.ensemble import IsolationForest
+
+from ai_engine import model_store
+from ai_engine.bundle import artifact_schema, train_bundle
+from ai_engine.flat_forest import FlatForest
+from ai_engine.isolation_forest import FLAT_MAX_ROWS, IsolationForestModel
+from scripts.synthetic_activity import generate_activity
+
+
+@pytest.mark.parametrize("options", [{}, {"max_features": 0.5}, {"max_samples": 1000}, {"max_samples": 1}])
+def test_flat_forest_matches_sklearn(options):
+    rng = np.random.default_rng(7)
+    training, events = rng.normal(size=(2000, 12)), rng.normal(size=(300, 12)) * 1.5
+    forest = IsolationForest(random_state=3, **options).fit(training)
+    flat = FlatForest.from_sklearn(forest)
+    for rows in (events, sp.csr_matrix(events), events[:1]):
+        assert np.allclose(flat.decision_function(rows), forest.decision_function(rows), rtol=0, atol=1e-12)
+    assert ((flat.decision_function(events) < 0) == (forest.predict(events) == -1)).all()
+    with pytest.raises(ValueError, match="fitted with 12"):
+        flat.decision_function(events[:, :5])
+
+
+def test_model_scores_with_flat_arrays_and_falls_back_for_old_artifacts():
+    rng = np.random.default_rng(8)
+    model = IsolationForestModel()
+    model.fit(rng.normal(size=(500, 6)))
+    assert isinstance(model.flat, FlatForest)
+    events = rng.normal(size=(FLAT_MAX_ROWS + 1, 6))
+    expected = model.model.decision_function(events)
+    assert np.allclose(model.decision_scores(events[:10]), expected[:10], rtol=0, atol=1e-12)
+    assert np.array_equal(model.decision_scores(events), expected)
+
+    restored = pickle.loads(pickle.dumps(model))
+    del restored.flat
+    assert np.allclose(restored.decision_scores(events[:10]), expected[:10], rtol=0, atol=1e-12)
+
+
+def test_flat_arrays_are_memory_mapped_from_artifacts(tmp_path):
+    bundle = train_bundle(list(generate_activity(300, users=15, seed=41)), parallel=False)
+    version = model_store.save_artifact(str(tmp_path), bundle.components(), artifact_schema(), bundle.training_rows, keep=0)
+    loaded = model_store.load_artifact(str(tmp_path), version).components["isolation_forest"]
+    assert isinstance(loaded.flat.feature, np.memmap)
+    events = bundle.preprocessor.transform(list(generate_activity(20, users=15, seed=42)))
+    assert np.allclose(loaded.decision_scores(events), bundle.isolation_forest.model.decision_function(events), rtol=0, atol=1e-12)
@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import time
+
+from ai_engine import engine as engine_module
+from ai_engine.engine import InsightCache, generate_alert_insight
+from scripts.stub_llm_server import StubLLMServer
+
+
+def test_keys_normalize_whitespace_and_case_but_not_model_or_language():
+    key = InsightCache.key("Massive  data copy\noperation", "model-a", "English")
+    assert key == InsightCache.key(" massive data COPY operation ", "model-a", "English")
+    assert key != InsightCache.key("Massive data copy operation", "model-b", "English")
+    assert key != InsightCache.key("Massive data copy operation", "model-a", "Modern Standard Arabic")
+
+
+def test_lru_eviction_and_ttl_expiry():
+    cache = InsightCache(max_entries=2, ttl_seconds=60)
+    cache.set("a", "first")
+    cache.set("b", "second")
+    assert cache.get("a") == "first"
+    cache.set("c", "third")
+    assert cache.get("b") is None
+    assert cache.get("a") == "first" and cache.get("c") == "third"
+
+    expiring = InsightCache(ttl_seconds=0.05)
+    expiring.set("a", "first")
+    time.sleep(0.1)
+    assert expiring.get("a") is None
+    assert expiring.stats()["entries"] == 0
+
+
+def test_entries_survive_a_restart(tmp_path):
+    path = str(tmp_path / "insights.json")
+    InsightCache(path=path).set("a", "first")
+    restored = InsightCache(path=path)
+    assert restored.get("a") == "first"
+    assert restored.stats()["hits"] == 1
+
+
+def test_repeated_prompts_are_served_from_cache(monkeypatch):
+    monkeypatch.setattr(engine_module, "insight_cache", InsightCache())
+    with StubLLMServer() as server:
+        monkeypatch.setenv("HF_API_BASE", server.base_url)
+        monkeypatch.setenv("HF_API_KEY", "stub")
+        first = generate_alert_insight("Massive data copy operation")
+        started = time.perf_counter()
+        second = generate_alert_insight("massive data  copy operation")
+        elapsed = time.perf_counter() - started
+
+    assert first and first == second
+    assert server.requests == 1
+    assert elapsed < 0.01
+    assert engine_module.insight_cache.stats()["hits"] == 1
@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import threading
+import time
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+from ai_engine import engine as engine_module
+from ai_engine.bundle import train_bundle
+from ai_engine.engine import AIEngine, generate_alert_insight
+from ai_engine.insight_queue import InsightQueue
+from ai_engine.llm_client import CircuitBreaker
+from scripts.stub_llm_server import StubLLMServer
+from scripts.synthetic_activity import generate_activity
+
+
+def test_insights_are_generated_in_the_background(monkeypatch):
+    with StubLLMServer(delay=0.3) as server:
+        monkeypatch.setenv("HF_API_BASE", server.base_url)
+        monkeypatch.setenv("HF_API_KEY", "stub")
+        insights: list[str] = []
+        queue = InsightQueue(generate_alert_insight, maxsize=10, workers=2)
+
+        started = time.perf_counter()
+        assert queue.submit("Massive data copy operation", insights.append)
+        assert queue.submit("Remote script download", insights.append)
+        assert time.perf_counter() - started < 0.1
+
+        assert queue.join(timeout=10)
+        assert len(insights) == 2 and all("Stub insight" in insight for insight in insights)
+        metrics = queue.metrics()
+        assert metrics["completed"] == 2 and metrics["depth"] == 0
+        assert metrics["latency_ms"]["max"] >= 300
+
+
+def test_full_queue_drops_instead_of_blocking():
+    release = threading.Event()
+    queue = InsightQueue(lambda message: release.wait(5) and message, maxsize=1, workers=1)
+
+    results = [queue.submit(f"alert {index}", lambda insight: None) for index in range(4)]
+    release.set()
+    assert queue.join(timeout=5)
+
+    assert results[0] and not all(results)
+    assert queue.metrics()["dropped"] == results.count(False)
+
+
+def test_detection_returns_before_insight_alert_is_attached(monkeypatch):
+    alerts: list[tuple[str, str]] = []
+
+    def create_alert(user_id, alert_type, description, risk_score, risk_level, metadata_json=None):
+        alerts.append((alert_type, description))
+        return len(alerts)
+
+    release = threading.Event()
+    monkeypatch.setattr(engine_module.alert_service, "create_alert", create_alert)
+    monkeypatch.setattr(engine_module, "generate_alert_insight", lambda message: release.wait(5) and f"insight: {message}")
+    monkeypatch.setattr(engine_module.llm_client, "shared_client", lambda: SimpleNamespace(breaker=CircuitBreaker()))
+
+    engine = AIEngine()
+    engine._bundle = train_bundle(list(generate_activity(300, users=10, distinct_ips=20)))
+    result = engine.analyse_activity(
+        {
+            "user_id": 9,
+            "event_type": "mass_copy",
+            "timestamp": datetime(2025, 1, 8, 3, 0),
+            "bytes_transferred": int(1.7 * 1024**3),
+            "files_accessed": 140,
+            "description": "Massive data copy operation",
+        }
+    )
+
+    assert result.risk_level in {"high", "critical"}
+    assert result.insight is None and result.insight_pending
+    assert alerts == [("Insider Threat", "Massive data copy operation")]
+
+    release.set()
+    assert engine.insights.join(timeout=5)
+    assert alerts[-1] == ("LLM Insight", "insight: Massive data copy operation")
+
+
+def test_no_insight_is_promised_without_a_usable_llm(monkeypatch):
+    alerts: list[str] = []
+    monkeypatch.setattr(engine_module.alert_service, "create_alert", lambda user_id, kind, *args: alerts.append(kind) or len(alerts))
+    monkeypatch.setattr(engine_module, "generate_alert_insight", lambda message: pytest.fail("insight requested"))
+    engine = AIEngine()
+    engine._bundle = train_bundle(list(generate_activity(300, users=10, distinct_ips=20)))
+    event = {
+        "user_id": 9,
+        "event_type": "mass_copy",
+        "timestamp": datetime(2025, 1, 8, 3, 0),
+        "bytes_transferred": int(1.7 * 1024**3),
+        "files_accessed": 140,
+        "description": "Massive data copy operation",
+    }
+
+    monkeypatch.setattr(engine_module.llm_client, "shared_client", lambda: None)
+    unconfigured = engine.analyse_activity(dict(event))
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=60)
+    breaker.record_failure()
+    monkeypatch.setattr(engine_module.llm_client, "shared_client", lambda: SimpleNamespace(breaker=breaker))
+    circuit_open = engine.analyse_activity(dict(event))
+
+    assert unconfigured.risk_level in {"high", "critical"} and unconfigured.tier == "full"
+    assert not unconfigured.insight_pending and not circuit_open.insight_pending
+    assert alerts == ["Insider Threat"] * 2 and engine.insights.depth == 0
@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import ipaddress
+import os
+import random
+
+import numpy as np
+import pytest
+
+from ai_engine.ip_reputation import ALLOWED, BLOCKED, UNKNOWN, IPReputation, IPReputationStore
+
+
+def test_cidr_ranges_and_allowlist_override():
+    reputation = IPReputation.from_lines(
+        ["198.51.0.0/16", "203.0.113.0/24  # TEST-NET-3", "10.0.0.7", "2001:db8::/32", "# comment", ""],
+        ["198.51.100.0/24", "2001:db8:1::/48"],
+    )
+    addresses = [
+        "198.51.7.1",
+        "198.51.100.9",
+        "198.52.0.1",
+        "203.0.113.255",
+        "203.0.114.0",
+        "10.0.0.7",
+        "10.0.0.8",
+        "2001:db8::1",
+        "2001:db8:1::5",
+        "::ffff:203.0.113.4",
+        "not-an-ip",
+        None,
+    ]
+    expected = [BLOCKED, ALLOWED, UNKNOWN, BLOCKED, UNKNOWN, BLOCKED, UNKNOWN, BLOCKED, ALLOWED, BLOCKED, UNKNOWN, UNKNOWN]
+    assert reputation.classify_many(addresses).tolist() == expected
+    assert reputation.classify("203.0.113.88") == BLOCKED
+
+
+def test_thousands_of_ranges_match_a_linear_scan():
+    rng = random.Random(3)
+    networks = [
+        ipaddress.ip_network(f"{rng.randrange(1, 224)}.{rng.randrange(256)}.{rng.randrange(256)}.0/{rng.randrange(12, 29)}", strict=False)
+        for _ in range(2000)
+    ]
+    networks += [ipaddress.ip_network(f"2001:db8:{index:x}::/48") for index in range(200)]
+    reputation = IPReputation.from_lines([str(network) for network in networks])
+    assert len(reputation.blocked) < len(networks)  # overlapping ranges are merged
+
+    addresses = [str(ipaddress.IPv4Address(rng.getrandbits(32))) for _ in range(300)]
+    addresses += [str(network.network_address + 5) for network in networks[:100]]
+    addresses += [f"2001:db8:{rng.randrange(300):x}::{rng.randrange(1000):x}" for _ in range(100)]
+    ranges = [(network.version, int(network.network_address), int(network.broadcast_address)) for network in networks]
+    expected = []
+    for address in addresses:
+        parsed = ipaddress.ip_address(address)
+        inside = any(version == parsed.version and start <= int(parsed) <= end for version, start, end in ranges)
+        expected.append(BLOCKED if inside else UNKNOWN)
+    assert np.array_equal(reputation.classify_many(addresses), np.array(expected))
+
+
+def test_store_swaps_lists_when_files_change(tmp_path):
+    blocklist = tmp_path / "block.txt"
+    allowlist = tmp_path / "allow.txt"
+    blocklist.write_text("192.0.2.0/24\n")
+    store = IPReputationStore(str(blocklist), str(allowlist), check_interval=0)
+    assert store.current().classify("192.0.2.10") == BLOCKED
+
+    allowlist.write_text("192.0.2.10\n")
+    assert store.current().classify("192.0.2.10") == ALLOWED
+
+    blocklist.write_text("192.0.2.0/33\n")
+    os.utime(blocklist, (1, 1))
+    assert store.current().classify("192.0.2.11") == BLOCKED
+    with pytest.raises(ValueError):
+        store.reload()
@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import threading
+import time
+
+from ai_engine import llm_client
+from ai_engine.llm_client import CircuitBreaker, LLMClient
+from scripts.stub_llm_server import StubLLMServer
+
+MESSAGES = [{"role": "user", "content": "Massive data copy operation"}]
+
+
+def test_shared_connection_answers_and_times_out():
+    with StubLLMServer(delay=0.5) as server:
+        client = LLMClient(server.base_url, "stub", timeout=0.2, max_retries=0)
+        started = time.perf_counter()
+        assert client.complete("stub", MESSAGES) is None
+        assert time.perf_counter() - started < 0.45
+
+        server.delay = 0
+        assert "Stub insight" in client.complete("stub", MESSAGES)
+        assert client.stats()["failed"] == 1 and client.stats()["succeeded"] == 1
+
+
+def test_sequential_calls_reuse_one_connection():
+    with StubLLMServer() as server:
+        client = LLMClient(server.base_url, "stub")
+        for _ in range(3):
+            assert client.complete("stub", MESSAGES)
+    assert server.requests == 3
+    assert len(server.connections) == 1
+
+
+def test_concurrency_limit_rejects_instead_of_queueing():
+    with StubLLMServer(delay=0.4) as server:
+        client = LLMClient(server.base_url, "stub", max_retries=0, max_concurrency=2, acquire_timeout=0.05)
+        results: list[str | None] = []
+        threads = [threading.Thread(target=lambda: results.append(client.complete("stub", MESSAGES))) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    assert server.requests == 2
+    assert sum(result is not None for result in results) == 2
+    assert client.stats()["rejected_busy"] == 3
+
+
+def test_circuit_opens_after_consecutive_failures_and_probes_again():
+    with StubLLMServer(fail_rate=1.0) as server:
+        client = LLMClient(server.base_url, "stub", max_retries=0, breaker=CircuitBreaker(failure_threshold=2, reset_seconds=0.2))
+        assert client.complete("stub", MESSAGES) is None
+        assert client.complete("stub", MESSAGES) is None
+        assert client.breaker.state == "open"
+
+        assert client.complete("stub", MESSAGES) is None
+        assert server.requests == 2 and client.stats()["rejected_open"] == 1
+
+        time.sleep(0.25)
+        assert client.breaker.state == "half_open"
+        assert client.complete("stub", MESSAGES) is None
+        assert server.requests == 3 and client.breaker.state == "open"
+
+        server.fail_rate = 0.0
+        time.sleep(0.25)
+        assert client.complete("stub", MESSAGES)
+        assert client.breaker.state == "closed" and client.breaker.times_opened == 2
+
+
+def test_replaced_shared_client_closes_after_in_flight_calls(monkeypatch):
+    with StubLLMServer(delay=0.3) as server:
+        monkeypatch.setattr(llm_client, "_shared_client", None)
+        monkeypatch.setenv("HF_API_BASE", server.base_url)
+        monkeypatch.setenv("HF_API_KEY", "old")
+        old = llm_client.shared_client()
+        results: list[str | None] = []
+        thread = threading.Thread(target=lambda: results.append(old.complete("stub", MESSAGES)))
+        thread.start()
+        time.sleep(0.1)
+
+        monkeypatch.setenv("HF_API_KEY", "new")
+        new = llm_client.shared_client()
+        assert new is not old and not old._closed
+        thread.join()
+        assert results[0] and old._closed and not new._closed
+
+        idle = LLMClient(server.base_url, "stub")
+        idle.retire()
+        assert idle._closed
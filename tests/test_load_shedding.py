@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import time
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+import ai_engine.engine as engine_module
+from ai_engine.bundle import train_bundle
+from ai_engine.engine import AIEngine
+from ai_engine.llm_client import CircuitBreaker
+from ai_engine.load_shedding import FULL, HEURISTICS_ONLY, NO_LLM, NO_SVM, LoadGovernor
+from scripts.synthetic_activity import generate_activity
+
+MASS_COPY = {
+    "user_id": 9,
+    "event_type": "mass_copy",
+    "timestamp": datetime(2025, 1, 8, 3, 0),
+    "bytes_transferred": int(1.7 * 1024**3),
+    "files_accessed": 140,
+    "description": "Massive data copy operation",
+}
+
+
+@pytest.fixture(scope="module")
+def bundle():
+    return train_bundle(list(generate_activity(300, users=10, distinct_ips=20)), parallel=False)
+
+
+def test_tiers_follow_in_flight_calls_queue_depth_and_budget():
+    governor = LoadGovernor(in_flight_limits=(2, 3, 0), insight_depth_limit=10)
+    assert governor.choose(1, in_flight=1) == FULL
+    assert governor.choose(1, in_flight=2) == NO_LLM
+    assert governor.choose(1, in_flight=50) == NO_SVM  # the last step is disabled
+    assert governor.choose(1, in_flight=1, insight_depth=10) == NO_LLM
+
+    for stage, micros in (("rules", 50), ("preprocessing", 100), ("isolation_forest", 100), ("one_class_svm", 750)):
+        governor.observe(stage, micros * 100 / 1e6, rows=100)
+    assert governor.estimate_ms(FULL, 100) == pytest.approx(100.0)
+    assert governor.choose(100, in_flight=1, budget_ms=150) == FULL
+    assert governor.choose(100, in_flight=1, budget_ms=40) == NO_SVM
+    assert governor.choose(100, in_flight=1, budget_ms=1) == HEURISTICS_ONLY
+    stats = governor.stats()
+    assert stats["tiers"] == {"full": 2, "no_llm": 2, "no_svm": 2, "heuristics_only": 1}
+    assert stats["over_budget"] == 1 and stats["in_flight"] == 0
+
+
+def test_budget_dropped_stage_is_probed_and_recovers_to_full():
+    governor = LoadGovernor(in_flight_limits=(0, 0, 0), probe_seconds=0.05)
+    for stage in ("rules", "preprocessing", "isolation_forest"):
+        governor.observe(stage, 0.0001, rows=1)
+    governor.observe("one_class_svm", 0.05, rows=1)
+    assert governor.choose(1, in_flight=1, budget_ms=10) == NO_SVM
+    assert governor.choose(1, in_flight=1, budget_ms=10) == NO_SVM
+
+    time.sleep(0.06)
+    # One probe runs the SVM again; a concurrent call does not get a second one.
+    assert governor.choose(1, in_flight=1, budget_ms=10) == NO_LLM
+    assert governor.choose(1, in_flight=1, budget_ms=10) == NO_SVM
+    governor.observe("one_class_svm", 0.0002, rows=1)
+    assert governor.choose(1, in_flight=1, budget_ms=10) == FULL
+
+
+def test_degraded_tiers_still_score_and_persist_every_event(bundle, monkeypatch):
+    alerts: list[str] = []
+    monkeypatch.setattr(engine_module.alert_service, "create_alert", lambda user_id, kind, *args: alerts.append(kind) or len(alerts))
+    monkeypatch.setattr(engine_module, "generate_alert_insight", lambda message: None)
+    monkeypatch.setattr(engine_module.llm_client, "shared_client", lambda: SimpleNamespace(breaker=CircuitBreaker()))
+    engine = AIEngine()
+    engine._bundle = bundle
+    engine.profiles.maybe_flush = engine.travel.maybe_flush = lambda: 0
+
+    results = {}
+    for tier in (FULL, NO_LLM, NO_SVM, HEURISTICS_ONLY):
+        monkeypatch.setattr(engine.load, "choose", lambda *args, tier=tier: tier)
+        results[tier] = engine.analyse_activity(dict(MASS_COPY))
+
+    assert [result.tier for result in results.values()] == ["full", "no_llm", "no_svm", "heuristics_only"]
+    assert results[FULL].insight_pending and not results[NO_LLM].insight_pending
+    assert results[NO_SVM].svm_score is None and results[NO_SVM].iso_score == results[FULL].iso_score
+    heuristics = results[HEURISTICS_ONLY]
+    assert heuristics.iso_score is None and heuristics.anomaly_votes == 0
+    assert set(heuristics.rules) >= {"large_transfer", "bulk_file_access"} and heuristics.risk_level in {"high", "critical"}
+    assert alerts == ["Insider Threat"] * 4
+    assert engine.insights.join(timeout=5)
@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+import pytest
+
+from ai_engine.membership import BloomFilter
+
+
+def test_sizing_follows_the_standard_formulas():
+    bloom = BloomFilter.for_capacity(256, 0.01)
+    assert (bloom.bits, bloom.hash_count, bloom.nbytes) == (2454, 7, 307)
+    with pytest.raises(ValueError):
+        BloomFilter.for_capacity(0)
+
+
+def test_no_false_negatives_and_bounded_false_positives():
+    bloom = BloomFilter.for_capacity(1000, 0.01)
+    # ``add`` can already answer "present" for a new item, at roughly the false-positive rate.
+    assert sum(bloom.add(f"device-{index}") for index in range(1000)) >= 980
+    assert all(f"DEVICE-{index}" in bloom for index in range(1000))
+    assert not bloom.add("device-7")
+    false_positives = sum(f"other-{index}" in bloom for index in range(20_000))
+    assert false_positives / 20_000 < 0.02
+    assert bloom.expected_error_rate() == pytest.approx(0.01, rel=0.2)
+    assert not bloom.saturated
+
+
+def test_round_trip_and_saturation():
+    bloom = BloomFilter.for_capacity(4, 0.05)
+    for index in range(6):
+        bloom.add(f"10.0.0.{index}")
+    restored, offset = BloomFilter.from_bytes(b"xx" + bloom.to_bytes(), 2, capacity=4)
+    assert offset == 2 + len(bloom.to_bytes())
+    assert restored.count == 6 and restored.saturated
+    assert all(f"10.0.0.{index}" in restored for index in range(6))
+    with pytest.raises(ValueError):
+        BloomFilter.from_bytes(bloom.to_bytes()[:-1])
+
+
+def test_merged_filters_hold_both_sets_and_estimate_the_union():
+    first, second = BloomFilter.for_capacity(256), BloomFilter.for_capacity(256)
+    for index in range(100):
+        first.add(f"device-{index}")
+    for index in range(50, 150):
+        second.add(f"device-{index}")
+    first.update(second)
+    assert all(f"device-{index}" in first for index in range(150))
+    assert abs(first.count - 150) <= 5
+    with pytest.raises(ValueError):
+        first.update(BloomFilter.for_capacity(64))
@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import threading
+
+import pytest
+
+import ai_engine.engine as engine_module
+from ai_engine.bundle import train_bundle
+from ai_engine.engine import AIEngine, DetectionResult
+from ai_engine.micro_batcher import MicroBatcher
+from ai_engine.scoring_service import ScoringClient, ScoringServer
+from scripts.synthetic_activity import generate_activity
+
+
+def _concurrently(count: int, call) -> list:
+    results = [None] * count
+    start = threading.Barrier(count)
+
+    def run(index: int) -> None:
+        start.wait()
+        results[index] = call(index)
+
+    threads = [threading.Thread(target=run, args=(index,)) for index in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def _outcome(call, *args):
+    try:
+        return call(*args)
+    except Exception as exc:
+        return exc
+
+
+def test_concurrent_submits_share_batches_and_get_their_own_results():
+    batches: list[int] = []
+
+    def square(items: list[int]) -> list[int]:
+        batches.append(len(items))
+        return [item * item for item in items]
+
+    batcher = MicroBatcher(square, max_items=16, max_wait_ms=50)
+    assert _concurrently(40, batcher.submit) == [index * index for index in range(40)]
+    assert sum(batches) == 40 and max(batches) <= 16 and len(batches) < 40
+    stats = batcher.stats()
+    assert stats["items"] == 40 and stats["largest_batch"] == max(batches)
+    # A lone caller is released by the wait window.
+    assert batcher.submit(3) == 9
+
+
+def test_a_failing_batch_fails_each_of_its_callers():
+    def explode(items):
+        raise RuntimeError("models not trained")
+
+    batcher = MicroBatcher(explode, max_items=4, max_wait_ms=1)
+    with pytest.raises(RuntimeError, match="models not trained"):
+        batcher.submit(1)
+    wrong_length = MicroBatcher(lambda items: [], max_wait_ms=1)
+    with pytest.raises(RuntimeError, match="0 results for 1 items"):
+        wrong_length.submit(1)
+
+
+def test_one_bad_item_fails_only_its_own_caller():
+    batches: list[int] = []
+
+    def invert(items):
+        batches.append(len(items))
+        if 0 in items:
+            raise ZeroDivisionError("division by zero")
+        return [ValueError("negative") if item < 0 else 1 / item for item in items]
+
+    batcher = MicroBatcher(invert, max_items=8, max_wait_ms=50)
+    outcomes = _concurrently(6, lambda index: _outcome(batcher.submit, [1, 2, 0, 4, -5, 8][index]))
+    assert outcomes[0] == 1.0 and outcomes[1] == 0.5 and outcomes[3] == 0.25 and outcomes[5] == 0.125
+    assert isinstance(outcomes[2], ZeroDivisionError) and isinstance(outcomes[4], ValueError)
+    assert sum(batches) > 6  # the failed batch was rescored item by item
+
+
+def test_engine_batch_with_a_non_finite_event_fails_only_that_caller(monkeypatch):
+    alerts: list[str] = []
+    monkeypatch.setattr(engine_module.alert_service, "create_alert", lambda user_id, kind, *args: alerts.append(kind) or len(alerts))
+    monkeypatch.setattr(engine_module, "generate_alert_insight", lambda message: None)
+    engine = AIEngine()
+    engine._bundle = train_bundle(list(generate_activity(300, users=10, distinct_ips=20)), parallel=False)
+    engine.profiles.maybe_flush = engine.travel.maybe_flush = lambda: 0
+    engine.batcher = MicroBatcher(engine._analyse_items, max_items=8, max_wait_ms=100)
+    engine.scoring_service = "batched"
+    events = list(generate_activity(6, users=3, seed=5))
+    events[3]["bytes_transferred"] = "1e400"
+
+    outcomes = _concurrently(6, lambda index: _outcome(engine.analyse_coalesced, events[index]))
+    assert isinstance(outcomes[3], ValueError)
+    assert all(isinstance(outcome, DetectionResult) for index, outcome in enumerate(outcomes) if index != 3)
+    assert engine.batcher.stats()["largest_batch"] == 6
+
+
+def test_sidecar_round_trip_over_a_unix_socket(tmp_path):
+    def score(items):
+        return [
+            DetectionResult(min(event["bytes_transferred"] / 1e9, 1.0), "low", 0.1, None, 0, None, rules=[], tier="full")
+            for event, budget in items
+        ]
+
+    path = str(tmp_path / "scoring.sock")
+    server = ScoringServer(path, MicroBatcher(score, max_items=8, max_wait_ms=5))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        client = ScoringClient(path, DetectionResult.from_dict)
+        results = _concurrently(12, lambda index: client.score({"bytes_transferred": index * 1e8, "timestamp": "2025-01-08"}))
+        assert [result.risk_score for result in results] == pytest.approx([index / 10 for index in range(10)] + [1.0, 1.0])
+        assert all(isinstance(result, DetectionResult) and result.svm_score is None for result in results)
+        with pytest.raises(RuntimeError, match="Scoring failed: KeyError"):
+            client.score({"no_bytes": 1})
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_sidecar_errors_are_reported_once_and_never_rescored(tmp_path):
+    calls: list[int] = []
+
+    def fail(items):
+        calls.append(len(items))
+        raise OSError("lost connection to MySQL server")
+
+    path = str(tmp_path / "scoring.sock")
+    server = ScoringServer(path, MicroBatcher(fail, max_wait_ms=1))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    engine = AIEngine()
+    engine.scoring_service = "sidecar"
+    engine.sidecar = ScoringClient(path, DetectionResult.from_dict)
+    engine.analyse_activity = lambda *args, **kwargs: pytest.fail("scored in-process after the sidecar replied")
+    try:
+        with pytest.raises(RuntimeError, match="Scoring failed: OSError: lost connection"):
+            engine.analyse_coalesced({"bytes_transferred": 1})
+        assert calls == [1]
+    finally:
+        server.shutdown()
+        server.server_close()
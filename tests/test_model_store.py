@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import json
+import os
+
+import numpy as np
+
+from ai_engine import model_store
+from ai_engine.bundle import TrainingReport, train_bundle
+from scripts.synthetic_activity import generate_activity
+
+SCHEMA = {"version": 1, "numerical": ["bytes_transferred"], "categorical": ["device"]}
+
+
+def test_artifact_roundtrip_prefers_newest_version(tmp_path):
+    directory = str(tmp_path)
+    model_store.save_artifact(directory, {"weights": np.arange(4.0)}, SCHEMA, training_rows=10)
+    newest = model_store.save_artifact(directory, {"weights": np.arange(8.0)}, SCHEMA, training_rows=20)
+
+    artifact = model_store.load_latest_artifact(directory, SCHEMA)
+
+    assert artifact is not None
+    assert artifact.version == newest
+    assert artifact.manifest["training_rows"] == 20
+    assert np.array_equal(artifact.components["weights"], np.arange(8.0))
+
+
+def test_incompatible_or_stale_artifacts_are_ignored(tmp_path):
+    directory = str(tmp_path)
+    version = model_store.save_artifact(directory, {"weights": np.zeros(2)}, SCHEMA, training_rows=5)
+
+    changed_schema = dict(SCHEMA, categorical=["device", "location"])
+    assert model_store.load_latest_artifact(directory, changed_schema) is None
+
+    manifest_path = os.path.join(directory, version, model_store.MANIFEST_FILE)
+    with open(manifest_path, encoding="utf-8") as handle:
+        manifest = json.load(handle)
+    manifest["created_at"] = "2000-01-01T00:00:00+00:00"
+    with open(manifest_path, "w", encoding="utf-8") as handle:
+        json.dump(manifest, handle)
+    assert model_store.load_latest_artifact(directory, SCHEMA, max_age_seconds=3600) is None
+
+
+def test_old_versions_are_pruned(tmp_path):
+    directory = str(tmp_path)
+    for rows in range(5):
+        model_store.save_artifact(directory, {"rows": rows}, SCHEMA, training_rows=rows, keep=2)
+    assert len([entry for entry in os.listdir(directory) if not entry.startswith(".")]) == 2
+
+
+def test_manifest_keeps_training_report(tmp_path):
+    logs = list(generate_activity(300, users=10, distinct_ips=20))
+    sequential = train_bundle(logs, parallel=False)
+    parallel = train_bundle(logs, parallel=True)
+
+    features = parallel.preprocessor.transform(logs[:50])
+    assert np.allclose(
+        sequential.isolation_forest.decision_scores(features), parallel.isolation_forest.decision_scores(features)
+    )
+    assert np.allclose(sequential.one_class_svm.decision_scores(features), parallel.one_class_svm.decision_scores(features))
+
+    report = parallel.report.as_dict()
+    assert report["training_rows"] == 300 and report["parallel"] is True
+    directory = str(tmp_path)
+    model_store.save_artifact(directory, {"rows": 300}, SCHEMA, training_rows=300, extra={"training_report": report})
+    artifact = model_store.load_latest_artifact(directory, SCHEMA)
+    assert TrainingReport.from_dict(artifact.manifest["training_report"]) == TrainingReport.from_dict(report)
@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import random
+
+import pytest
+
+from ai_engine.rate_windows import METRICS, RATE_COLUMNS, WINDOWS, RateTracker, SlidingWindowCounter
+
+
+class FakeClock:
+    def __init__(self, now: float = 1_000_000.0) -> None:
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_bucketed_totals_match_a_naive_scan():
+    rng = random.Random(11)
+    clock = FakeClock()
+    counter = SlidingWindowCounter(buckets=12, clock=clock)
+    history: list[tuple[float, tuple[float, float, float]]] = []
+    for _ in range(3000):
+        clock.now += rng.expovariate(1 / 4.0)
+        values = (1.0, float(rng.randrange(3)), float(rng.randrange(10_000)))
+        counter.add("alice", values)
+        history.append((clock.now, values))
+        if rng.random() < 0.1:
+            totals = counter.totals("alice")
+            for window, seconds in enumerate(WINDOWS.values()):
+                width = seconds / 12
+                # The window covers the current bucket and the 11 before it.
+                first_bucket = int(clock.now // width) - 11
+                expected = [0.0] * len(METRICS)
+                for at, recorded in history:
+                    if int(at // width) >= first_bucket:
+                        expected = [total + value for total, value in zip(expected, recorded)]
+                assert totals[window * 3:window * 3 + 3] == pytest.approx(expected)
+
+
+def test_idle_keys_expire_and_key_count_is_capped():
+    clock = FakeClock()
+    counter = SlidingWindowCounter(max_keys=3, clock=clock)
+    for key in ("a", "b", "c", "d"):
+        counter.add(key, (1.0, 0.0, 0.0))
+    assert len(counter) == 3 and counter.evicted == 1
+    assert counter.totals("a") == [0.0] * 9
+    clock.now += 3601
+    counter.add("e", (1.0, 0.0, 0.0))
+    assert len(counter) == 1 and counter.evicted == 4
+
+
+def test_clock_going_backwards_keeps_counting():
+    clock = FakeClock()
+    counter = SlidingWindowCounter(clock=clock)
+    counter.add("a", (1.0, 1.0, 1.0))
+    clock.now -= 30
+    counter.add("a", (1.0, 1.0, 1.0))
+    assert counter.totals("a")[:3] == [2.0, 2.0, 2.0]
+
+
+def test_columns_include_the_batch_without_recording_it():
+    clock = FakeClock()
+    tracker = RateTracker(clock=clock)
+    failed = {"user_id": 7, "source_ip": "203.0.113.5", "failed_attempts": 1}
+    tracker.record_many([failed] * 4)
+    clock.now += 120
+    batch = [failed] * 3 + [{"user_id": 8, "source_ip": "203.0.113.5", "failed_attempts": 2, "bytes_transferred": 10}]
+    columns = tracker.columns(batch)
+    assert set(columns) == set(RATE_COLUMNS)
+    assert columns["user_failed_1m"].tolist() == [3.0, 3.0, 3.0, 2.0]
+    assert columns["user_failed_5m"].tolist() == [7.0, 7.0, 7.0, 2.0]
+    assert columns["ip_failed_5m"].tolist() == [9.0] * 4
+    assert columns["ip_bytes_60m"].tolist() == [10.0] * 4
+    # Scoring alone leaves the windows as they were.
+    assert tracker.columns([failed])["user_failed_5m"].tolist() == [5.0]
+    assert tracker.stats()["ip"]["keys"] == 1
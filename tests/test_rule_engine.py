@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import json
+import os
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from ai_engine.ip_reputation import IPReputation
+from ai_engine.rule_engine import EventColumns, RuleError, RuleSet, RuleStore
+from ai_engine.user_agents import Signature, UserAgentClassifier
+from config import Config
+from scripts.seed_scenarios import detection_scenarios
+from scripts.synthetic_activity import generate_activity
+
+
+def _legacy_heuristic_score(activity: dict) -> float | None:
+    """The hand-written heuristic the default rule file replaced."""
+    score = 0.0
+    event_type = (activity.get("event_type") or "").lower()
+    description = (activity.get("description") or "").lower()
+    bytes_transferred = float(activity.get("bytes_transferred") or 0)
+    files_accessed = int(activity.get("files_accessed") or 0)
+    failed_attempts = int(activity.get("failed_attempts") or 0)
+    timestamp = activity.get("timestamp")
+    if timestamp is not None and not isinstance(timestamp, datetime):
+        timestamp = datetime.fromisoformat(str(timestamp))
+    hour = timestamp.hour if timestamp else None
+    if hour is not None and (hour < 4 or hour > 22):
+        score = max(score, 0.72)
+    if "mass" in event_type or "copy" in event_type or files_accessed >= 100:
+        score = max(score, 0.78)
+    if bytes_transferred >= 1.5 * 1024 * 1024 * 1024 or "download" in event_type:
+        score = max(score, 0.8)
+    user_agent = (activity.get("user_agent") or "").lower()
+    source_ip = activity.get("source_ip") or "0.0.0.0"
+    if "python" in user_agent or "urllib" in user_agent or source_ip.startswith("198.51.") or source_ip.startswith("203.0.113."):
+        score = max(score, 0.75)
+    if failed_attempts >= 3:
+        score = max(score, 0.65)
+    if "privilege" in description:
+        score = max(score, 0.76)
+    return None if score == 0.0 else min(1.0, score)
+
+
+def test_default_rules_match_the_legacy_heuristic():
+    events = detection_scenarios() + list(generate_activity(2000, users=20, distinct_ips=50))
+    events += [
+        {"event_type": "login", "user_agent": "Python-urllib/3.13", "timestamp": "2025-01-08 10:00:00"},
+        {"source_ip": "203.0.113.9", "failed_attempts": 4, "description": "Privilege escalation"},
+        {},
+    ]
+    columns = EventColumns.from_events(events)
+    reputation = IPReputation.from_files(Config.AI_IP_BLOCKLIST_PATH, Config.AI_IP_ALLOWLIST_PATH)
+    # Only the two signatures the legacy check knew about, so new tool signatures do not differ.
+    user_agents = UserAgentClassifier([Signature("python", 0.75), Signature("urllib", 0.75)])
+    derived = {
+        **reputation.flag_columns(event.get("source_ip") for event in events),
+        **user_agents.columns(event.get("user_agent") for event in events),
+    }
+    for name, values in derived.items():
+        columns.add(name, values)
+    matches = RuleSet.from_file(Config.AI_RULES_PATH).evaluate(columns)
+    expected = np.array([_legacy_heuristic_score(event) or 0.0 for event in events])
+    assert np.array_equal(matches.scores, expected)
+
+
+def test_fired_rule_ids_and_combinators():
+    rules = RuleSet.from_dict(
+        {
+            "rules": [
+                {"id": "weekend_bulk", "score": 0.6, "when": {"all": [
+                    {"field": "day_of_week", "op": "in", "value": [5, 6]},
+                    {"field": "files_accessed", "op": "gt", "value": 10},
+                ]}},
+                {"id": "not_corporate", "score": 0.5, "when": {"not": {"field": "device", "op": "regex", "value": "^(corp|fin)-"}}},
+            ]
+        }
+    )
+    events = [
+        {"timestamp": datetime(2025, 1, 11, 12), "files_accessed": 50, "device": "CORP-LT1"},
+        {"timestamp": datetime(2025, 1, 13, 12), "files_accessed": 50, "device": "home-pc"},
+    ]
+    matches = rules.evaluate(EventColumns.from_events(events))
+    assert matches.fired_ids(0) == ["weekend_bulk"]
+    assert matches.fired_ids(1) == ["not_corporate"]
+    assert matches.scores.tolist() == [0.6, 0.5]
+
+
+def test_score_from_takes_the_score_from_a_column():
+    rules = RuleSet.from_dict(
+        {"rules": [{"id": "tool", "score": 0.8, "score_from": "ua_score", "when": {"field": "ua_score", "op": "gt", "value": 0}}]}
+    )
+    columns = EventColumns(3)
+    columns.add("ua_score", [0.0, 0.35, 0.9])
+    matches = rules.evaluate(columns)
+    assert matches.scores.tolist() == [0.0, 0.35, 0.8]
+    assert matches.fired_ids(0) == []
+
+
+@pytest.mark.parametrize(
+    "rule",
+    [
+        {"id": "x", "score": 0.5, "when": {"field": "nope", "op": "eq", "value": 1}},
+        {"id": "x", "score": 0.5, "when": {"field": "hour", "op": "contains", "value": "1"}},
+        {"id": "x", "score": 2, "when": {"field": "hour", "op": "eq", "value": 1}},
+        {"id": "x", "score": 0.5, "when": {"field": "device", "op": "regex", "value": "("}},
+        {"id": "x", "score_from": "device", "when": {"field": "hour", "op": "eq", "value": 1}},
+    ],
+)
+def test_invalid_rules_are_rejected(rule):
+    with pytest.raises(RuleError):
+        RuleSet.from_dict({"rules": [rule]})
+
+
+def test_store_reloads_changed_file_and_keeps_last_good_rules(tmp_path):
+    path = tmp_path / "rules.json"
+    path.write_text(json.dumps({"rules": [{"id": "a", "score": 0.5, "when": {"field": "failed_attempts", "op": "gte", "value": 1}}]}))
+    store = RuleStore(str(path), check_interval=0)
+    assert store.current().rule_ids == ("a",)
+
+    path.write_text(json.dumps({"rules": [{"id": "b", "score": 0.5, "when": {"field": "failed_attempts", "op": "gte", "value": 2}}]}))
+    os.utime(path, (1, 1))
+    assert store.current().rule_ids == ("b",)
+
+    path.write_text("{not json")
+    os.utime(path, (2, 2))
+    assert store.current().rule_ids == ("b",)
+    with pytest.raises(RuleError):
+        store.reload()
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+from collections import Counter
+from datetime import datetime
+
+from ai_engine.sampling import (
+    ReservoirSampler,
+    StratifiedSampler,
+    activity_stratum,
+    iter_activity_chunks,
+    sample_activity_logs,
+)
+
+
+def _row(index: int, user_id: int, event_type: str = "login", hour: int = 10) -> dict:
+    return {"id": index, "user_id": user_id, "event_type": event_type, "timestamp": datetime(2025, 1, 8, hour)}
+
+
+def _fake_fetch(rows: list[dict], queries: list):
+    def fetch(query, params):
+        queries.append((query, params))
+        last_id, limit = params
+        return [row for row in rows if row["id"] > last_id][:limit]
+
+    return fetch
+
+
+def test_keyset_pagination_never_sorts_whole_table():
+    rows = [_row(index, 1) for index in range(1, 26)]
+    queries: list = []
+    chunks = list(iter_activity_chunks(chunk_size=10, fetch=_fake_fetch(rows, queries)))
+
+    assert [len(chunk) for chunk in chunks] == [10, 10, 5]
+    assert [params for _, params in queries] == [(0, 10), (10, 10), (20, 10)]
+    assert all("WHERE id > %s ORDER BY id LIMIT %s" in query for query, _ in queries)
+
+
+def test_reservoir_sample_is_bounded():
+    sampler = ReservoirSampler(size=50)
+    for index in range(10_000):
+        sampler.add(_row(index, index % 7))
+    assert sampler.seen == 10_000
+    assert len(sampler.sample()) == 50
+
+
+def test_stratified_sample_is_not_dominated_by_busy_stratum():
+    rows = [_row(index, user_id=1, hour=14) for index in range(5_000)]
+    rows += [_row(5_000 + index, user_id=2 + index % 20, hour=9) for index in range(1_000)]
+
+    sampler = StratifiedSampler(size=210, key=activity_stratum)
+    for row in rows:
+        sampler.add(row)
+    sample = sampler.sample()
+    per_user = Counter(row["user_id"] for row in sample)
+
+    assert len(sample) == 210
+    assert sampler.strata == 21
+    assert set(per_user.values()) == {10}
+
+
+def test_stratified_eviction_heap_stays_bounded_by_strata():
+    sampler = StratifiedSampler(size=50, key=lambda row: row["user_id"])
+    for index in range(20_000):
+        sampler.add(_row(index, user_id=index % 5))
+        assert len(sampler._heap) <= 2 * sampler.strata
+
+    assert len(sampler.sample()) == 50
+    assert set(Counter(row["user_id"] for row in sampler.sample()).values()) == {10}
+
+
+def test_sample_activity_logs_streams_all_chunks():
+    rows = [_row(index, index % 5, event_type="login" if index % 2 else "file_access") for index in range(1, 1_001)]
+    sample = sample_activity_logs(size=100, chunk_size=64, fetch=_fake_fetch(rows, []))
+    assert len(sample) == 100
+    assert {row["user_id"] for row in sample} == {0, 1, 2, 3, 4}
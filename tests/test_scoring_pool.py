@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from ai_engine import model_store
+from ai_engine.bundle import artifact_schema, train_bundle
+from ai_engine.cascade import SvmPlan
+from ai_engine.engine import AIEngine
+from ai_engine.scoring_pool import LocalScorer, PoolScorer, ScoringPool
+from scripts.synthetic_activity import generate_activity
+
+
+@pytest.fixture(scope="module")
+def saved(tmp_path_factory):
+    directory = str(tmp_path_factory.mktemp("models"))
+    bundle = train_bundle(list(generate_activity(400, users=20, seed=31)), parallel=False)
+    version = model_store.save_artifact(directory, bundle.components(), artifact_schema(), bundle.training_rows, keep=0)
+    return directory, bundle.with_version(version)
+
+
+@pytest.fixture()
+def pool(saved):
+    pool = ScoringPool(saved[0], workers=2, min_chunk_rows=16)
+    yield pool
+    pool.shutdown()
+
+
+def test_pool_scores_both_models_in_one_task_per_chunk(saved, pool):
+    _, bundle = saved
+    events = list(generate_activity(100, users=20, seed=32))
+    rules = np.zeros(len(events))
+    observed = []
+    local = LocalScorer(bundle, events).scores(SvmPlan("all"), rules)
+    remote_scorer = pool.scorer(bundle, events, lambda stage, seconds, rows: observed.append((stage, rows)))
+    assert isinstance(remote_scorer, PoolScorer)
+    remote = remote_scorer.scores(SvmPlan("all"), rules)
+    assert np.allclose(remote.iso, local.iso) and np.allclose(remote.svm, local.svm)
+    assert sorted(observed) == [("isolation_forest", 100), ("one_class_svm", 100), ("preprocessing", 100)]
+    assert pool.stats()["tasks"] == 2 and pool.stats()["rows"] == 100
+
+    band = SvmPlan.band(bundle.isolation_calibration, 0.5, 0.99, 0.9)
+    banded = pool.scorer(bundle, events).scores(band, rules)
+    expected = LocalScorer(bundle, events).scores(band, rules)
+    assert np.array_equal(banded.stages, expected.stages)
+    assert np.allclose(banded.svm, expected.svm, equal_nan=True)
+    assert pool.stats()["tasks"] == 4 and 1 <= pool.stats()["artifact_loads"] <= 2
+
+
+def test_workers_reload_new_versions_and_fall_back_when_artifacts_vanish(saved, pool):
+    directory, bundle = saved
+    # Fewer events than min_chunk_rows: one task per call, so one artifact load per new version.
+    events = list(generate_activity(10, users=20, seed=33))
+    rules = np.zeros(len(events))
+    pool.map_scores(bundle.version, events, SvmPlan("none"), rules)
+    newer = model_store.save_artifact(directory, bundle.components(), artifact_schema(), 401, keep=0)
+    pool.map_scores(newer, events, SvmPlan("none"), rules)
+    assert pool.stats()["artifact_loads"] == 2
+
+    # A version pruned before any worker mapped it.
+    missing = bundle.with_version("20000101T000000000000Z-400")
+    scores = pool.scorer(missing, events).scores(SvmPlan("all"), rules)
+    assert np.allclose(scores.iso, LocalScorer(bundle, events).scores(SvmPlan("all"), rules).iso)
+    assert pool.stats()["fallbacks"] == 1
+
+
+def test_engine_results_are_identical_with_the_pool(saved, pool):
+    _, bundle = saved
+    events = list(generate_activity(80, users=20, seed=34))
+    engine = AIEngine()
+    engine._bundle = bundle
+    direct = [result.as_dict() for result in engine.analyse_batch(events, persist=False)]
+    engine.pool = pool
+    pooled = [result.as_dict() for result in engine.analyse_batch(events, persist=False)]
+    for before, after in zip(direct, pooled):
+        assert after["risk_level"] == before["risk_level"]
+        assert after["risk_score"] == pytest.approx(before["risk_score"])
+        assert after["svm_score"] == pytest.approx(before["svm_score"])
+    assert pool.stats()["tasks"] == 2
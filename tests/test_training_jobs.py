@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+import threading
+import time
+
+from ai_engine.training_jobs import TrainingJobManager
+
+
+def _wait(job, timeout: float = 5.0):
+    deadline = time.time() + timeout
+    while job.is_active and time.time() < deadline:
+        time.sleep(0.01)
+    return job
+
+
+def test_job_reports_progress_and_result():
+    manager = TrainingJobManager()
+    release = threading.Event()
+
+    def runner(progress, limit):
+        progress("fitting", 0.5)
+        release.wait(2)
+        return {"training_rows": limit}
+
+    job = manager.submit(runner, limit=42)
+    assert manager.submit(runner, limit=7) is job, "a pending job should be reused"
+    release.set()
+
+    _wait(job)
+    assert manager.get(job.job_id) is job
+    assert job.status == "completed"
+    assert job.progress == 1.0
+    assert job.result == {"training_rows": 42}
+    assert job.duration is not None and job.duration >= 0
+
+
+def test_failed_job_records_error():
+    manager = TrainingJobManager()
+
+    def runner(progress):
+        raise RuntimeError("no activity logs")
+
+    job = _wait(manager.submit(runner))
+    assert job.status == "failed"
+    assert job.error == "no activity logs"
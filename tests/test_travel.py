@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from ai_engine.travel import MAX_REPORTED_KMH, LocationTable, TravelDetector, haversine_km
+from config import Config
+
+
+@pytest.fixture()
+def table() -> LocationTable:
+    return LocationTable.from_file(Config.AI_LOCATIONS_PATH)
+
+
+def _event(location: str, timestamp: str, user_id: int = 4) -> dict:
+    return {"user_id": user_id, "location": location, "timestamp": timestamp}
+
+
+def test_location_table_resolves_names_case_insensitively(table):
+    assert table.resolve("nyc  hq") == table.resolve("NYC HQ") == (40.7128, -74.006)
+    assert table.resolve("London, UK") == table.resolve("London")
+    assert table.resolve("Remote") is None and table.resolve(None) is None
+    assert haversine_km(*table.resolve("NYC HQ"), *table.resolve("London")) == pytest.approx(5570, rel=0.01)
+    with pytest.raises(ValueError):
+        LocationTable.from_dict({"locations": {"Nowhere": [91, 0]}})
+
+
+def test_flags_transitions_faster_than_the_configured_speed(table):
+    detector = TravelDetector(lambda: table, max_kmh=900, min_km=100)
+    detector.record_many([_event("NYC HQ", "2025-01-08 09:00:00")])
+    columns = detector.columns([
+        _event("London", "2025-01-08 11:00:00"),   # 5,570 km in 2 h
+        _event("London", "2025-01-08 11:30:00"),   # same city, compared with the batch's previous event
+        _event("Remote", "2025-01-08 11:40:00"),   # unresolvable
+        _event("Paris", "2025-01-09 11:00:00"),    # 344 km in a day
+        _event("Tokyo", "2025-01-08 12:00:00", user_id=5),  # no history
+    ])
+    assert columns["impossible_travel"].tolist() == [1.0, 0.0, 0.0, 0.0, 0.0]
+    assert columns["travel_kmh"][0] == pytest.approx(2785, rel=0.01)
+    assert columns["travel_km"][1] == 0.0 and columns["travel_km"][3] == pytest.approx(344, rel=0.02)
+    # Scoring does not move the last-seen point.
+    assert detector.last_seen(4)[0] == "NYC HQ"
+
+
+def test_short_hops_and_same_instant_jumps(table):
+    detector = TravelDetector(lambda: table, max_kmh=900, min_km=100)
+    detector.record_many([_event("San Francisco", "2025-01-08 09:00:00")])
+    columns = detector.columns([_event("Los Angeles", "2025-01-08 09:10:00"), _event("Tokyo", "2025-01-08 09:10:00")])
+    # 559 km in ten minutes is too fast; the Tokyo hop is judged against Los Angeles at the same instant.
+    assert columns["impossible_travel"].tolist() == [1.0, 1.0]
+    assert columns["travel_kmh"][1] == MAX_REPORTED_KMH
+    detector.min_km = 1000
+    assert detector.columns([_event("Los Angeles", "2025-01-08 09:10:00")])["impossible_travel"][0] == 0.0
+
+
+def test_late_events_do_not_rewind_last_seen_and_state_round_trips(table):
+    rows = {}
+
+    def execute_many(query, values):
+        assert query.startswith("INSERT INTO user_last_seen")
+        for user_id, location, latitude, longitude, seen_at in values:
+            rows[user_id] = {"user_id": user_id, "location": location, "latitude": latitude, "longitude": longitude, "seen_at": seen_at}
+
+    detector = TravelDetector(lambda: table, execute_many=execute_many, fetch=lambda query, params: list(rows.values()))
+    detector.record_many([_event("Tokyo", "2025-01-08 12:00:00"), _event("Sydney", "2025-01-08 08:00:00")])
+    assert detector.last_seen(4)[0] == "Tokyo" and detector.stats()["impossible_travel"] == 1
+    assert detector.flush() == 1 and detector.flush() == 0
+
+    restored = TravelDetector(lambda: table, fetch=lambda query, params: list(rows.values()))
+    assert restored.load() == 1
+    location, latitude, longitude, seen_at = restored.last_seen(4)
+    assert (location, latitude, longitude) == ("Tokyo", 35.6762, 139.6503)
+    assert seen_at == datetime(2025, 1, 8, 12).timestamp()
+
+
+def test_flushes_keep_the_newest_sighting_and_adopt_other_workers(table):
+    rows = {}
+
+    def execute_many(query, values):
+        assert "seen_at = GREATEST(seen_at, VALUES(seen_at))" in query
+        for user_id, location, latitude, longitude, seen_at in values:
+            if user_id not in rows or seen_at >= rows[user_id]["seen_at"]:
+                rows[user_id] = {"user_id": user_id, "location": location, "latitude": latitude, "longitude": longitude, "seen_at": seen_at}
+
+    def fetch(query, params):
+        return [row for row in rows.values() if not params or row["seen_at"] >= params[0]]
+
+    workers = [TravelDetector(lambda: table, execute_many=execute_many, fetch=fetch) for _ in range(2)]
+    for worker in workers:
+        worker.load()
+    now = datetime.now().replace(microsecond=0)
+    workers[0].record_many([_event("London", str(now - timedelta(hours=1)))])
+    workers[1].record_many([_event("Tokyo", str(now + timedelta(minutes=1)))])
+    workers[1].flush()
+    workers[0].flush()
+    # The older London sighting did not replace Tokyo, and the first worker adopted it.
+    assert rows[4]["location"] == "Tokyo"
+    assert workers[0].last_seen(4)[0] == "Tokyo"
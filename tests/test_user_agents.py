@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import os
+import random
+
+from ai_engine.user_agents import AhoCorasick, Signature, UserAgentClassifier, UserAgentStore
+from config import Config
+
+
+def test_automaton_finds_every_overlapping_pattern():
+    rng = random.Random(5)
+    patterns = sorted({"".join(rng.choices("abc", k=rng.randint(1, 4))) for _ in range(40)})
+    automaton = AhoCorasick(patterns)
+    for _ in range(300):
+        text = "".join(rng.choices("abcd", k=rng.randint(0, 30)))
+        assert automaton.search(text) == {index for index, pattern in enumerate(patterns) if pattern in text}
+
+
+def test_default_signatures_flag_tools_but_not_browsers():
+    classifier = UserAgentClassifier.from_file(Config.AI_USER_AGENTS_PATH)
+    assert len(classifier) >= 100
+
+    browser = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 Chrome/124.0 Safari/537.36"
+    assert classifier.classify(browser).score == 0.0
+    assert classifier.classify(None).score == 0.0
+
+    urllib = classifier.classify("Python-urllib/3.13")
+    assert urllib.score == 0.75 and set(urllib.patterns) == {"python", "urllib"}
+    assert classifier.classify("rclone/v1.66.0").categories == ("sync_exfil",)
+    assert classifier.classify("sqlmap/1.8 curl/8.5").score == max(
+        signature.weight for signature in classifier.signatures if signature.pattern in {"sqlmap", "curl"}
+    )
+
+
+def test_batch_columns_and_lru():
+    classifier = UserAgentClassifier([Signature("curl", 0.7, "cli"), Signature("python", 0.75, "script")], cache_size=8)
+    user_agents = ["curl/8.5.0", "python-requests/2.32", "curl/8.5.0", "", "CURL/8.5.0"] * 20
+    columns = classifier.columns(user_agents)
+    assert columns["ua_score"][:5].tolist() == [0.7, 0.75, 0.7, 0.0, 0.7]
+    assert columns["ua_category"][:2].tolist() == ["cli", "script"]
+    info = classifier.cache_info()
+    assert info["misses"] == 2 and info["hits"] == 78
+
+
+def test_store_reloads_signatures(tmp_path):
+    path = tmp_path / "agents.json"
+    path.write_text('{"signatures": [{"pattern": "curl", "weight": 0.7}]}')
+    store = UserAgentStore(str(path), check_interval=0)
+    assert store.current().classify("curl/8").score == 0.7
+
+    path.write_text('{"signatures": [{"pattern": "wget", "weight": 0.6}]}')
+    os.utime(path, (1, 1))
+    assert store.current().classify("curl/8").score == 0.0
+    assert store.current().classify("Wget/1.21").score == 0.6
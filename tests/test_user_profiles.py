@@ -0,0 +1,221 @@
+from __future__ import annotations
+
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+import pytest
+
+import ai_engine.engine as engine_module
+from ai_engine.bundle import train_bundle
+from ai_engine.engine import AIEngine
+from ai_engine.membership import BloomFilter
+from ai_engine.user_profiles import ProfileStore, UserProfile
+from scripts.synthetic_activity import generate_activity
+
+
+def _history(user_id: int, count: int, seed: int = 5) -> list[dict]:
+    rng = random.Random(seed)
+    return [
+        {
+            "user_id": user_id,
+            "bytes_transferred": rng.gauss(50_000, 5_000),
+            "files_accessed": rng.randint(1, 9),
+            "session_duration": rng.randint(300, 600),
+            "device": "Laptop-01",
+            "source_ip": "10.0.0.5",
+            "timestamp": f"2025-01-08 {rng.randint(9, 17):02d}:15:00",
+        }
+        for _ in range(count)
+    ]
+
+
+def test_running_statistics_match_numpy():
+    events = _history(1, 500)
+    store = ProfileStore(min_events=1)
+    for event in events:
+        store.observe(event)
+    profile = store.get(1)
+    for index, metric in enumerate(("bytes_transferred", "files_accessed", "session_duration")):
+        values = np.array([event[metric] for event in events], dtype=float)
+        assert profile.means[index] == pytest.approx(values.mean())
+        assert profile.std(index) == pytest.approx(values.std())
+    assert sum(profile.hours) == 500 and sum(profile.hours[9:18]) == 500
+    assert "LAPTOP-01" in profile.devices and profile.devices.count == 1
+
+
+def test_deviation_signals_against_the_users_own_baseline():
+    store = ProfileStore(min_events=20)
+    store.observe_many(_history(1, 200))
+    normal, unusual, newcomer = _history(1, 1, seed=9)[0], dict(_history(1, 1, seed=9)[0]), {"user_id": 2, "bytes_transferred": 9e9}
+    unusual.update(bytes_transferred=2 * 1024**3, device="Unknown-VM", source_ip="198.51.100.7", timestamp="2025-01-09 03:00:00")
+    signals = store.signals([normal, unusual, newcomer, {"bytes_transferred": 1}])
+
+    assert abs(signals["bytes_zscore"][0]) < 4 and signals["bytes_zscore"][1] > 1000 - 1e-9
+    assert signals["new_device"].tolist() == [0.0, 1.0, 0.0, 0.0]
+    assert signals["new_ip"].tolist() == [0.0, 1.0, 0.0, 0.0]
+    assert signals["hour_rarity"][1] == 1.0 and signals["hour_rarity"][0] < 1.0
+    # Users without a mature baseline (or without an id) produce no deviation signals.
+    assert signals["profile_events"].tolist() == [200.0, 200.0, 0.0, 0.0]
+    assert signals["profile_mature"].tolist() == [1.0, 1.0, 0.0, 0.0]
+    assert signals["bytes_zscore"][2] == 0.0
+
+
+def test_hour_rarity_ignores_events_without_a_timestamp():
+    store = ProfileStore(min_events=20)
+    history = _history(1, 40)
+    store.observe_many(history + [{key: value for key, value in event.items() if key != "timestamp"} for event in history])
+    usual_hour = max(range(24), key=store.get(1).hours.__getitem__)
+    event = dict(history[0], timestamp=f"2025-01-10 {usual_hour:02d}:00:00")
+    assert store.signals([event])["hour_rarity"][0] == pytest.approx(1 - store.get(1).hours[usual_hour] / 40)
+    assert store.signals([{"user_id": 1, "timestamp": "2025-01-10 03:00:00"}])["hour_rarity"][0] == 1.0
+
+
+def test_first_seen_signals_from_the_second_event():
+    store = ProfileStore(min_events=20)
+    store.observe({"user_id": 1, "device": "dev-1", "source_ip": "10.0.0.1"})
+    signals = store.signals([
+        {"user_id": 1, "device": "dev-1", "source_ip": "10.0.0.1"},
+        {"user_id": 1, "device": "dev-2", "source_ip": "10.0.0.1"},
+        {"user_id": 1, "device": "dev-1"},
+    ])
+    assert signals["new_device"].tolist() == [0.0, 1.0, 0.0]
+    assert signals["new_ip"].tolist() == [0.0, 0.0, 0.0]
+    # Z-scores still wait for a mature baseline.
+    assert not signals["bytes_zscore"].any() and not signals["profile_mature"].any()
+
+
+def test_build_from_history_streams_activity_logs_once():
+    history = [dict(event, id=index + 1) for index, event in enumerate(_history(1, 120) + _history(2, 80))]
+    queries = []
+
+    def fetch(query, params):
+        queries.append(params)
+        last_id, limit = params
+        return [row for row in history if row["id"] > last_id][:limit]
+
+    store = ProfileStore(fetch=fetch)
+    assert store.build_from_history(chunk_size=50) == 200
+    assert [params[0] for params in queries] == [0, 50, 100, 150, 200]
+    assert store.get(1).count == 120 and store.get(2).count == 80
+    assert store.stats()["pending_flush"] == 2
+
+
+class _ProfileTable:
+    """In-memory ``user_profiles`` behind the ``transaction`` cursor interface."""
+
+    def __init__(self, logs: list[dict] | None = None) -> None:
+        self.rows: dict[int, dict] = {}
+        self.logs = [dict(event, id=index + 1) for index, event in enumerate(logs or [])]
+        self.fail = False
+
+    def fetch(self, query, params):
+        if "FROM activity_logs" in query:
+            last_id, limit = params
+            return [row for row in self.logs if row["id"] > last_id][:limit]
+        return [{"user_id": user_id, "snapshot": row["snapshot"]} for user_id, row in self.rows.items()]
+
+    @contextmanager
+    def transaction(self):
+        if self.fail:
+            raise RuntimeError("database unavailable")
+        yield self
+
+    def execute(self, query, params):
+        if "updated_at >=" in query:
+            self._result = [{"user_id": user_id, "snapshot": row["snapshot"]} for user_id, row in self.rows.items() if row["updated_at"] >= params[0]]
+        else:
+            assert query.endswith("FOR UPDATE")
+            self._result = [{"user_id": user_id, "snapshot": self.rows[user_id]["snapshot"]} for user_id in params if user_id in self.rows]
+
+    def fetchall(self):
+        return self._result
+
+    def executemany(self, query, rows):
+        assert query.startswith("INSERT INTO user_profiles")
+        for user_id, _, snapshot, updated_at in rows:
+            self.rows[user_id] = {"snapshot": snapshot, "updated_at": updated_at}
+
+
+def test_flush_writes_only_changed_profiles_and_load_restores_them():
+    table = _ProfileTable()
+    store = ProfileStore(fetch=table.fetch, transaction=table.transaction, flush_interval=3600)
+    store.observe_many(_history(1, 50) + _history(2, 30))
+    assert store.maybe_flush() == 0  # interval not reached
+    assert store.flush() == 2 and store.flush() == 0
+    store.observe(_history(2, 1)[0])
+    assert store.flush() == 1
+
+    restored = ProfileStore(fetch=table.fetch)
+    assert restored.load() == 2
+    original, copy = store.get(2), restored.get(2)
+    assert copy.count == 31 and copy.means == original.means and copy.hours == original.hours
+    assert copy.devices.to_bytes() == original.devices.to_bytes() and copy.ips.to_bytes() == original.ips.to_bytes()
+    assert "laptop-01" in copy.devices and "10.0.0.5" in copy.ips
+    assert len(table.rows[1]["snapshot"]) == store.get(1).snapshot_size == 781
+
+
+def test_concurrent_workers_merge_instead_of_overwriting():
+    table = _ProfileTable(logs=_history(1, 40))
+    workers = [ProfileStore(fetch=table.fetch, transaction=table.transaction) for _ in range(2)]
+    for worker in workers:
+        # Both workers bootstrap from the same history: it must be stored once.
+        worker.build_from_history()
+    first, second = _history(1, 30, seed=6), [dict(event, device="Desktop-7") for event in _history(1, 20, seed=7)]
+    workers[0].observe_many(first)
+    workers[1].observe_many(second)
+    workers[0].flush()
+    workers[1].flush()
+
+    stored = ProfileStore(fetch=table.fetch)
+    stored.load()
+    everything = _history(1, 40) + first + second
+    for store in (stored, workers[1]):
+        profile = store.get(1)
+        assert profile.count == 90
+        assert profile.means[0] == pytest.approx(np.mean([event["bytes_transferred"] for event in everything]))
+        assert profile.std(0) == pytest.approx(np.std([event["bytes_transferred"] for event in everything]))
+        assert "desktop-7" in profile.devices and "laptop-01" in profile.devices
+    # The first worker catches up with the second at its next flush.
+    workers[0].observe(_history(1, 1, seed=8)[0])
+    workers[0].flush()
+    assert workers[0].get(1).count == 91 and "desktop-7" in workers[0].get(1).devices
+
+
+def test_failed_flush_keeps_profiles_pending():
+    table = _ProfileTable()
+    table.fail = True
+    store = ProfileStore(transaction=table.transaction)
+    store.observe({"user_id": 1})
+    with pytest.raises(RuntimeError):
+        store.flush()
+    store.observe({"user_id": 1})
+    assert store.stats()["pending_flush"] == 1
+    table.fail = False
+    assert store.flush() == 1 and store.get(1).count == 2
+    assert UserProfile.from_bytes(table.rows[1]["snapshot"]).count == 2
+
+
+def test_snapshot_rejects_unknown_format():
+    payload = bytearray(UserProfile(BloomFilter.for_capacity(8), BloomFilter.for_capacity(8)).to_bytes())
+    payload[0] = 99
+    with pytest.raises(ValueError):
+        UserProfile.from_bytes(bytes(payload))
+
+
+def test_engine_flushes_state_off_the_request_thread(monkeypatch):
+    flushed_on: list[str] = []
+    monkeypatch.setattr(engine_module.alert_service, "create_alert", lambda *args: 1)
+    monkeypatch.setattr(engine_module.llm_client, "shared_client", lambda: None)
+    engine = AIEngine()
+    engine._bundle = train_bundle(list(generate_activity(300, users=10, distinct_ips=20)), parallel=False)
+    engine.profiles.flush_interval = engine.travel.flush_interval = 0
+    engine.profiles.maybe_flush = lambda: flushed_on.append(threading.current_thread().name) or 0
+    engine.travel.maybe_flush = lambda: 0
+
+    engine.analyse_batch(list(generate_activity(20, users=5, seed=3)))
+    assert flushed_on == []
+    time.sleep(1.3)
+    assert flushed_on and set(flushed_on) == {"ai-state-flusher"}